@@ -0,0 +1,399 @@
+"""Compact columnar archives for shipping catalogs to disconnected sites.
+
+An archive stores every table in ``TABLE_SCHEMAS`` column by column.  Rows are
+split into chunks; each column chunk is encoded by its declared type (packed
+64-bit integers or doubles with a null bitmap, dictionary-encoded strings) and
+compressed with zstd when available, zlib otherwise.  A JSON manifest in the
+footer records chunk offsets, CRCs and a SHA-256 over the whole payload.
+
+Layout::
+
+    MAGIC | chunk bytes ... | manifest JSON | manifest length (u64) | MAGIC
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from array import array
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from catalog_snapshot import snapshot_index_statements
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS, TABLES
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MAGIC = b"CMSDBCOL"
+FORMAT_VERSION = 1
+CHUNK_ROWS = 65536
+FOOTER = struct.Struct("<Q")
+ZLIB_LEVEL = 3
+ZSTD_LEVEL = 9
+
+ENCODING_INT = "int64"
+ENCODING_REAL = "float64"
+ENCODING_DICT = "dict"
+
+
+class ArchiveError(Exception):
+    """Raised when an archive is malformed or fails its checksum."""
+
+
+def column_kind(definition: str) -> str:
+    """Map a ``TABLE_SCHEMAS`` column definition to its storage encoding."""
+
+    declared = definition.split()[0].upper()
+    if declared == "INTEGER":
+        return ENCODING_INT
+    if declared == "REAL":
+        return ENCODING_REAL
+    return ENCODING_DICT
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ArchiveError("zstd codec requested but the zstandard package is not installed.")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ArchiveError("Archive uses zstd but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ArchiveError(f"Unknown codec: {codec}")
+
+
+def _null_bitmap(values: Sequence[object]) -> bytes:
+    bitmap = bytearray((len(values) + 7) // 8)
+    if None in values:
+        for index, value in enumerate(values):
+            if value is None:
+                bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def _is_null(bitmap: bytes, index: int) -> bool:
+    return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+
+def encode_column(values: Sequence[object], kind: str) -> Tuple[str, bytes]:
+    """Encode one column chunk, falling back to strings for off-type values."""
+
+    if kind == ENCODING_INT and all(value is None or type(value) is int for value in values):
+        packed = array("q", (0 if value is None else value for value in values))
+        return ENCODING_INT, _null_bitmap(values) + packed.tobytes()
+    if kind == ENCODING_REAL and all(
+        value is None or type(value) in (int, float) for value in values
+    ):
+        packed = array("d", (0.0 if value is None else float(value) for value in values))
+        return ENCODING_REAL, _null_bitmap(values) + packed.tobytes()
+
+    dictionary: Dict[str, int] = {}
+    assign = dictionary.setdefault
+    codes = array(
+        "I",
+        [
+            0 if value is None else assign(value if type(value) is str else str(value), len(dictionary) + 1)
+            for value in values
+        ],
+    )
+    entries = [text.encode("utf-8") for text in dictionary]
+    header = struct.pack("<I", len(entries))
+    lengths = array("I", (len(entry) for entry in entries)).tobytes()
+    return ENCODING_DICT, header + lengths + b"".join(entries) + codes.tobytes()
+
+
+def decode_column(payload: bytes, encoding: str, rows: int) -> List[object]:
+    """Inverse of :func:`encode_column`."""
+
+    if encoding in (ENCODING_INT, ENCODING_REAL):
+        bitmap_size = (rows + 7) // 8
+        bitmap = payload[:bitmap_size]
+        packed = array("q" if encoding == ENCODING_INT else "d")
+        packed.frombytes(payload[bitmap_size:])
+        values: List[object] = packed.tolist()
+        if any(bitmap):
+            for index in range(rows):
+                if _is_null(bitmap, index):
+                    values[index] = None
+        return values
+
+    if encoding != ENCODING_DICT:
+        raise ArchiveError(f"Unknown column encoding: {encoding}")
+    (count,) = struct.unpack_from("<I", payload, 0)
+    offset = 4
+    lengths = array("I")
+    lengths.frombytes(payload[offset : offset + 4 * count])
+    offset += 4 * count
+    dictionary: List[Optional[str]] = [None]
+    for length in lengths:
+        dictionary.append(payload[offset : offset + length].decode("utf-8"))
+        offset += length
+    codes = array("I")
+    codes.frombytes(payload[offset:])
+    return [dictionary[code] for code in codes]
+
+
+def _iter_chunks(cursor: sqlite3.Cursor, size: int) -> Iterator[List[Tuple[object, ...]]]:
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+def new_manifest(codec: str) -> Dict[str, object]:
+    return {
+        "format": FORMAT_VERSION,
+        "codec": codec,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "tables": {},
+    }
+
+
+def write_chunk(
+    handle: BinaryIO,
+    rows: Sequence[Tuple[object, ...]],
+    kinds: Sequence[str],
+    codec: str,
+    digest: "hashlib._Hash",
+    offset: int,
+) -> Tuple[Dict[str, object], int]:
+    """Append one chunk of ``rows`` column by column; returns its manifest entry and the next offset."""
+
+    chunk_columns = []
+    for position, values in enumerate(zip(*rows)):
+        encoding, raw = encode_column(values, kinds[position])
+        data = compress(raw, codec)
+        handle.write(data)
+        digest.update(data)
+        chunk_columns.append(
+            {
+                "encoding": encoding,
+                "offset": offset,
+                "length": len(data),
+                "crc32": zlib.crc32(data),
+            }
+        )
+        offset += len(data)
+    return {"rows": len(rows), "columns": chunk_columns}, offset
+
+
+def write_footer(handle: BinaryIO, manifest: Dict[str, object], digest: "hashlib._Hash") -> None:
+    """Finish an archive: the payload checksum goes into ``manifest``, which is written last."""
+
+    manifest["sha256"] = digest.hexdigest()
+    encoded = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    handle.write(encoded)
+    handle.write(FOOTER.pack(len(encoded)))
+    handle.write(MAGIC)
+
+
+def export_archive(
+    db_file: str = DB_FILE,
+    archive_path: str = "",
+    codec: str = "",
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, object]:
+    """Write every catalog table to ``archive_path`` and return the manifest."""
+
+    archive_path = archive_path or os.path.splitext(db_file)[0] + ".cmsdb"
+    codec = codec or default_codec()
+    digest = hashlib.sha256()
+    manifest = new_manifest(codec)
+
+    conn = sqlite3.connect(db_file)
+    try:
+        with open(archive_path, "wb") as handle:
+            handle.write(MAGIC)
+            offset = len(MAGIC)
+            for table, schema in TABLE_SCHEMAS.items():
+                columns = [name for name, _ in schema]
+                kinds = [column_kind(definition) for _, definition in schema]
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                except sqlite3.OperationalError:
+                    continue
+                chunks: List[Dict[str, object]] = []
+                total_rows = 0
+                for rows in _iter_chunks(cursor, chunk_rows):
+                    chunk, offset = write_chunk(handle, rows, kinds, codec, digest, offset)
+                    chunks.append(chunk)
+                    total_rows += len(rows)
+                manifest["tables"][table] = {
+                    "columns": columns,
+                    "rows": total_rows,
+                    "chunks": chunks,
+                }
+            write_footer(handle, manifest, digest)
+    finally:
+        conn.close()
+    return manifest
+
+
+def read_manifest(archive_path: str) -> Dict[str, object]:
+    with open(archive_path, "rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ArchiveError(f"{archive_path} is not a catalog archive.")
+        handle.seek(-(FOOTER.size + len(MAGIC)), os.SEEK_END)
+        (length,) = FOOTER.unpack(handle.read(FOOTER.size))
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ArchiveError(f"{archive_path} is truncated.")
+        handle.seek(-(FOOTER.size + len(MAGIC) + length), os.SEEK_END)
+        manifest = json.loads(handle.read(length).decode("utf-8"))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ArchiveError(f"Unsupported archive format: {manifest.get('format')}")
+    return manifest
+
+
+def verify_archive(archive_path: str) -> Dict[str, object]:
+    """Check every chunk CRC and the payload SHA-256; return the manifest."""
+
+    manifest = read_manifest(archive_path)
+    digest = hashlib.sha256()
+    with open(archive_path, "rb") as handle:
+        for table_info in manifest["tables"].values():
+            for chunk in table_info["chunks"]:
+                for column in chunk["columns"]:
+                    handle.seek(column["offset"])
+                    data = handle.read(column["length"])
+                    if zlib.crc32(data) != column["crc32"]:
+                        raise ArchiveError("Column chunk failed its CRC check.")
+                    digest.update(data)
+    if digest.hexdigest() != manifest["sha256"]:
+        raise ArchiveError("Archive checksum mismatch.")
+    return manifest
+
+
+def check_manifest(manifest: Dict[str, object]) -> None:
+    """Reject codecs, tables and columns the catalog does not know before any of them reach SQL."""
+
+    codec = manifest.get("codec")
+    if codec not in ("zstd", "zlib"):
+        raise ArchiveError(f"Unknown codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        raise ArchiveError("Archive uses zstd but the zstandard package is not installed.")
+    for table, table_info in manifest["tables"].items():
+        if table not in TABLE_SCHEMAS:
+            raise ArchiveError(f"Archive contains unknown table {table!r}.")
+        known = {name for name, _ in TABLE_SCHEMAS[table]}
+        unknown = [column for column in table_info["columns"] if column not in known]
+        if unknown:
+            raise ArchiveError(f"Archive table {table} has unknown columns: {', '.join(map(repr, unknown))}.")
+
+
+def import_archive(archive_path: str, db_file: str, overwrite: bool = False) -> Dict[str, int]:
+    """Rebuild a catalog database from an archive; indexes are built after loading.
+
+    The catalog is built in ``<db_file>.tmp`` and only replaces ``db_file``
+    once every table has been written and its row count checked, so a bad
+    archive or a crash leaves an existing catalog untouched.
+    """
+
+    manifest = verify_archive(archive_path)
+    check_manifest(manifest)
+    codec = manifest["codec"]
+    if os.path.exists(db_file) and not overwrite:
+        raise FileExistsError(f"{db_file} already exists; pass overwrite=True to replace it.")
+
+    building = db_file + ".tmp"
+    for path in (building, building + "-journal"):
+        if os.path.exists(path):
+            os.remove(path)
+    counts: Dict[str, int] = {}
+    conn = sqlite3.connect(building)
+    try:
+        cur = conn.cursor()
+        for ddl in TABLES.values():
+            cur.execute(ddl)
+        with open(archive_path, "rb") as handle:
+            for table, table_info in manifest["tables"].items():
+                columns: List[str] = table_info["columns"]
+                statement = (
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})"
+                )
+                for chunk in table_info["chunks"]:
+                    decoded = []
+                    for column in chunk["columns"]:
+                        handle.seek(column["offset"])
+                        raw = decompress(handle.read(column["length"]), codec)
+                        decoded.append(decode_column(raw, column["encoding"], chunk["rows"]))
+                    cur.executemany(statement, zip(*decoded))
+                (stored,) = cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+                if stored != table_info["rows"]:
+                    raise ArchiveError(f"{table}: the archive lists {table_info['rows']} rows but {stored} were decoded.")
+                counts[table] = stored
+        conn.commit()
+        for statement in snapshot_index_statements():
+            cur.execute(statement)
+        cur.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(building)
+        raise
+    conn.close()
+    # A leftover journal of the old file must not be replayed into the new one.
+    for suffix in ("-journal", "-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+    os.replace(building, db_file)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export or import columnar catalog archives.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write a database to an archive")
+    export_parser.add_argument("--db", default=DB_FILE)
+    export_parser.add_argument("--output", default="")
+    export_parser.add_argument("--codec", choices=("zstd", "zlib"), default="")
+
+    import_parser = subparsers.add_parser("import", help="rebuild a database from an archive")
+    import_parser.add_argument("archive")
+    import_parser.add_argument("--db", default=DB_FILE)
+    import_parser.add_argument("--overwrite", action="store_true")
+
+    verify_parser = subparsers.add_parser("verify", help="check archive integrity")
+    verify_parser.add_argument("archive")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.command == "export":
+        if not os.path.exists(args.db):
+            raise SystemExit(f"Catalog database not found: {args.db}")
+        manifest = export_archive(args.db, args.output, args.codec)
+        rows = sum(info["rows"] for info in manifest["tables"].values())
+        print(f"Exported {rows} rows with {manifest['codec']} in {time.perf_counter() - start:.2f}s")
+    elif args.command == "import":
+        try:
+            counts = import_archive(args.archive, args.db, args.overwrite)
+        except (ArchiveError, FileExistsError) as error:
+            raise SystemExit(str(error)) from None
+        print(f"Imported {sum(counts.values())} rows in {time.perf_counter() - start:.2f}s")
+    else:
+        manifest = verify_archive(args.archive)
+        print(f"Archive OK: {len(manifest['tables'])} tables, sha256 {manifest['sha256']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""In-process bitmap index over low-cardinality catalog columns.
+
+Columns such as Country, PhysicalSize, OODA, Agility and Armor hold a few dozen
+distinct values but are filtered constantly.  :class:`BitmapIndex` keeps one
+:class:`RoaringBitmap` of row ids per value per table, so multi-attribute
+filters become AND/OR/NOT over bitsets instead of SQL scans.  The index is
+rebuilt only when ``PRAGMA data_version`` reports a commit from another
+connection.
+
+Roaring layout: ids are split on their high 16 bits into containers.  Sparse
+containers hold a sorted ``array('H')`` of low bits; once a container passes
+:data:`ARRAY_LIMIT` entries it becomes a 65536-bit Python ``int`` whose
+``&``/``|``/``~`` run in C.
+"""
+
+import sqlite3
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from initialize_esm_db import TABLE_SCHEMAS
+
+ARRAY_LIMIT = 4096
+CONTAINER_BITS = 1 << 16
+CONTAINER_BYTES = CONTAINER_BITS // 8
+
+BITMAP_COLUMNS = ("Country", "PhysicalSize", "OODA", "Agility", "Armor")
+
+Container = Union[array, int]
+
+
+def _to_bits(container: Container) -> int:
+    if isinstance(container, int):
+        return container
+    buffer = bytearray(CONTAINER_BYTES)
+    for low in container:
+        buffer[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _to_array(bits: int) -> array:
+    values = array("H")
+    text = bin(bits)[:1:-1]
+    position = text.find("1")
+    while position != -1:
+        values.append(position)
+        position = text.find("1", position + 1)
+    return values
+
+
+def _normalise(container: Container) -> Optional[Container]:
+    if isinstance(container, int):
+        if not container:
+            return None
+        if container.bit_count() <= ARRAY_LIMIT:
+            return _to_array(container)
+        return container
+    if not container:
+        return None
+    if len(container) > ARRAY_LIMIT:
+        return _to_bits(container)
+    return container
+
+
+def _cardinality(container: Container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+def _and(left: Container, right: Container) -> Optional[Container]:
+    if isinstance(left, int) and isinstance(right, int):
+        return _normalise(left & right)
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        return _normalise(array("H", (low for low in left if right >> low & 1)))
+    return _normalise(array("H", sorted(set(left).intersection(right))))
+
+
+def _or(left: Container, right: Container) -> Optional[Container]:
+    if isinstance(left, int) or isinstance(right, int) or len(left) + len(right) > ARRAY_LIMIT:
+        return _normalise(_to_bits(left) | _to_bits(right))
+    return _normalise(array("H", sorted(set(left).union(right))))
+
+
+def _andnot(left: Container, right: Container) -> Optional[Container]:
+    if isinstance(left, int):
+        return _normalise(left & ~_to_bits(right))
+    if isinstance(right, int):
+        return _normalise(array("H", (low for low in left if not right >> low & 1)))
+    return _normalise(array("H", sorted(set(left).difference(right))))
+
+
+class RoaringBitmap:
+    """Compressed set of non-negative row ids supporting ``&``, ``|`` and ``-``."""
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, containers: Optional[Dict[int, Container]] = None) -> None:
+        self._containers: Dict[int, Container] = containers or {}
+
+    @classmethod
+    def from_sorted(cls, ids: Iterable[int]) -> "RoaringBitmap":
+        containers: Dict[int, Container] = {}
+        current_key = -1
+        current = array("H")
+        for value in ids:
+            key = value >> 16
+            if key != current_key:
+                if current:
+                    containers[current_key] = _normalise(current)
+                current_key, current = key, array("H")
+            current.append(value & 0xFFFF)
+        if current:
+            containers[current_key] = _normalise(current)
+        return cls(containers)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self._containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._containers):
+            container = self._containers[key]
+            base = key << 16
+            values = _to_array(container) if isinstance(container, int) else container
+            for low in values:
+                yield base | low
+
+    def __contains__(self, value: int) -> bool:
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        return low in container
+
+    def _combine(self, other: "RoaringBitmap", operation, keep_left: bool, keep_right: bool) -> "RoaringBitmap":
+        result: Dict[int, Container] = {}
+        for key, container in self._containers.items():
+            partner = other._containers.get(key)
+            if partner is None:
+                if keep_left:
+                    result[key] = container
+                continue
+            combined = operation(container, partner)
+            if combined is not None:
+                result[key] = combined
+        if keep_right:
+            for key, container in other._containers.items():
+                if key not in self._containers:
+                    result[key] = container
+        return RoaringBitmap(result)
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, _and, False, False)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, _or, True, True)
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, _andnot, True, False)
+
+    def to_list(self) -> List[int]:
+        return list(self)
+
+    def nbytes(self) -> int:
+        return sum(
+            CONTAINER_BYTES if isinstance(container, int) else container.itemsize * len(container)
+            for container in self._containers.values()
+        )
+
+
+def union_all(bitmaps: Iterable[RoaringBitmap]) -> RoaringBitmap:
+    result = RoaringBitmap()
+    for bitmap in bitmaps:
+        result = result | bitmap
+    return result
+
+
+class BitmapIndex:
+    """Per-table value bitmaps for :data:`BITMAP_COLUMNS`, refreshed on ``data_version`` changes."""
+
+    def __init__(self, conn: sqlite3.Connection, columns: Sequence[str] = BITMAP_COLUMNS) -> None:
+        self.conn = conn
+        self.columns = tuple(columns)
+        self.version: Optional[Tuple[int, int]] = None
+        self.universe: Dict[str, RoaringBitmap] = {}
+        self.bitmaps: Dict[Tuple[str, str], Dict[str, RoaringBitmap]] = {}
+
+    def indexed_columns(self, table: str) -> List[str]:
+        available = {name for name, _ in TABLE_SCHEMAS.get(table, ())}
+        return [column for column in self.columns if column in available]
+
+    def _current_version(self) -> Tuple[int, int]:
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self.conn.total_changes
+
+    def refresh(self) -> bool:
+        """Rebuild if the database changed since the last build; return whether it did."""
+
+        version = self._current_version()
+        if version == self.version:
+            return False
+        self.build()
+        self.version = version
+        return True
+
+    def build(self) -> None:
+        universe: Dict[str, RoaringBitmap] = {}
+        bitmaps: Dict[Tuple[str, str], Dict[str, RoaringBitmap]] = {}
+        for table in TABLE_SCHEMAS:
+            columns = self.indexed_columns(table)
+            try:
+                cursor = self.conn.execute(
+                    f"SELECT id, {', '.join(columns)} FROM {table} ORDER BY id"
+                )
+            except sqlite3.OperationalError:
+                continue
+            ids = array("q")
+            postings: List[Dict[str, array]] = [{} for _ in columns]
+            for row in cursor:
+                ids.append(row[0])
+                for position, value in enumerate(row[1:]):
+                    key = "" if value is None else str(value)
+                    posting = postings[position].get(key)
+                    if posting is None:
+                        posting = postings[position][key] = array("q")
+                    posting.append(row[0])
+            universe[table] = RoaringBitmap.from_sorted(ids)
+            for position, column in enumerate(columns):
+                bitmaps[(table, column)] = {
+                    value: RoaringBitmap.from_sorted(posting)
+                    for value, posting in postings[position].items()
+                }
+        self.universe = universe
+        self.bitmaps = bitmaps
+
+    def values(self, table: str, column: str) -> List[str]:
+        return sorted(value for value in self.bitmaps.get((table, column), {}) if value)
+
+    def get(self, table: str, column: str, value: str) -> RoaringBitmap:
+        return self.bitmaps.get((table, column), {}).get(value, RoaringBitmap())
+
+    def any_of(self, table: str, column: str, values: Iterable[str]) -> RoaringBitmap:
+        return union_all(self.get(table, column, value) for value in values)
+
+    def negate(self, table: str, bitmap: RoaringBitmap) -> RoaringBitmap:
+        return self.universe.get(table, RoaringBitmap()) - bitmap
+
+    def select(
+        self,
+        table: str,
+        include: Mapping[str, Iterable[str]],
+        exclude: Optional[Mapping[str, Iterable[str]]] = None,
+    ) -> Optional[RoaringBitmap]:
+        """AND across columns of OR across each column's values, minus ``exclude``.
+
+        Returns ``None`` when ``table`` lacks one of the requested columns.
+        """
+
+        result = self.universe.get(table, RoaringBitmap())
+        for column, values in include.items():
+            if (table, column) not in self.bitmaps:
+                return None
+            result = result & self.any_of(table, column, values)
+            if not result:
+                return result
+        for column, values in (exclude or {}).items():
+            if (table, column) in self.bitmaps:
+                result = result - self.any_of(table, column, values)
+        return result
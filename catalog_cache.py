@@ -0,0 +1,310 @@
+"""Persistent cache of the browser's startup results, kept beside the catalog.
+
+Opening a large catalog costs a country scan, a name-sorted list query and
+a tree query before anything useful is on screen.  Their results only change
+when the catalog does, so they are stored as JSON in a small SQLite file next
+to the catalog (``<catalog>.cache``) together with the catalog's identity:
+its ``catalog_id`` plus the latest change-log sequence.  Any committed edit
+moves the sequence, so a stale entry is never served.
+
+The list is cached as the first :data:`PAGE_SIZE` rows of each type's
+unfiltered result plus its total and facet counts; the browser loads the
+rest only when the list is scrolled to its end.  Writes happen on a
+background thread so caching never delays the window.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from catalog_facets import FacetCounter
+from catalog_queries import COUNTRY_VALUES, QUERIES, TREE_ROWS, connect
+from catalog_search import CATEGORY_TABLES, SPECIAL_COUNTRIES, TYPE_CONFIG, Match, SearchFilters, search_catalog
+from initialize_esm_db import DB_FILE, TABLES, get_catalog_id, get_change_sequence
+
+CACHE_SUFFIX = ".cache"
+CACHE_FORMAT = 1
+PAGE_SIZE = 2000
+
+Identity = Tuple[str, int]
+TreeRow = Tuple[str, str, int, str, str]
+ListResult = Tuple[List[Match], int, Dict[str, FacetCounter]]
+
+T = TypeVar("T")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS CacheInfo (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS CacheEntry (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+
+def default_cache_path(db_file: str = DB_FILE) -> str:
+    return os.path.abspath(db_file) + CACHE_SUFFIX
+
+
+def catalog_identity(conn: sqlite3.Connection) -> Optional[Identity]:
+    """``(catalog_id, change sequence)`` for ``conn``, or ``None`` for an untracked catalog."""
+
+    try:
+        catalog_id = get_catalog_id(conn)
+    except sqlite3.Error:
+        return None
+    return (catalog_id, get_change_sequence(conn)) if catalog_id else None
+
+
+def query_countries(conn: sqlite3.Connection) -> Set[str]:
+    cursor = conn.cursor()
+    countries = set(SPECIAL_COUNTRIES)
+    for table in TABLES:
+        cursor.execute(QUERIES.table_query(COUNTRY_VALUES, table))
+        countries.update(row[0] for row in cursor.fetchall() if row[0])
+    return countries
+
+
+def query_tree_rows(conn: sqlite3.Connection) -> List[TreeRow]:
+    """``(label, table, id, country, name)`` for every unit, grouped by category."""
+
+    cursor = conn.cursor()
+    rows: List[TreeRow] = []
+    for label, table in CATEGORY_TABLES.items():
+        cursor.execute(QUERIES.table_query(TREE_ROWS, table))
+        rows.extend(
+            (label, table, record_id, country or "Unknown", name or "(Unnamed)")
+            for record_id, country, name in cursor.fetchall()
+        )
+    return rows
+
+
+def list_cache_key(filters: SearchFilters) -> Optional[str]:
+    """The cache key for an unfiltered type listing, or ``None`` when ``filters`` narrow it."""
+
+    if filters.type_name in TYPE_CONFIG and filters == SearchFilters(type_name=filters.type_name):
+        return f"list:{filters.type_name}"
+    return None
+
+
+def search_list(conn: sqlite3.Connection, filters: SearchFilters) -> ListResult:
+    table_facets: Dict[str, FacetCounter] = {}
+    matches = search_catalog(conn, filters, table_facets=table_facets)
+    return matches, len(matches), table_facets
+
+
+def encode_tree(rows: List[TreeRow]) -> Dict[str, List[list]]:
+    columns: Dict[str, List[list]] = {}
+    for _, table, record_id, country, name in rows:
+        column = columns.get(table)
+        if column is None:
+            column = columns[table] = [[], [], []]
+        column[0].append(record_id)
+        column[1].append(country)
+        column[2].append(name)
+    return columns
+
+
+def decode_tree(columns: Dict[str, List[list]]) -> List[TreeRow]:
+    rows: List[TreeRow] = []
+    for label, table in CATEGORY_TABLES.items():
+        if table in columns:
+            ids, countries, names = columns[table]
+            rows.extend(zip(repeat(label), repeat(table), ids, countries, names))
+    return rows
+
+
+def encode_list(result: ListResult) -> Dict[str, object]:
+    matches, total, table_facets = result
+    page = matches[:PAGE_SIZE]
+    tables = sorted({table for table, _, _, _ in page})
+    codes = {table: code for code, table in enumerate(tables)}
+    return {
+        "total": total,
+        "tables": tables,
+        "codes": [codes[table] for table, _, _, _ in page],
+        "ids": [record_id for _, record_id, _, _ in page],
+        "names": [name for _, _, name, _ in page],
+        "countries": [country for _, _, _, country in page],
+        "facets": {table: counter.as_dict() for table, counter in table_facets.items()},
+    }
+
+
+def decode_list(entry: Dict[str, object]) -> ListResult:
+    tables: List[str] = entry["tables"]
+    matches = list(zip(map(tables.__getitem__, entry["codes"]), entry["ids"], entry["names"], entry["countries"]))
+    table_facets = {table: FacetCounter.from_dict(counts) for table, counts in entry["facets"].items()}
+    return matches, entry["total"], table_facets
+
+
+class CatalogCache:
+    """Startup results for the catalog behind ``conn``, persisted in ``path``."""
+
+    def __init__(self, conn: sqlite3.Connection, path: str) -> None:
+        self.conn = conn
+        self.path = path
+        self._pending: "queue.Queue[Optional[Tuple[str, Identity, Callable[[], object]]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def identity(self) -> Optional[Identity]:
+        return catalog_identity(self.conn)
+
+    def fetch(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        encode: Callable[[T], object] = lambda value: value,
+        decode: Callable[[object], T] = lambda value: value,
+    ) -> T:
+        """The cached value for ``key`` if the catalog is unchanged, else ``compute()`` (cached for next time)."""
+
+        identity = self.identity()
+        if identity is not None:
+            stored = self.get(key, identity)
+            if stored is not None:
+                return decode(stored)
+        value = compute()
+        if identity is not None:
+            self.put(key, identity, lambda: encode(value))
+        return value
+
+    def get(self, key: str, identity: Identity) -> Optional[object]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with closing(sqlite3.connect(self.path, timeout=0.05)) as store:
+                if stored_identity(store) != identity:
+                    return None
+                row = store.execute("SELECT value FROM CacheEntry WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, identity: Identity, produce: Callable[[], object]) -> None:
+        """Store ``produce()`` under ``key`` on the writer thread."""
+
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_pending, name="catalog-cache", daemon=True)
+            self._writer.start()
+        self._pending.put((key, identity, produce))
+
+    def close(self) -> None:
+        """Finish queued writes."""
+
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write_pending(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            key, identity, produce = item
+            try:
+                write_entry(self.path, key, identity, json.dumps(produce(), separators=(",", ":")))
+            except (OSError, sqlite3.Error):
+                # A read-only directory (e.g. a mounted snapshot) just means no cache.
+                pass
+
+
+def stored_identity(store: sqlite3.Connection) -> Optional[Identity]:
+    try:
+        info = dict(store.execute("SELECT key, value FROM CacheInfo"))
+    except sqlite3.OperationalError:
+        return None
+    if info.get("format") != str(CACHE_FORMAT) or not info.get("catalog_id"):
+        return None
+    return info["catalog_id"], int(info["sequence"])
+
+
+def write_entry(path: str, key: str, identity: Identity, value: str) -> None:
+    """Store one JSON ``value``, first dropping every entry cached for another identity."""
+
+    with closing(sqlite3.connect(path, timeout=5)) as store:
+        with store:
+            for statement in _SCHEMA:
+                store.execute(statement)
+            if stored_identity(store) != identity:
+                store.execute("DELETE FROM CacheEntry")
+                store.executemany(
+                    "INSERT OR REPLACE INTO CacheInfo (key, value) VALUES (?, ?)",
+                    [("format", str(CACHE_FORMAT)), ("catalog_id", identity[0]), ("sequence", str(identity[1]))],
+                )
+            store.execute("INSERT OR REPLACE INTO CacheEntry (key, value) VALUES (?, ?)", (key, value))
+
+
+def warm_cache(conn: sqlite3.Connection, cache: CatalogCache) -> List[str]:
+    """Compute and store every startup entry; returns the keys written."""
+
+    identity = cache.identity()
+    if identity is None:
+        raise ValueError("The catalog has no change tracking; open it once read-write first.")
+    entries: Dict[str, object] = {
+        "countries": sorted(query_countries(conn)),
+        "tree": encode_tree(query_tree_rows(conn)),
+    }
+    for type_name in TYPE_CONFIG:
+        filters = SearchFilters(type_name=type_name)
+        entries[list_cache_key(filters)] = encode_list(search_list(conn, filters))
+    for key, value in entries.items():
+        write_entry(cache.path, key, identity, json.dumps(value, separators=(",", ":")))
+    return list(entries)
+
+
+def cache_status(conn: sqlite3.Connection, path: str) -> Dict[str, object]:
+    status: Dict[str, object] = {"path": path, "identity": catalog_identity(conn), "entries": {}}
+    if not os.path.exists(path):
+        status["stored"] = None
+        return status
+    status["bytes"] = os.path.getsize(path)
+    with closing(sqlite3.connect(path)) as store:
+        status["stored"] = stored_identity(store)
+        if status["stored"] is not None:
+            status["entries"] = dict(store.execute("SELECT key, LENGTH(value) FROM CacheEntry ORDER BY key"))
+    return status
+
+
+def describe(identity: Optional[Identity]) -> str:
+    return f"{identity[0]} at change {identity[1]}" if identity else "untracked"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect, build or clear the browser's startup cache.")
+    parser.add_argument("action", choices=("status", "build", "clear"))
+    parser.add_argument("--db", default=DB_FILE, help="catalog database the cache belongs to")
+    parser.add_argument("--cache", default="", help="cache file (default: beside the catalog)")
+    args = parser.parse_args()
+
+    path = args.cache or default_cache_path(args.db)
+    if args.action == "clear":
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"Removed {path}")
+        return
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    with closing(connect(args.db)) as conn:
+        if args.action == "build":
+            keys = warm_cache(conn, CatalogCache(conn, path))
+            print(f"Cached {len(keys)} entries in {path} ({os.path.getsize(path)} bytes)")
+            return
+        status = cache_status(conn, path)
+
+    print(f"Cache:   {status['path']}")
+    print(f"Catalog: {describe(status['identity'])}")
+    if status["stored"] is None:
+        print("State:   empty")
+        return
+    state = "current" if status["stored"] == status["identity"] else f"stale (built for {describe(status['stored'])})"
+    print(f"State:   {state}, {status['bytes']} bytes")
+    for key, size in status["entries"].items():
+        print(f"  {key}: {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
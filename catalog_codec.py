@@ -0,0 +1,295 @@
+"""Typed record codec generated from ``TABLE_SCHEMAS``.
+
+Every table gets a :class:`RecordCodec` that knows each column's declared
+type and display unit.  It decodes rows into named tuples, converts feed
+text for importers, and formats detail blocks for whole batches at once.
+Batch formatting works column by column so the per-value work stays in C
+where it can: a column that repeats (countries, sizes, crews, most
+measurements) builds the line for each distinct value once and maps the
+rest through a dict lookup; floats are formatted with one map and their
+trailing zeros stripped in two passes over a single string.  Each record is
+then one join of its pre-built lines.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from catalog_queries import QUERIES, connect
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS, VERSION_COLUMN
+
+ID_BATCH = 5000
+
+COLUMN_UNITS: Dict[str, str] = {
+    "Length": "m",
+    "Span": "m",
+    "Height": "m",
+    "Width": "m",
+    "Beam": "m",
+    "Draft": "m",
+    "MaxDepth": "m",
+    "Displacement": "t",
+    "MaxWeight": "t",
+    "MaxPayload": "t",
+    "Mass": "kg",
+    "MaxSpeed": "kn",
+    "Range": "km",
+    "Altitude": "km",
+    "Power": "kW",
+    "Speed": "Mach",
+}
+
+# Columns whose unit differs from :data:`COLUMN_UNITS` in one table.
+TABLE_UNITS: Dict[Tuple[str, str], str] = {
+    ("GroundUnit", "MaxSpeed"): "km/h",
+}
+
+Converter = Callable[[str], object]
+
+
+def format_value(value: object) -> str:
+    """Display text for a stored value: floats to at most two decimals, trailing zeros dropped."""
+
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def to_integer(value: str) -> int:
+    """Parse feed text for an INTEGER column, accepting whole-number floats such as ``"12.0"``."""
+
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise
+        return int(number)
+
+
+_CONVERTERS: Dict[str, Converter] = {"INTEGER": to_integer, "REAL": float, "TEXT": str}
+
+
+class ColumnSpec(NamedTuple):
+    name: str
+    kind: str
+    unit: str = ""
+
+    @property
+    def convert(self) -> Converter:
+        return _CONVERTERS[self.kind]
+
+
+class RecordCodec:
+    """Decoder, converter and formatter for one table's records."""
+
+    def __init__(self, table: str, schema: Iterable[Tuple[str, str]]) -> None:
+        self.table = table
+        self.columns: Tuple[ColumnSpec, ...] = tuple(
+            ColumnSpec(name, _declared_kind(definition), TABLE_UNITS.get((table, name), COLUMN_UNITS.get(name, "")))
+            for name, definition in schema
+        )
+        self.names: Tuple[str, ...] = tuple(column.name for column in self.columns)
+        self.record_type = namedtuple(f"{table}Record", self.names)
+        self.specs: Dict[str, ColumnSpec] = {column.name: column for column in self.columns}
+        self.converters: Dict[str, Converter] = {column.name: column.convert for column in self.columns}
+
+    def decode(self, rows: Iterable[Sequence[object]]) -> List[Tuple[object, ...]]:
+        """Rows in schema column order as named tuples."""
+
+        return list(map(self.record_type._make, rows))
+
+    def fetch(self, conn: sqlite3.Connection, ids: Sequence[int]) -> List[Tuple[object, ...]]:
+        """Typed records for ``ids`` (in id order), a few thousand per query."""
+
+        query = QUERIES.compile(
+            ("codec", self.table),
+            lambda: f"SELECT {', '.join(self.names)} FROM {self.table} "
+            "WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        )
+        records: List[Tuple[object, ...]] = []
+        for start in range(0, len(ids), ID_BATCH):
+            records.extend(self.decode(conn.execute(query, (json.dumps(list(ids[start:start + ID_BATCH])),))))
+        return records
+
+    def row_converter(self, columns: Sequence[str]) -> Callable[[Sequence[object]], Tuple[object, ...]]:
+        """Coerce feed values for ``columns`` to their declared types; empty values become ``None``."""
+
+        convert = [self.converters[column] for column in columns]
+
+        def convert_row(values: Sequence[object]) -> Tuple[object, ...]:
+            return tuple(
+                None if value is None or value == "" else converter(value if isinstance(value, str) else str(value))
+                for converter, value in zip(convert, values)
+            )
+
+        return convert_row
+
+    def format_blocks(self, rows: Sequence[Sequence[object]], columns: Optional[Sequence[str]] = None) -> List[str]:
+        """Detail text for each row: the name, a blank line, then ``Column: value unit`` per set value.
+
+        ``columns`` names the row layout when it is not the schema order
+        (e.g. ``SELECT *`` against an older file); columns unknown to the
+        schema are shown without a unit, and the row version is left out.
+        """
+
+        if not rows:
+            return []
+        columns = self.names if columns is None else tuple(columns)
+        headers: Sequence[str] = ["Unnamed Entry\n"] * len(rows)
+        lines: List[Sequence[str]] = []
+        for column, values in zip(columns, zip(*rows)):
+            if column in ("id", VERSION_COLUMN):
+                continue
+            if column == "Name":
+                headers = [f"{name or 'Unnamed Entry'}\n" for name in values]
+                continue
+            spec = self.specs.get(column)
+            lines.append(_column_lines(f"\n{column}: {{}}{' ' + spec.unit if spec and spec.unit else ''}", values))
+        return list(map("".join, zip(headers, *lines)))
+
+
+def _column_lines(template: str, values: Sequence[object]) -> Sequence[str]:
+    """``template`` filled with each value as :func:`format_value` renders it; ``""`` for empty values."""
+
+    distinct = set(values)
+    if len(distinct) * 2 <= len(values):
+        present = [value for value in distinct if value is not None and value != ""]
+        lines = dict.fromkeys(distinct, "")
+        lines.update(zip(present, map(template.format, _value_texts(present))))
+        return list(map(lines.__getitem__, values))
+    if None in distinct or "" in distinct:
+        texts = _value_texts([None if value == "" else value for value in values])
+        return ["" if value is None else template.format(text) for value, text in zip(values, texts)]
+    return list(map(template.format, _value_texts(values)))
+
+
+def _value_texts(values: Sequence[object]) -> Sequence[object]:
+    """Values ready for ``str.format``: floats rendered as :func:`format_value` does, the rest unchanged."""
+
+    kinds = set(map(type, values))
+    kinds.discard(type(None))
+    if float not in kinds:
+        return values
+    if kinds <= {float, int}:
+        if None in values:
+            return _float_texts([0.0 if value is None else value for value in values])
+        return _float_texts(values)
+    return [value if value is None else format_value(value) for value in values]
+
+
+def _float_texts(values: Sequence[float]) -> List[str]:
+    """:func:`format_value` of each number, with the trailing zeros stripped in two passes over one string."""
+
+    # Two decimals each, so at most a hundredths zero and then a ".0" to drop.
+    joined = "\n".join(map("{:.2f}".format, values)) + "\n"
+    return joined.replace("0\n", "\n").replace(".0\n", "\n").split("\n")[:-1]
+
+
+def _declared_kind(definition: str) -> str:
+    declared = definition.split()[0].upper()
+    return declared if declared in _CONVERTERS else "TEXT"
+
+
+CODECS: Dict[str, RecordCodec] = {table: RecordCodec(table, schema) for table, schema in TABLE_SCHEMAS.items()}
+
+
+def format_record_by_row(codec: RecordCodec, row: Sequence[object]) -> str:
+    """One record formatted value by value, as the details pane used to; the benchmark baseline."""
+
+    lines = [row[1] or "Unnamed Entry", ""]
+    for spec, value in zip(codec.columns, row):
+        if spec.name in ("id", "Name") or value in (None, ""):
+            continue
+        unit = f" {spec.unit}" if spec.unit else ""
+        lines.append(f"{spec.name}: {format_value(value)}{unit}")
+    return "\n".join(lines)
+
+
+def benchmark_details(conn: sqlite3.Connection, table: str, count: int = 10_000) -> Dict[str, float]:
+    """Seconds to fetch and render ``count`` detail blocks row by row and with the batch codec.
+
+    The ``render_*`` figures time formatting alone over rows already in memory.
+    """
+
+    codec = CODECS[table]
+    ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id LIMIT ?", (count,))]
+    query = f"SELECT {', '.join(codec.names)} FROM {table} WHERE id = ?"
+
+    start = time.perf_counter()
+    by_row = [format_record_by_row(codec, conn.execute(query, (record_id,)).fetchone()) for record_id in ids]
+    row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = codec.fetch(conn, ids)
+    batched = codec.format_blocks(records)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = [format_record_by_row(codec, record) for record in records]
+    render_row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codec.format_blocks(records)
+    render_batch_seconds = time.perf_counter() - start
+
+    if by_row != batched or rendered != batched:
+        raise AssertionError("batch formatting differs from row-by-row output")
+    return {
+        "records": float(len(ids)),
+        "row_seconds": row_seconds,
+        "batch_seconds": batch_seconds,
+        "render_row_seconds": render_row_seconds,
+        "render_batch_seconds": render_batch_seconds,
+    }
+
+
+def export_details(conn: sqlite3.Connection, table: str, path: str) -> int:
+    """Write every record's detail block to ``path``, separated by blank lines."""
+
+    codec = CODECS[table]
+    ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+    written = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for start in range(0, len(ids), ID_BATCH):
+            blocks = codec.format_blocks(codec.fetch(conn, ids[start:start + ID_BATCH]))
+            handle.writelines(f"{block}\n\n" for block in blocks)
+            written += len(blocks)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render catalog detail blocks with the typed record codec.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--table", default="Aircraft", choices=sorted(TABLE_SCHEMAS))
+    parser.add_argument("--records", type=int, default=10_000, help="records to render in the benchmark")
+    parser.add_argument("--export", metavar="PATH", help="write every record's details instead of benchmarking")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        if args.export:
+            written = export_details(conn, args.table, args.export)
+            print(f"Wrote {written} {args.table} detail blocks to {args.export}")
+            return
+        result = benchmark_details(conn, args.table, args.records)
+    finally:
+        conn.close()
+
+    print(f"Records:          {int(result['records'])}")
+    for label, key in (("Fetch + render", ""), ("Render only", "render_")):
+        row_seconds, batch_seconds = result[f"{key}row_seconds"], result[f"{key}batch_seconds"]
+        print(
+            f"{label + ':':<17} row by row {row_seconds * 1000:.1f} ms, batch {batch_seconds * 1000:.1f} ms "
+            f"({row_seconds / batch_seconds:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
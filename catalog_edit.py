@@ -0,0 +1,311 @@
+"""Batched, schema-checked catalog edits with optimistic concurrency.
+
+Curators queue inserts, updates and deletes on an :class:`EditBatch`; nothing
+touches the catalog until :meth:`EditBatch.commit`, which applies the queue in
+``BEGIN IMMEDIATE`` transactions of at most :data:`GROUP_SIZE` edits, so the
+write lock is only ever held for one short group.  Values are checked against
+their column's declared type when they are queued.
+
+Every row carries a ``RowVersion`` that each update bumps.  Updates and
+deletes name the version the curator read; if the row has changed (or gone)
+since, the edit is skipped and reported as a :class:`Conflict` rather than
+overwriting someone else's work.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from catalog_codec import CODECS, ColumnSpec
+from catalog_queries import QUERIES, connect
+from initialize_esm_db import DB_FILE, VERSION_COLUMN, ensure_row_versions
+
+GROUP_SIZE = 500
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+Values = Tuple[Tuple[str, object], ...]
+
+
+class EditError(Exception):
+    """Raised when an edit does not fit the catalog schema."""
+
+
+class Edit(NamedTuple):
+    op: str
+    table: str
+    record_id: Optional[int] = None
+    values: Values = ()
+    version: Optional[int] = None
+
+
+class Conflict(NamedTuple):
+    edit: Edit
+    current_version: Optional[int]
+
+    def describe(self) -> str:
+        target = f"{self.edit.op} of {self.edit.table} #{self.edit.record_id}"
+        if self.current_version is None:
+            return f"{target}: the record was deleted"
+        return f"{target}: read version {self.edit.version}, now at {self.current_version}"
+
+
+class CommitResult(NamedTuple):
+    applied: int
+    inserted: List[Tuple[str, int]]
+    conflicts: List[Conflict]
+    transactions: int
+    seconds: float
+
+
+def coerce_value(spec: ColumnSpec, value: object) -> object:
+    """``value`` as stored in ``spec``'s column; text is parsed, empty text is ``None``."""
+
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        if spec.kind == "TEXT":
+            return value
+        try:
+            return spec.convert(value.strip())
+        except ValueError:
+            raise EditError(f"{spec.name} expects {spec.kind.lower()}, got {value!r}.") from None
+    if spec.kind == "INTEGER" and type(value) is int:
+        return value
+    if spec.kind == "INTEGER" and type(value) is float and value.is_integer():
+        return int(value)
+    if spec.kind == "REAL" and type(value) in (int, float):
+        return float(value)
+    raise EditError(f"{spec.name} expects {spec.kind.lower()}, got {value!r}.")
+
+
+def validate_values(table: str, values: Mapping[str, object]) -> Values:
+    """Check ``values`` against ``table``'s schema and coerce them to the declared types."""
+
+    codec = CODECS.get(table)
+    if codec is None:
+        raise EditError(f"Unknown table {table}.")
+    checked = []
+    for column, value in values.items():
+        spec = codec.specs.get(column)
+        if spec is None or column == "id":
+            raise EditError(f"{table} has no editable column {column}.")
+        checked.append((column, coerce_value(spec, value)))
+    return tuple(checked)
+
+
+def read_record(conn: sqlite3.Connection, table: str, record_id: int) -> Optional[Tuple[Dict[str, object], int]]:
+    """``(values, version)`` for one row, in schema order, or ``None`` if it does not exist."""
+
+    codec = CODECS[table]
+    query = QUERIES.compile(
+        ("edit", "read", table),
+        lambda: f"SELECT {', '.join(codec.names)}, {VERSION_COLUMN} FROM {table} WHERE id = ?",
+    )
+    row = conn.execute(query, (record_id,)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(codec.names, row)), row[-1]
+
+
+def current_version(conn: sqlite3.Connection, table: str, record_id: int) -> Optional[int]:
+    query = QUERIES.compile(("edit", "version", table), lambda: f"SELECT {VERSION_COLUMN} FROM {table} WHERE id = ?")
+    row = conn.execute(query, (record_id,)).fetchone()
+    return row[0] if row else None
+
+
+class EditBatch:
+    """A write-ahead queue of edits against the catalog behind ``conn``.
+
+    A second update to a row already queued is folded into the first, and a
+    delete replaces it, so both keep the version the curator originally read.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, group_size: int = GROUP_SIZE) -> None:
+        self.conn = conn
+        self.group_size = group_size
+        self.pending: List[Edit] = []
+        self._queued: Dict[Tuple[str, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def insert(self, table: str, values: Mapping[str, object]) -> None:
+        self.pending.append(Edit(INSERT, table, values=validate_values(table, values)))
+
+    def update(self, table: str, record_id: int, values: Mapping[str, object], version: int) -> None:
+        checked = validate_values(table, values)
+        if not checked:
+            return
+        index = self._queued.get((table, record_id))
+        if index is not None:
+            queued = self.pending[index]
+            if queued.op == DELETE:
+                raise EditError(f"{table} #{record_id} is already queued for deletion.")
+            self.pending[index] = queued._replace(values=tuple({**dict(queued.values), **dict(checked)}.items()))
+            return
+        self._queue(Edit(UPDATE, table, record_id, checked, version))
+
+    def delete(self, table: str, record_id: int, version: int) -> None:
+        if table not in CODECS:
+            raise EditError(f"Unknown table {table}.")
+        index = self._queued.get((table, record_id))
+        if index is not None:
+            queued = self.pending[index]
+            self.pending[index] = Edit(DELETE, table, record_id, version=queued.version)
+            return
+        self._queue(Edit(DELETE, table, record_id, version=version))
+
+    def _queue(self, edit: Edit) -> None:
+        self._queued[(edit.table, edit.record_id)] = len(self.pending)
+        self.pending.append(edit)
+
+    def discard(self) -> None:
+        self.pending.clear()
+        self._queued.clear()
+
+    def commit(self) -> CommitResult:
+        """Apply the queue group by group; a failing group is rolled back and stays queued."""
+
+        start = time.perf_counter()
+        applied = 0
+        inserted: List[Tuple[str, int]] = []
+        conflicts: List[Conflict] = []
+        transactions = 0
+        try:
+            while self.pending:
+                group = self.pending[: self.group_size]
+                applied += self._apply_group(group, inserted, conflicts)
+                transactions += 1
+                del self.pending[: len(group)]
+        finally:
+            self._queued = {
+                (edit.table, edit.record_id): index
+                for index, edit in enumerate(self.pending)
+                if edit.op != INSERT
+            }
+        return CommitResult(applied, inserted, conflicts, transactions, time.perf_counter() - start)
+
+    def _apply_group(self, group: Iterable[Edit], inserted: List[Tuple[str, int]], conflicts: List[Conflict]) -> int:
+        cursor = self.conn.cursor()
+        group_inserted: List[Tuple[str, int]] = []
+        group_conflicts: List[Conflict] = []
+        applied = 0
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for edit in group:
+                if edit.op == INSERT:
+                    cursor.execute(_statement(edit), [value for _, value in edit.values])
+                    group_inserted.append((edit.table, cursor.fetchone()[0]))
+                elif edit.op == UPDATE:
+                    cursor.execute(_statement(edit), [*(value for _, value in edit.values), edit.record_id, edit.version])
+                else:
+                    cursor.execute(_statement(edit), (edit.record_id, edit.version))
+                if edit.op != INSERT and cursor.rowcount == 0:
+                    group_conflicts.append(Conflict(edit, current_version(self.conn, edit.table, edit.record_id)))
+                else:
+                    applied += 1
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        inserted.extend(group_inserted)
+        conflicts.extend(group_conflicts)
+        return applied
+
+
+def _statement(edit: Edit) -> str:
+    columns = tuple(column for column, _ in edit.values)
+    table = edit.table
+
+    def build() -> str:
+        if edit.op == INSERT:
+            if not columns:
+                return f"INSERT INTO {table} DEFAULT VALUES RETURNING id"
+            placeholders = ", ".join("?" for _ in columns)
+            return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) RETURNING id"
+        if edit.op == UPDATE:
+            assignments = "".join(f"{column} = ?, " for column in columns)
+            return (
+                f"UPDATE {table} SET {assignments}{VERSION_COLUMN} = {VERSION_COLUMN} + 1 "
+                f"WHERE id = ? AND {VERSION_COLUMN} = ?"
+            )
+        return f"DELETE FROM {table} WHERE id = ? AND {VERSION_COLUMN} = ?"
+
+    return QUERIES.compile(("edit", edit.op, table, columns), build)
+
+
+def queue_edits(batch: EditBatch, edits: Iterable[Mapping[str, object]]) -> None:
+    """Queue edits given as ``{"op", "table", "id", "version", "values"}`` mappings (e.g. JSON lines)."""
+
+    for number, edit in enumerate(edits, start=1):
+        try:
+            op, table = edit["op"], edit["table"]
+            if op == INSERT:
+                batch.insert(table, edit.get("values", {}))
+            elif op == UPDATE:
+                batch.update(table, int(edit["id"]), edit.get("values", {}), int(edit["version"]))
+            elif op == DELETE:
+                batch.delete(table, int(edit["id"]), int(edit["version"]))
+            else:
+                raise EditError(f"Unknown operation {op!r}.")
+        except (KeyError, TypeError, ValueError) as error:
+            raise EditError(f"Edit {number} is malformed: {error}") from None
+        except EditError as error:
+            raise EditError(f"Edit {number}: {error}") from None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show catalog records with their versions, or apply queued edits.")
+    parser.add_argument("--db", default=DB_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show_parser = subparsers.add_parser("show", help="print a record and its version")
+    show_parser.add_argument("table", choices=sorted(CODECS))
+    show_parser.add_argument("id", type=int)
+
+    apply_parser = subparsers.add_parser("apply", help="validate and commit edits from a JSON lines file")
+    apply_parser.add_argument("edits")
+    apply_parser.add_argument("--group-size", type=int, default=GROUP_SIZE, help="edits per transaction")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        with conn:
+            ensure_row_versions(conn)
+        if args.command == "show":
+            record = read_record(conn, args.table, args.id)
+            if record is None:
+                raise SystemExit(f"{args.table} #{args.id} does not exist.")
+            values, version = record
+            print(json.dumps({"table": args.table, "id": args.id, "version": version, "values": values}, indent=2))
+            return
+        batch = EditBatch(conn, args.group_size)
+        with open(args.edits, encoding="utf-8") as handle:
+            queue_edits(batch, (json.loads(line) for line in handle if line.strip()))
+        queued = len(batch)
+        result = batch.commit()
+    except EditError as error:
+        raise SystemExit(str(error)) from None
+    finally:
+        conn.close()
+
+    print(
+        f"Applied {result.applied} of {queued} edits in {result.transactions} transactions "
+        f"({result.seconds * 1000:.1f} ms); {len(result.conflicts)} conflicts"
+    )
+    for table, record_id in result.inserted:
+        print(f"  inserted {table} #{record_id}")
+    for conflict in result.conflicts:
+        print(f"  conflict: {conflict.describe()}")
+
+
+if __name__ == "__main__":
+    main()
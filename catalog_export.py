@@ -0,0 +1,249 @@
+"""Streaming export of search results and whole tables.
+
+Rows are read with ``fetchmany`` from one cursor per table and written batch
+by batch, so memory use does not grow with the size of the export.  Three
+formats are supported, chosen by file extension:
+
+* ``.csv`` -- one header row; with several tables, only the columns they all
+  share, led by a ``Table`` column.  Written by the C ``csv`` writer.
+* ``.jsonl`` -- one object per line with every column of the row's table.
+  SQLite's ``json_object`` builds each line, so Python only sees one string
+  per row.  Floats are rendered with 15 significant digits, which round-trips
+  any value that entered the catalog as decimal text.
+* ``.cmsdb`` -- the columnar layout of :mod:`catalog_archive`, one section
+  per table; ``catalog_archive.py verify`` and ``import`` read it directly.
+
+Filtered exports follow the browser's search: each table's rows in name
+order, one table after another.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from catalog_archive import MAGIC, column_kind, default_codec, new_manifest, write_chunk, write_footer
+from catalog_queries import QUERIES, connect
+from catalog_search import ALL_COUNTRIES, TYPE_CONFIG, SearchFilters, build_search_query
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS
+
+BATCH_ROWS = 10_000
+TABLE_COLUMN = "Table"
+
+FORMATS: Dict[str, str] = {".csv": "csv", ".jsonl": "jsonl", ".cmsdb": "columnar"}
+
+
+class ExportReport(NamedTuple):
+    path: str
+    format: str
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1_000_000 / self.seconds if self.seconds else 0.0
+
+    def describe(self) -> str:
+        return (
+            f"Exported {self.rows:,} rows to {self.path} ({self.format}, {self.bytes / 1_000_000:.1f} MB) "
+            f"in {self.seconds:.2f}s: {self.rows_per_second:,.0f} rows/s, {self.megabytes_per_second:.1f} MB/s"
+        )
+
+
+def export_format(path: str, format: str = "") -> str:
+    """``format`` if given, else the format implied by ``path``'s extension."""
+
+    if format:
+        if format not in FORMATS.values():
+            raise ValueError(f"Unknown export format: {format}")
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the export format of {path}; use one of {', '.join(FORMATS)}.")
+    return FORMATS[extension]
+
+
+def table_columns(table: str) -> List[str]:
+    return [name for name, _ in TABLE_SCHEMAS[table]]
+
+
+def shared_columns(tables: Sequence[str]) -> List[str]:
+    """Columns every one of ``tables`` has, in the first table's order."""
+
+    columns = table_columns(tables[0])
+    for table in tables[1:]:
+        available = set(table_columns(table))
+        columns = [column for column in columns if column in available]
+    return columns
+
+
+def export_query(
+    table: str, columns: Sequence[str], filters: Optional[SearchFilters]
+) -> Tuple[str, List[object]]:
+    """``columns`` (SQL expressions) for ``filters``' matches in ``table``, or for every row by id."""
+
+    if filters is not None:
+        return build_search_query(table, filters, columns)
+    query = QUERIES.compile(
+        ("export", table, tuple(columns)), lambda: f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"
+    )
+    return query, []
+
+
+def _batches(
+    conn: sqlite3.Connection, query: str, params: Sequence[object], size: int
+) -> Iterator[List[Tuple[object, ...]]]:
+    cursor = conn.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _write_csv(
+    conn: sqlite3.Connection,
+    path: str,
+    tables: Sequence[str],
+    filters: Optional[SearchFilters],
+    batch_rows: int,
+) -> int:
+    columns = shared_columns(tables)
+    tagged = len(tables) > 1
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow([TABLE_COLUMN, *columns] if tagged else columns)
+        for table in tables:
+            # The table name rides along as a SQL literal so rows go to the writer untouched.
+            selected = [f"'{table}'", *columns] if tagged else columns
+            query, params = export_query(table, selected, filters)
+            for rows in _batches(conn, query, params, batch_rows):
+                writer.writerows(rows)
+                written += len(rows)
+    return written
+
+
+def _write_jsonl(
+    conn: sqlite3.Connection,
+    path: str,
+    tables: Sequence[str],
+    filters: Optional[SearchFilters],
+    batch_rows: int,
+) -> int:
+    tagged = len(tables) > 1
+    written = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for table in tables:
+            pairs = [f"'{column}', {column}" for column in table_columns(table)]
+            if tagged:
+                pairs.insert(0, f"'{TABLE_COLUMN}', '{table}'")
+            query, params = export_query(table, [f"json_object({', '.join(pairs)})"], filters)
+            for rows in _batches(conn, query, params, batch_rows):
+                handle.write("\n".join([line for line, in rows]))
+                handle.write("\n")
+                written += len(rows)
+    return written
+
+
+def _write_columnar(
+    conn: sqlite3.Connection,
+    path: str,
+    tables: Sequence[str],
+    filters: Optional[SearchFilters],
+    batch_rows: int,
+) -> int:
+    codec = default_codec()
+    manifest = new_manifest(codec)
+    if filters is not None:
+        manifest["filters"] = filters._asdict()
+    digest = hashlib.sha256()
+    written = 0
+    with open(path, "wb") as handle:
+        handle.write(MAGIC)
+        offset = len(MAGIC)
+        for table in tables:
+            columns = table_columns(table)
+            kinds = [column_kind(definition) for _, definition in TABLE_SCHEMAS[table]]
+            query, params = export_query(table, columns, filters)
+            chunks: List[Dict[str, object]] = []
+            rows_in_table = 0
+            for rows in _batches(conn, query, params, batch_rows):
+                chunk, offset = write_chunk(handle, rows, kinds, codec, digest, offset)
+                chunks.append(chunk)
+                rows_in_table += len(rows)
+            manifest["tables"][table] = {"columns": columns, "rows": rows_in_table, "chunks": chunks}
+            written += rows_in_table
+        write_footer(handle, manifest, digest)
+    return written
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "columnar": _write_columnar}
+
+
+def export_results(
+    conn: sqlite3.Connection,
+    path: str,
+    filters: Optional[SearchFilters] = None,
+    tables: Optional[Sequence[str]] = None,
+    format: str = "",
+    batch_rows: int = BATCH_ROWS,
+) -> ExportReport:
+    """Stream ``filters``' matches (or, without filters, every row of ``tables``) to ``path``.
+
+    ``tables`` defaults to the filter's tables, or to every table.
+    """
+
+    format = export_format(path, format)
+    if filters is not None:
+        tables = [table for table in filters.tables if tables is None or table in tables]
+    else:
+        tables = list(TABLE_SCHEMAS if tables is None else tables)
+    if not tables:
+        raise ValueError("Nothing to export: no table matches the selection.")
+
+    start = time.perf_counter()
+    rows = _WRITERS[format](conn, path, tables, filters, batch_rows)
+    seconds = time.perf_counter() - start
+    return ExportReport(path, format, rows, os.path.getsize(path), seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export search results or whole tables to CSV, JSONL or columnar files.")
+    parser.add_argument("output", help="file to write; .csv, .jsonl or .cmsdb")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), default="")
+    parser.add_argument("--table", action="append", choices=sorted(TABLE_SCHEMAS), help="limit to a table (repeatable)")
+    parser.add_argument("--type", dest="type_name", choices=list(TYPE_CONFIG), help="export search results of this type")
+    parser.add_argument("--keyword", default="", help="class keyword filter")
+    parser.add_argument("--country", default=ALL_COUNTRIES)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = parser.parse_args()
+
+    filters = None
+    if args.type_name or args.keyword or args.country != ALL_COUNTRIES:
+        filters = SearchFilters(type_name=args.type_name or "All Types", class_filter=args.keyword, country=args.country)
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        report = export_results(conn, args.output, filters, args.table, args.format, args.batch_rows)
+    finally:
+        conn.close()
+    print(report.describe())
+
+
+if __name__ == "__main__":
+    main()
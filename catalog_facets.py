@@ -0,0 +1,94 @@
+"""Facet counts (country, type, physical size) for the current search result.
+
+The browser fills a :class:`FacetCounter` while it walks the rows of its list
+query, so the counts cost no extra table scans.  Facet values are
+dictionary-encoded per facet and counted in an ``array`` indexed by code.
+"""
+
+from array import array
+from typing import Dict, List, Mapping, Optional, Tuple
+
+FACETS = ("Country", "Type", "PhysicalSize")
+UNKNOWN_VALUE = "Unknown"
+
+
+class FacetCounter:
+    """Dictionary-encoded value counts for each facet in :data:`FACETS`."""
+
+    def __init__(self) -> None:
+        self._codes: Tuple[Dict[str, int], ...] = tuple({} for _ in FACETS)
+        self._values: Tuple[List[str], ...] = tuple([] for _ in FACETS)
+        self._counts: Tuple[array, ...] = tuple(array("Q") for _ in FACETS)
+        self.total = 0
+
+    def _bump(self, position: int, value: Optional[str], amount: int) -> None:
+        value = value or UNKNOWN_VALUE
+        codes = self._codes[position]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[position])
+            self._values[position].append(value)
+            self._counts[position].append(0)
+        self._counts[position][code] += amount
+
+    def add(self, country: Optional[str], type_name: Optional[str], size: Optional[str], amount: int = 1) -> None:
+        self._bump(0, country, amount)
+        self._bump(1, type_name, amount)
+        self._bump(2, size, amount)
+        self.total += amount
+
+    def add_group(
+        self, type_name: str, countries: Mapping[Optional[str], int], sizes: Mapping[Optional[str], int]
+    ) -> None:
+        """Merge pre-counted country and size tallies for ``type_name`` rows."""
+
+        rows = sum(countries.values())
+        for country, count in countries.items():
+            self._bump(0, country, count)
+        for size, count in sizes.items():
+            self._bump(2, size, count)
+        self._bump(1, type_name, rows)
+        self.total += rows
+
+    def merge(self, other: "FacetCounter") -> None:
+        """Add every count from ``other``, e.g. one filled by another shard."""
+
+        for position in range(len(FACETS)):
+            for value, count in zip(other._values[position], other._counts[position]):
+                self._bump(position, value, count)
+        self.total += other.total
+
+    def counts(self, facet: str) -> List[Tuple[str, int]]:
+        """``(value, count)`` pairs for ``facet``, most frequent first."""
+
+        position = FACETS.index(facet)
+        pairs = list(zip(self._values[position], self._counts[position]))
+        pairs.sort(key=lambda item: (-item[1], item[0]))
+        return pairs
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        return {facet: dict(self.counts(facet)) for facet in FACETS}
+
+    @classmethod
+    def from_dict(cls, counts: Mapping[str, Mapping[str, int]]) -> "FacetCounter":
+        """Rebuild a counter saved with :meth:`as_dict`."""
+
+        counter = cls()
+        for position, facet in enumerate(FACETS):
+            for value, count in counts.get(facet, {}).items():
+                counter._bump(position, value, count)
+        # Every row is counted once per facet, so any facet's sum is the total.
+        counter.total = sum(counts.get(FACETS[0], {}).values())
+        return counter
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        lines: List[str] = []
+        for facet in FACETS:
+            pairs = self.counts(facet)
+            if not pairs:
+                continue
+            shown = ", ".join(f"{value} {count}" for value, count in pairs[:limit])
+            if len(pairs) > limit:
+                shown += f", +{len(pairs) - limit} more"
+            lines.append(f"{facet}: {shown}")
+        return lines
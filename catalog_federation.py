@@ -0,0 +1,198 @@
+"""Query several catalog databases as one.
+
+:class:`Federation` attaches each source catalog read-only to an in-memory
+connection and defines a TEMP view per table in :data:`TABLE_SCHEMAS`.  Each
+view is a ``UNION ALL`` of the sources' tables, with a ``Source`` column
+naming the origin.  Row ids are made unique across sources by storing the
+source's position in the high bits (see :func:`encode_id`), so the browser
+and the headless helpers can keep addressing rows as ``(table, id)``.
+Filters on Country, Name or numeric specs are pushed into every branch of
+the compound view, so each source still answers them from its own indexes.
+
+:meth:`Federation.search` is the headless entry point.  It runs
+:func:`search_catalog` against each source separately, caches each source's
+results until that source's ``PRAGMA data_version`` moves, and merges them
+by name.
+"""
+
+import argparse
+import heapq
+import os
+import re
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+
+from catalog_queries import connect
+from catalog_search import ALL_COUNTRIES, SearchFilters, search_catalog
+from initialize_esm_db import TABLE_SCHEMAS
+
+SOURCE_ID_SHIFT = 40
+SOURCE_COLUMN = "Source"
+SOURCE_CACHE_SIZE = 32
+
+FederatedMatch = Tuple[str, str, int, str, str]
+
+
+def encode_id(source_index: int, record_id: int) -> int:
+    return (source_index << SOURCE_ID_SHIFT) + record_id
+
+
+def decode_id(federated_id: int) -> Tuple[int, int]:
+    return federated_id >> SOURCE_ID_SHIFT, federated_id & ((1 << SOURCE_ID_SHIFT) - 1)
+
+
+def source_aliases(paths: Sequence[str]) -> "OrderedDict[str, str]":
+    """Schema aliases derived from file names, made unique; ``alias=path`` entries keep their alias."""
+
+    aliases: "OrderedDict[str, str]" = OrderedDict()
+    for entry in paths:
+        alias, separator, path = entry.partition("=")
+        if not separator:
+            alias, path = os.path.splitext(os.path.basename(entry))[0], entry
+        alias = re.sub(r"\W", "_", alias) or "source"
+        if alias[0].isdigit():
+            alias = f"s_{alias}"
+        candidate, suffix = alias, 2
+        while candidate.lower() in {name.lower() for name in aliases} or candidate.lower() in ("main", "temp"):
+            candidate, suffix = f"{alias}_{suffix}", suffix + 1
+        aliases[candidate] = path
+    return aliases
+
+
+def _read_only_uri(path: str) -> str:
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+
+class Federation:
+    """Read-only federated view over the catalogs in ``sources`` (``alias -> path``)."""
+
+    def __init__(self, sources: Union[Mapping[str, str], Sequence[str]]) -> None:
+        self.sources = OrderedDict(sources) if isinstance(sources, Mapping) else source_aliases(sources)
+        if not self.sources:
+            raise ValueError("At least one catalog is required for federation.")
+        for path in self.sources.values():
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Catalog database not found: {path}")
+
+        self.aliases: List[str] = list(self.sources)
+        self.conn = connect(":memory:", uri=True)
+        limit = self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(self.sources) > limit:
+            self.conn.close()
+            raise ValueError(f"SQLite can attach at most {limit} catalogs; got {len(self.sources)}.")
+        for alias, path in self.sources.items():
+            self.conn.execute(f"ATTACH DATABASE ? AS {alias}", (_read_only_uri(path),))
+        self.columns: Dict[str, Dict[str, List[str]]] = {}
+        self._create_views()
+        self.conn.execute("PRAGMA query_only = ON")
+
+        self.source_conns: Dict[str, sqlite3.Connection] = {}
+        self._cache: Dict[str, Tuple[int, "OrderedDict[SearchFilters, List[Tuple[str, int, str, str]]]"]] = {}
+
+    def _source_columns(self, alias: str, table: str) -> List[str]:
+        return [row[1] for row in self.conn.execute(f"PRAGMA {alias}.table_info({table})")]
+
+    def _branch(self, index: int, alias: str, table: str) -> str:
+        available = set(self.columns[table][alias])
+        selects = [f"{encode_id(index, 0)} + id AS id", f"'{alias}' AS {SOURCE_COLUMN}"]
+        for name, _ in TABLE_SCHEMAS[table]:
+            if name != "id":
+                selects.append(name if name in available else f"NULL AS {name}")
+        return f"SELECT {', '.join(selects)} FROM {alias}.{table}"
+
+    def _create_views(self) -> None:
+        for table in TABLE_SCHEMAS:
+            self.columns[table] = {}
+            branches = []
+            for index, alias in enumerate(self.aliases):
+                columns = self._source_columns(alias, table)
+                if columns:
+                    self.columns[table][alias] = columns
+                    branches.append(self._branch(index, alias, table))
+            if not branches:
+                # Keep the view shape even when no source has the table.
+                names = ", ".join(f"NULL AS {name}" for name, _ in TABLE_SCHEMAS[table] if name != "id")
+                branches.append(f"SELECT NULL AS id, NULL AS {SOURCE_COLUMN}, {names} WHERE 0")
+            self.conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(branches)}")
+
+    def source_of(self, federated_id: int) -> str:
+        return self.aliases[decode_id(federated_id)[0]]
+
+    def fetch(self, table: str, federated_id: int) -> Optional[sqlite3.Row]:
+        """One row by federated id, read straight from its source's primary key."""
+
+        index, record_id = decode_id(federated_id)
+        if index >= len(self.aliases):
+            return None
+        alias = self.aliases[index]
+        if alias not in self.columns.get(table, {}):
+            return None
+        cursor = self.conn.execute(f"{self._branch(index, alias, table)} WHERE id = ?", (record_id,))
+        return cursor.fetchone()
+
+    def source_connection(self, alias: str) -> sqlite3.Connection:
+        conn = self.source_conns.get(alias)
+        if conn is None:
+            conn = self.source_conns[alias] = connect(_read_only_uri(self.sources[alias]), uri=True)
+        return conn
+
+    def _source_matches(self, alias: str, filters: SearchFilters) -> List[Tuple[str, int, str, str]]:
+        conn = self.source_connection(alias)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        cached_version, entries = self._cache.get(alias, (None, OrderedDict()))
+        if cached_version != version:
+            entries = OrderedDict()
+            self._cache[alias] = (version, entries)
+        matches = entries.get(filters)
+        if matches is None:
+            matches = entries[filters] = search_catalog(conn, filters)
+            if len(entries) > SOURCE_CACHE_SIZE:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(filters)
+        return matches
+
+    def search(self, filters: SearchFilters) -> List[FederatedMatch]:
+        """``(source, table, id, name, country)`` across every source, merged by name.
+
+        Ids are each source's own ids; each source's results are cached until
+        that source changes.
+        """
+
+        tagged = [
+            [
+                (alias, table, record_id, name, country)
+                for table, record_id, name, country in self._source_matches(alias, filters)
+            ]
+            for alias in self.aliases
+        ]
+        return list(heapq.merge(*tagged, key=lambda match: match[3].lower()))
+
+    def close(self) -> None:
+        for conn in self.source_conns.values():
+            conn.close()
+        self.source_conns.clear()
+        self.conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search several catalog databases at once.")
+    parser.add_argument("catalogs", nargs="+", help="catalog files, optionally as alias=path")
+    parser.add_argument("--type", default="All Types", dest="type_name")
+    parser.add_argument("--class", default="", dest="class_filter", help="name/category/type substring")
+    parser.add_argument("--country", default=ALL_COUNTRIES)
+    args = parser.parse_args()
+
+    federation = Federation(args.catalogs)
+    try:
+        filters = SearchFilters(args.type_name, args.class_filter, args.country)
+        for source, table, record_id, name, country in federation.search(filters):
+            print(f"{source}\t{table}\t{record_id}\t{name}\t{country}")
+    finally:
+        federation.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Point-in-time reads from the catalog's append-only row history.
+
+``initialize_database`` gives every ``TABLE_SCHEMAS`` table a ``<Table>History``
+twin filled by triggers: one revision per insert, real update and delete,
+stamped with the UTC time it was written.  A revision holds until the next
+one for the same id; a delete is a revision with no values.  Rows that were
+in the catalog before history was switched on start with a revision dated
+:data:`HISTORY_EPOCH`.
+
+Reading a row as of some time is one descent of the ``(id, valid_from)``
+index to the last revision at or before it, so the cost grows with the
+logarithm of the revision count, not with how often the row changed.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from catalog_queries import QUERIES, connect
+from initialize_esm_db import DB_FILE, HISTORY_EPOCH, TABLE_SCHEMAS, history_columns, history_table
+
+AsOf = Union[str, datetime]
+
+
+class HistoryError(Exception):
+    """Raised for an unreadable point in time or a catalog without history."""
+
+
+class Revision(NamedTuple):
+    revision: int
+    op: str
+    valid_from: str
+    values: Dict[str, object]
+
+
+def as_of_time(conn: sqlite3.Connection, value: AsOf) -> str:
+    """``value`` in the history's timestamp format (UTC, milliseconds).
+
+    Text is anything SQLite's date functions read: ``2024-05-01``,
+    ``2024-05-01 14:30``, ``2024-05-01T14:30:00+02:00``, ``now``.  A date alone
+    means the start of that day; naive times and datetimes are taken as UTC.
+    """
+
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        value = value.isoformat(sep=" ")
+    text = str(value).strip()
+    normalized = conn.execute("SELECT strftime('%Y-%m-%d %H:%M:%f', ?)", (text,)).fetchone()[0] if text else None
+    if normalized is None:
+        raise HistoryError(f"Not a date or time: {value!r}.")
+    return normalized
+
+
+def _execute(conn: sqlite3.Connection, table: str, query: str, params: tuple) -> sqlite3.Cursor:
+    try:
+        return conn.execute(query, params)
+    except sqlite3.OperationalError as error:
+        if "no such table" in str(error):
+            raise HistoryError(f"{table} has no history in this catalog.") from None
+        raise
+
+
+def _value_names(table: str) -> List[str]:
+    if table not in TABLE_SCHEMAS:
+        raise HistoryError(f"Unknown table {table}.")
+    return [name for name, _ in history_columns(table)]
+
+
+def record_as_of(conn: sqlite3.Connection, table: str, record_id: int, as_of: AsOf) -> Optional[Dict[str, object]]:
+    """``table`` row ``record_id`` as it stood at ``as_of``, ``id`` first, or ``None`` if it did not exist."""
+
+    names = _value_names(table)
+    query = QUERIES.compile(
+        ("history", "record", table),
+        lambda: f"SELECT op, id, {', '.join(names)} FROM {history_table(table)} "
+        "WHERE id = ? AND valid_from <= ? ORDER BY valid_from DESC, revision DESC LIMIT 1",
+    )
+    row = _execute(conn, table, query, (record_id, as_of_time(conn, as_of))).fetchone()
+    if row is None or row[0] == "D":
+        return None
+    return dict(zip(["id", *names], row[1:]))
+
+
+def revisions(conn: sqlite3.Connection, table: str, record_id: int) -> List[Revision]:
+    """Every revision of ``table`` row ``record_id``, oldest first."""
+
+    names = _value_names(table)
+    query = QUERIES.compile(
+        ("history", "revisions", table),
+        lambda: f"SELECT revision, op, valid_from, {', '.join(names)} FROM {history_table(table)} "
+        "WHERE id = ? ORDER BY valid_from, revision",
+    )
+    return [
+        Revision(row[0], row[1], row[2], {} if row[1] == "D" else dict(zip(names, row[3:])))
+        for row in _execute(conn, table, query, (record_id,))
+    ]
+
+
+def snapshot_source(table: str) -> str:
+    """A SELECT of ``table``'s rows as of its one ``?`` (a :func:`as_of_time` string), columns as in the table.
+
+    Each id seen in the history costs one index descent; it can stand in for
+    ``table`` as ``WITH {table} AS (...)`` ahead of any query over it.
+    """
+
+    history = history_table(table)
+    columns = ", ".join(f"h.{name}" for name in ["id", *_value_names(table)])
+    return (
+        f"SELECT {columns} FROM (SELECT DISTINCT id FROM {history}) AS ids "
+        f"JOIN {history} AS h ON h.revision = ("
+        f"SELECT revision FROM {history} WHERE id = ids.id AND valid_from <= ?1 "
+        "ORDER BY valid_from DESC, revision DESC LIMIT 1) "
+        "WHERE h.op != 'D'"
+    )
+
+
+def benchmark_history(conn: sqlite3.Connection, table: str, lookups: int = 1000) -> Dict[str, float]:
+    """Time :func:`record_as_of` for ids spread over ``table``'s history, each at a random past time."""
+
+    history = history_table(table)
+    revisions_count, low, high = _execute(
+        conn, table, f"SELECT count(*), min(id), max(id) FROM {history}", ()
+    ).fetchone()
+    # Revision times drawn from the history itself, so lookups land between real changes.
+    sample = f"SELECT valid_from FROM {history} ORDER BY random() LIMIT ?"
+    times = [row[0] for row in conn.execute(sample, (lookups,))] or [HISTORY_EPOCH]
+    timings: List[float] = []
+    step = max(1, ((high or 0) - (low or 0)) // max(1, lookups))
+    for index in range(lookups):
+        record_id = (low or 0) + index * step
+        start = time.perf_counter()
+        record_as_of(conn, table, record_id, times[index % len(times)])
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "revisions": float(revisions_count),
+        "lookups": float(len(timings)),
+        "median_ms": timings[len(timings) // 2] * 1000 if timings else 0.0,
+        "max_ms": timings[-1] * 1000 if timings else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read catalog records as they stood at a point in time.")
+    parser.add_argument("--db", default=DB_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show_parser = subparsers.add_parser("show", help="print a record as of a time")
+    show_parser.add_argument("table", choices=sorted(TABLE_SCHEMAS))
+    show_parser.add_argument("id", type=int)
+    show_parser.add_argument("--as-of", default="now", help="UTC date or time (default: now)")
+
+    log_parser = subparsers.add_parser("log", help="list a record's revisions")
+    log_parser.add_argument("table", choices=sorted(TABLE_SCHEMAS))
+    log_parser.add_argument("id", type=int)
+
+    search_parser = subparsers.add_parser("search", help="search the catalog as of a time")
+    search_parser.add_argument("--as-of", required=True, help="UTC date or time")
+    search_parser.add_argument("--type", default="All Types", help="platform type filter")
+    search_parser.add_argument("--keyword", default="", help="class keyword filter")
+    search_parser.add_argument("--limit", type=int, default=20, help="matches to print")
+
+    bench_parser = subparsers.add_parser("benchmark", help="time point-in-time record lookups")
+    bench_parser.add_argument("table", choices=sorted(TABLE_SCHEMAS))
+    bench_parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        if args.command == "show":
+            as_of = as_of_time(conn, args.as_of)
+            values = record_as_of(conn, args.table, args.id, as_of)
+            if values is None:
+                raise SystemExit(f"{args.table} #{args.id} did not exist as of {as_of} UTC.")
+            print(json.dumps({"table": args.table, "as_of": as_of, "values": values}, indent=2))
+        elif args.command == "log":
+            for revision in revisions(conn, args.table, args.id):
+                print(f"{revision.valid_from}  {revision.op}  #{revision.revision}  {json.dumps(revision.values)}")
+        elif args.command == "search":
+            from catalog_search import SearchFilters, search_catalog
+
+            as_of = as_of_time(conn, args.as_of)
+            matches = search_catalog(conn, SearchFilters(type_name=args.type, class_filter=args.keyword), as_of=as_of)
+            print(f"{len(matches)} matches as of {as_of} UTC")
+            for match in matches[: args.limit]:
+                print(f"  {match}")
+        else:
+            result = benchmark_history(conn, args.table, args.lookups)
+            print(
+                f"{int(result['lookups'])} lookups over {int(result['revisions']):,} revisions: "
+                f"median {result['median_ms']:.3f} ms, max {result['max_ms']:.3f} ms"
+            )
+    except HistoryError as error:
+        raise SystemExit(str(error)) from None
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Parallel bulk loader for large catalog feeds.
+
+Input files are CSV or JSON Lines named after their table (``Ship.csv``,
+``Weapon.jsonl``), or passed with an explicit ``Table=path`` mapping.  The
+main process only splits files into line batches.  A ``ProcessPoolExecutor``
+parses the batches and coerces each value to the type declared in
+``TABLE_SCHEMAS``.  Validated batches flow over bounded queues to writer
+threads.  By default each table is written into its own staging database
+concurrently, and the staging files are merged into the target through
+``ATTACH``.  Indexes are built once, after the merge.
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from catalog_codec import CODECS
+from catalog_snapshot import snapshot_index_statements, snapshot_indexes
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS, TABLES, VERSION_COLUMN, initialize_database
+
+BATCH_LINES = 20000
+QUEUE_DEPTH = 8
+
+# What to do with feed rows whose explicit ``id`` is already in the catalog.
+CONFLICT_ERROR = "error"
+CONFLICT_REPLACE = "replace"
+CONFLICT_SKIP = "skip"
+CONFLICT_POLICIES = (CONFLICT_ERROR, CONFLICT_REPLACE, CONFLICT_SKIP)
+
+Batch = Tuple[str, List[str], List[Tuple[object, ...]], List[str]]
+
+
+class LoadError(Exception):
+    """Raised when a feed cannot be mapped onto the catalog schema."""
+
+
+def parse_batch(table: str, fmt: str, header: Sequence[str], lines: Sequence[str], first_line: int) -> Batch:
+    """Parse and type-check one batch of feed lines (runs in a worker process)."""
+
+    codec = CODECS[table]
+    converters = codec.converters
+    columns = [column for column in header if column in converters]
+    if fmt == "csv":
+        positions = [header.index(column) for column in columns]
+        records: Iterable[object] = csv.reader(lines)
+    else:
+        records = [line for line in lines if line.strip()]
+        try:
+            keys = json.loads(records[0]) if records else {}
+        except ValueError:
+            keys = {}
+        columns = [column for column in converters if isinstance(keys, dict) and column in keys]
+        columns = columns or [column for column in converters if column != "id"]
+
+    rows: List[Tuple[object, ...]] = []
+    errors: List[str] = []
+    convert = codec.row_converter(columns)
+    for offset, record in enumerate(records):
+        try:
+            if fmt == "csv":
+                values = [record[position] if position < len(record) else "" for position in positions]
+            else:
+                payload = json.loads(record)
+                values = [payload.get(column) for column in columns]
+            rows.append(convert(values))
+        except (ValueError, AttributeError) as exc:
+            errors.append(f"{table} line {first_line + offset}: {exc}")
+    return table, columns, rows, errors
+
+
+def _feed_format(path: str) -> str:
+    lowered = path.lower()
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lowered.endswith(".csv"):
+        return "csv"
+    raise LoadError(f"Unsupported feed format: {path}")
+
+
+def _table_for(path: str) -> str:
+    table = os.path.basename(path).split(".", 1)[0]
+    if table not in TABLE_SCHEMAS:
+        raise LoadError(f"Cannot infer a catalog table from {path}; use Table=path.")
+    return table
+
+
+def iter_line_batches(path: str, fmt: str, size: int) -> Iterator[Tuple[List[str], List[str], int]]:
+    """Yield ``(header, lines, first_line)`` batches without splitting quoted CSV records."""
+
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        header: List[str] = []
+        line_number = 1
+        if fmt == "csv":
+            header = next(csv.reader([handle.readline()]), [])
+            line_number = 2
+        batch: List[str] = []
+        first = line_number
+        pending = ""
+        for line in handle:
+            if pending:
+                line = pending + line
+            if fmt == "csv" and line.count('"') % 2:
+                pending = line
+                continue
+            pending = ""
+            batch.append(line)
+            line_number += 1
+            if len(batch) >= size:
+                yield header, batch, first
+                batch, first = [], line_number
+        if pending:
+            batch.append(pending)
+        if batch:
+            yield header, batch, first
+
+
+def insert_statement(table: str, columns: Sequence[str], source: str, on_conflict: str, fed: Iterable[str]) -> str:
+    """``INSERT`` of ``columns`` into ``table`` from ``source`` (a ``VALUES`` or ``SELECT`` clause).
+
+    Rows whose ``id`` is taken are settled by ``on_conflict``: ``replace``
+    updates only the ``fed`` columns and bumps the row version, like a sync.
+    """
+
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) {source}"
+    if on_conflict == CONFLICT_ERROR or "id" not in columns:
+        return statement
+    if source.startswith("SELECT"):
+        # Without a WHERE, SQLite would read ON CONFLICT as a join constraint.
+        statement += " WHERE true"
+    if on_conflict == CONFLICT_SKIP:
+        return f"{statement} ON CONFLICT(id) DO NOTHING"
+    updates = ", ".join(
+        [*(f"{column} = excluded.{column}" for column in fed if column != "id"), f"{VERSION_COLUMN} = {VERSION_COLUMN} + 1"]
+    )
+    return f"{statement} ON CONFLICT(id) DO UPDATE SET {updates}"
+
+
+class _TableWriter(threading.Thread):
+    """Drains validated batches from a bounded queue into one SQLite file.
+
+    ``scratch`` marks a throwaway staging file, written without a journal.
+    """
+
+    def __init__(
+        self, db_file: str, tables: Sequence[str], depth: int, on_conflict: str = CONFLICT_ERROR, scratch: bool = False
+    ) -> None:
+        super().__init__(daemon=True)
+        self.db_file = db_file
+        self.tables = tables
+        self.on_conflict = on_conflict
+        self.scratch = scratch
+        self.batches: "queue.Queue[Optional[Batch]]" = queue.Queue(maxsize=depth)
+        self.rows = 0
+        self.fed: Dict[str, Set[str]] = {}
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.db_file)
+        try:
+            if self.scratch:
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+            for table in self.tables:
+                conn.execute(TABLES[table])
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                table, columns, rows, _ = batch
+                if not rows:
+                    continue
+                self.fed.setdefault(table, set()).update(columns)
+                values = f"VALUES ({', '.join('?' for _ in columns)})"
+                conn.executemany(insert_statement(table, columns, values, self.on_conflict, columns), rows)
+                self.rows += len(rows)
+            conn.commit()
+        except BaseException as exc:  # pragma: no cover - surfaced by load_feeds
+            self.error = exc
+            while self.batches.get() is not None:
+                pass
+        finally:
+            conn.close()
+
+
+def merge_staging(
+    db_file: str, staging: Dict[str, str], fed: Dict[str, Set[str]], on_conflict: str = CONFLICT_ERROR
+) -> None:
+    """Copy each staged table into ``db_file`` through ATTACH, in one transaction.
+
+    Secondary indexes on the loaded tables are dropped first and rebuilt by
+    :func:`build_indexes`; a failed merge rolls back, indexes included.
+    ``fed`` holds the columns each table's feeds carried.  Tables fed an
+    ``id`` keep them, and ids already in the catalog are handled by
+    ``on_conflict``; the rest are renumbered by the target.
+    """
+
+    conn = sqlite3.connect(db_file)
+    try:
+        aliases: Dict[str, str] = {}
+        for number, (table, path) in enumerate(staging.items()):
+            aliases[table] = f"staging{number}"
+            conn.execute(f"ATTACH DATABASE ? AS {aliases[table]}", (path,))
+        with conn:
+            conn.execute("BEGIN")
+            for name, table, _ in snapshot_indexes():
+                if table in staging:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+            for table, alias in aliases.items():
+                columns = [name for name, _ in TABLE_SCHEMAS[table]]
+                if "id" not in fed.get(table, ()):
+                    columns = [column for column in columns if column != "id"]
+                elif on_conflict == CONFLICT_ERROR:
+                    _check_conflicts(conn, table, alias)
+                source = f"SELECT {', '.join(columns)} FROM {alias}.{table}"
+                conn.execute(insert_statement(f"main.{table}", columns, source, on_conflict, fed.get(table, ())))
+    finally:
+        conn.close()
+
+
+def _check_conflicts(conn: sqlite3.Connection, table: str, alias: str, shown: int = 10) -> None:
+    ids = [
+        row[0]
+        for row in conn.execute(
+            f"SELECT id FROM {alias}.{table} WHERE id IN (SELECT id FROM main.{table}) ORDER BY id LIMIT ?",
+            (shown + 1,),
+        )
+    ]
+    if ids:
+        listed = ", ".join(str(record_id) for record_id in ids[:shown]) + (", …" if len(ids) > shown else "")
+        raise LoadError(
+            f"{table} feed ids already in the catalog: {listed}; use --on-conflict replace or skip."
+        )
+
+
+def build_indexes(db_file: str) -> None:
+    conn = sqlite3.connect(db_file)
+    try:
+        with conn:
+            for statement in snapshot_index_statements():
+                conn.execute(statement)
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def load_feeds(
+    feeds: Dict[str, List[str]],
+    db_file: str = DB_FILE,
+    workers: Optional[int] = None,
+    staged: bool = True,
+    batch_lines: int = BATCH_LINES,
+    on_conflict: str = CONFLICT_ERROR,
+) -> Dict[str, object]:
+    """Load ``{table: [paths]}`` into ``db_file`` and return row, error and timing stats.
+
+    ``on_conflict`` says what happens to feed rows whose explicit ``id`` is
+    already taken: ``error`` aborts the load, ``replace`` overwrites the
+    existing row and ``skip`` keeps it.
+    """
+
+    if on_conflict not in CONFLICT_POLICIES:
+        raise LoadError(f"Unknown conflict policy: {on_conflict}")
+    start = time.perf_counter()
+    initialize_database(db_file, seed=False)
+    workers = workers or min(8, os.cpu_count() or 1)
+    staging_dir = tempfile.mkdtemp(prefix="cmsdb-load-", dir=os.path.dirname(os.path.abspath(db_file)))
+    staging: Dict[str, str] = {}
+    writers: Dict[str, _TableWriter] = {}
+    if staged:
+        for table in feeds:
+            staging[table] = os.path.join(staging_dir, f"{table}.db")
+            writers[table] = _TableWriter(staging[table], [table], QUEUE_DEPTH, scratch=True)
+    else:
+        shared = _TableWriter(db_file, list(feeds), QUEUE_DEPTH, on_conflict)
+        writers = {table: shared for table in feeds}
+    for writer in set(writers.values()):
+        writer.start()
+
+    errors: List[str] = []
+    pending: Set[Future] = set()
+
+    def route(done: Set[Future]) -> None:
+        for future in done:
+            batch = future.result()
+            errors.extend(batch[3])
+            writers[batch[0]].batches.put(batch)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for table, paths in feeds.items():
+                for path in paths:
+                    fmt = _feed_format(path)
+                    for header, lines, first in iter_line_batches(path, fmt, batch_lines):
+                        if len(pending) >= workers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            route(done)
+                        pending.add(executor.submit(parse_batch, table, fmt, header, lines, first))
+            route(set(wait(pending).done))
+    finally:
+        for writer in set(writers.values()):
+            writer.batches.put(None)
+        for writer in set(writers.values()):
+            writer.join()
+
+    try:
+        for writer in set(writers.values()):
+            if writer.error is not None:
+                raise LoadError(f"Writer for {writer.db_file} failed: {writer.error}")
+        parse_seconds = time.perf_counter() - start
+        if staged:
+            fed = {table: writer.fed.get(table, set()) for table, writer in writers.items()}
+            merge_staging(db_file, staging, fed, on_conflict)
+        build_indexes(db_file)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    rows = sum(writer.rows for writer in set(writers.values()))
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "errors": errors,
+        "workers": workers,
+        "parse_seconds": parse_seconds,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load CSV/JSONL feeds into the catalog.")
+    parser.add_argument("feeds", nargs="+", help="feed files named <Table>.csv|.jsonl, or Table=path")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--workers", type=int, default=0, help="parser processes (default: CPU count, max 8)")
+    parser.add_argument("--direct", action="store_true", help="write straight to the target instead of staging per table")
+    parser.add_argument(
+        "--on-conflict",
+        choices=CONFLICT_POLICIES,
+        default=CONFLICT_ERROR,
+        help="feed rows whose id is already in the catalog: abort (default), replace the row, or skip it",
+    )
+    args = parser.parse_args()
+
+    feeds: Dict[str, List[str]] = {}
+    for spec in args.feeds:
+        if "=" in spec:
+            table, path = spec.split("=", 1)
+            if table not in TABLE_SCHEMAS:
+                raise SystemExit(f"Unknown table: {table}")
+        else:
+            table, path = _table_for(spec), spec
+        feeds.setdefault(table, []).append(path)
+
+    try:
+        stats = load_feeds(feeds, args.db, args.workers or None, staged=not args.direct, on_conflict=args.on_conflict)
+    except LoadError as error:
+        raise SystemExit(str(error)) from None
+    for error in stats["errors"][:20]:
+        print(error)
+    print(
+        f"Loaded {stats['rows']} rows with {stats['workers']} workers in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_second']:.0f} rows/s, {len(stats['errors'])} rejected)"
+    )
+
+
+if __name__ == "__main__":
+    main()
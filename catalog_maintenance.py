@@ -0,0 +1,444 @@
+"""Scheduled health checks and upkeep for a catalog file.
+
+Years of imports and edits leave a catalog with free pages, half-empty and
+scattered b-tree pages and stale planner statistics, and nothing in
+:func:`initialize_database` looks at any of that.  :func:`run_maintenance`
+runs the upkeep tasks in :data:`TASKS` order:
+
+* ``quick_check`` / ``integrity_check`` -- SQLite's consistency checks.  An
+  index reported as damaged is rebuilt with ``REINDEX`` and the check run
+  again; damage to table data stops the run so nothing rewrites it further.
+* ``repair`` -- re-creates missing change triggers, support tables and range
+  indexes, and drops change-log and ``sqlite_sequence`` rows that name tables
+  the catalog no longer has.
+* ``reindex`` -- rebuilds every index, packing pages that deletes thinned out.
+* ``vacuum`` -- an incremental vacuum that hands free pages back to the file
+  system.  A file that is badly fragmented or thinned out by deletes since
+  its last rewrite, or whose free pages cannot be released incrementally, is
+  rewritten by a full ``VACUUM``, which also switches it to incremental
+  auto-vacuum.
+* ``analyze`` / ``optimize`` -- fresh planner statistics; ``PRAGMA optimize``
+  refreshes only what the probe queries showed to be stale.
+
+Each task has an interval in :data:`INTERVALS`; the time of its last run is
+kept in ``CatalogInfo``, so running the command from cron or a scheduled task
+every hour does only what is due.  The report compares page counts, free
+pages, leaf layout and the latency of a fixed set of probe searches
+before and after.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import statistics
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from catalog_filters import RangeFilter
+from catalog_queries import connect
+from catalog_search import SearchFilters, search_catalog
+from initialize_esm_db import (
+    CHANGE_LOG_TABLE,
+    DB_FILE,
+    TABLES,
+    build_range_index_statements,
+    ensure_change_tracking,
+    ensure_history,
+    ensure_row_versions,
+)
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+# Seconds between scheduled runs of each task, in the order the tasks run.
+INTERVALS: Dict[str, float] = {
+    "quick_check": DAY,
+    "integrity_check": 7 * DAY,
+    "repair": 7 * DAY,
+    "reindex": 30 * DAY,
+    "vacuum": DAY,
+    "analyze": 7 * DAY,
+    "optimize": DAY,
+}
+TASKS = tuple(INTERVALS)
+
+SCHEDULE_KEY = "maintenance:{}"
+BUSY_TIMEOUT = 30.0
+PROBE_ROUNDS = 5
+
+# A file is rewritten if it cannot vacuum incrementally and has a larger share
+# of free pages than FREE_LIMIT.  Small tables leave even a freshly rewritten
+# file's leaves partly empty and interleaved, so its leaf layout is judged
+# against what the last full VACUUM left (recorded in CatalogInfo): a file is
+# rewritten once the share of scattered leaves has grown by FRAGMENTATION_LIMIT,
+# or its leaves hold less than FILL_LIMIT of the bytes they did.  A file with
+# no record yet is rewritten only if more than FRAGMENTATION_LIMIT is scattered.
+FREE_LIMIT = 0.10
+FRAGMENTATION_LIMIT = 0.25
+FILL_LIMIT = 0.85
+LAYOUT_KEY = SCHEDULE_KEY.format("vacuum_layout")
+
+INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+_INDEX_PROBLEM = re.compile(r"\bindex (\w+)")
+
+
+class MaintenanceError(Exception):
+    """Raised when a check finds damage that maintenance cannot repair."""
+
+
+class DatabaseStats(NamedTuple):
+    page_size: int
+    page_count: int
+    freelist_count: int
+    # From dbstat (``None`` without it): the share of b-tree leaf pages not
+    # stored right after their predecessor, and of leaf bytes in use.
+    fragmentation: Optional[float]
+    fill: Optional[float]
+
+    @property
+    def bytes(self) -> int:
+        return self.page_size * self.page_count
+
+    @property
+    def free_share(self) -> float:
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+    def describe(self) -> str:
+        text = (
+            f"{self.page_count:,} pages of {self.page_size:,} B ({self.bytes / 1_000_000:.1f} MB), "
+            f"{self.freelist_count:,} free ({self.free_share:.1%})"
+        )
+        if self.fragmentation is None or self.fill is None:
+            return text
+        return f"{text}; leaves {self.fill:.0%} full, {self.fragmentation:.1%} scattered"
+
+
+class TaskResult(NamedTuple):
+    task: str
+    seconds: float
+    detail: str
+    ok: bool = True
+
+
+class MaintenanceReport(NamedTuple):
+    before: DatabaseStats
+    after: DatabaseStats
+    latency_before: float
+    latency_after: float
+    tasks: List[TaskResult]
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.tasks)
+
+    def describe(self) -> List[str]:
+        lines = [f"Before: {self.before.describe()}"]
+        for result in self.tasks:
+            status = "" if result.ok else "FAILED "
+            lines.append(f"  {result.task:<16} {result.seconds * 1000:9.1f} ms  {status}{result.detail}")
+        if not self.tasks:
+            lines.append("  nothing due")
+        lines.append(f"After:  {self.after.describe()}")
+        change = (self.latency_after / self.latency_before - 1) if self.latency_before else 0.0
+        lines.append(
+            f"Probe searches: {self.latency_before:.2f} ms before, {self.latency_after:.2f} ms after ({change:+.0%})"
+        )
+        return lines
+
+
+def leaf_layout(conn: sqlite3.Connection) -> Optional[Tuple[float, float]]:
+    """``(fragmentation, fill)`` of the b-tree leaf pages, or ``None`` without ``dbstat``.
+
+    ``dbstat`` walks each b-tree in key order, so a leaf that does not
+    directly follow the previous leaf of its tree is a scattered one.
+    """
+
+    try:
+        cursor = conn.execute("SELECT name, pageno, pgsize - unused, pgsize FROM dbstat WHERE pagetype = 'leaf'")
+    except sqlite3.OperationalError:
+        return None
+    follows = jumps = used = size = 0
+    last_name: Optional[str] = None
+    last_page = 0
+    for name, page, page_used, page_size in cursor:
+        if name == last_name:
+            follows += 1
+            jumps += page != last_page + 1
+        last_name, last_page = name, page
+        used += page_used
+        size += page_size
+    return (jumps / follows if follows else 0.0), (used / size if size else 1.0)
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def database_stats(conn: sqlite3.Connection, layout: bool = True) -> DatabaseStats:
+    """Page counts, plus the leaf layout unless ``layout`` is false (it reads every page)."""
+
+    fragmentation, fill = (leaf_layout(conn) if layout else None) or (None, None)
+    return DatabaseStats(
+        _pragma(conn, "page_size"),
+        _pragma(conn, "page_count"),
+        _pragma(conn, "freelist_count"),
+        fragmentation,
+        fill,
+    )
+
+
+def probe_filters(conn: sqlite3.Connection) -> List[SearchFilters]:
+    """A keyword scan, a country lookup and a range search, the browser's common query shapes."""
+
+    row = conn.execute(
+        "SELECT Country FROM Aircraft WHERE Country IS NOT NULL GROUP BY Country ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    filters = [
+        SearchFilters(type_name="Aircraft", class_filter="an"),
+        SearchFilters(type_name="Ships", ranges=(RangeFilter("DamagePoints", 100),)),
+    ]
+    if row is not None:
+        filters.append(SearchFilters(type_name="Aircraft", country=row[0]))
+    return filters
+
+
+def probe_latency(conn: sqlite3.Connection, filters: Sequence[SearchFilters], rounds: int = PROBE_ROUNDS) -> float:
+    """Median milliseconds to run every probe search once, after a warm-up round."""
+
+    timings: List[float] = []
+    for round_number in range(rounds + 1):
+        start = time.perf_counter()
+        for item in filters:
+            search_catalog(conn, item)
+        if round_number:
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def check(conn: sqlite3.Connection, full: bool = False) -> str:
+    """Run ``quick_check`` (or ``integrity_check``), rebuilding any index it reports as damaged."""
+
+    pragma = "integrity_check" if full else "quick_check"
+    problems = _problems(conn, pragma)
+    if not problems:
+        return "ok"
+    indexes = sorted({match.group(1) for problem in problems for match in _INDEX_PROBLEM.finditer(problem)})
+    for index in indexes:
+        conn.execute(f"REINDEX {index}")
+    remaining = _problems(conn, pragma) if indexes else problems
+    if remaining:
+        raise MaintenanceError(f"{len(remaining)} problems remain, first: {remaining[0]}")
+    return f"rebuilt {', '.join(indexes)} after {len(problems)} problems"
+
+
+def _problems(conn: sqlite3.Connection, pragma: str) -> List[str]:
+    rows = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+    return [] if rows == ["ok"] else rows
+
+
+def repair(conn: sqlite3.Connection) -> str:
+    """Restore the schema objects the catalog relies on and drop rows naming unknown tables."""
+
+    with conn:
+        ensure_row_versions(conn)
+        ensure_change_tracking(conn)
+        ensure_history(conn)
+        for statement in build_range_index_statements():
+            conn.execute(statement)
+        known = list(TABLES)
+        placeholders = ", ".join("?" for _ in known)
+        orphans = conn.execute(
+            f"DELETE FROM {CHANGE_LOG_TABLE} WHERE table_name NOT IN ({placeholders})", known
+        ).rowcount
+        existing = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        placeholders = ", ".join("?" for _ in existing)
+        sequences = conn.execute(f"DELETE FROM sqlite_sequence WHERE name NOT IN ({placeholders})", existing).rowcount
+    return f"{orphans} orphaned change-log rows, {sequences} stale sequences removed"
+
+
+def reindex(conn: sqlite3.Connection) -> str:
+    conn.execute("REINDEX")
+    return "rebuilt every index"
+
+
+def vacuum(conn: sqlite3.Connection, full: bool = False) -> str:
+    """Release free pages, rewriting the file when that cannot be done incrementally or it is fragmented."""
+
+    stats = database_stats(conn)
+    mode = _pragma(conn, "auto_vacuum")
+    baseline = vacuum_layout(conn)
+    reasons = []
+    if full:
+        reasons.append("requested")
+    if stats.fragmentation is not None and stats.fill is not None:
+        scattered, fill = baseline or (0.0, None)
+        if stats.fragmentation > scattered + FRAGMENTATION_LIMIT:
+            reasons.append(f"{stats.fragmentation:.0%} of leaves scattered")
+        if fill is not None and stats.fill < fill * FILL_LIMIT:
+            reasons.append(f"leaves {stats.fill:.0%} full, down from {fill:.0%}")
+    if mode != INCREMENTAL and stats.free_share > FREE_LIMIT:
+        reasons.append(f"{stats.free_share:.0%} of pages free")
+    if reasons:
+        # Takes effect with the rewrite, so later runs can vacuum incrementally.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        record_layout(conn, database_stats(conn))
+        return f"full vacuum ({', '.join(reasons)}); now incremental"
+    if baseline is None:
+        record_layout(conn, stats)
+    if mode == INCREMENTAL and stats.freelist_count:
+        # Run to completion by sqlite3_exec; a single execute() step frees only one page.
+        conn.executescript("PRAGMA incremental_vacuum")
+        return f"released {stats.freelist_count:,} free pages"
+    return "nothing to reclaim"
+
+
+def vacuum_layout(conn: sqlite3.Connection) -> Optional[Tuple[float, float]]:
+    """``(fragmentation, fill)`` recorded after the last full VACUUM, if any."""
+
+    try:
+        row = conn.execute("SELECT value FROM CatalogInfo WHERE key = ?", (LAYOUT_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    fragmentation, fill = map(float, row[0].split())
+    return fragmentation, fill
+
+
+def record_layout(conn: sqlite3.Connection, stats: DatabaseStats) -> None:
+    if stats.fragmentation is None or stats.fill is None:
+        return
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO CatalogInfo (key, value) VALUES (?, ?)",
+            (LAYOUT_KEY, f"{stats.fragmentation!r} {stats.fill!r}"),
+        )
+
+
+def analyze(conn: sqlite3.Connection) -> str:
+    conn.execute("ANALYZE")
+    return "statistics rebuilt for every table and index"
+
+
+def optimize(conn: sqlite3.Connection) -> str:
+    conn.execute("PRAGMA optimize")
+    return "stale statistics refreshed"
+
+
+_RUNNERS: Dict[str, Callable[[sqlite3.Connection], str]] = {
+    "quick_check": check,
+    "integrity_check": lambda conn: check(conn, full=True),
+    "repair": repair,
+    "reindex": reindex,
+    "vacuum": vacuum,
+    "analyze": analyze,
+    "optimize": optimize,
+}
+
+
+def last_runs(conn: sqlite3.Connection) -> Dict[str, float]:
+    """Unix time of each task's last successful run, for tasks that have run."""
+
+    runs: Dict[str, float] = {}
+    try:
+        rows = conn.execute("SELECT key, value FROM CatalogInfo WHERE key LIKE 'maintenance:%'").fetchall()
+    except sqlite3.OperationalError:
+        return runs
+    for key, value in rows:
+        task = key.split(":", 1)[1]
+        if task in INTERVALS:
+            runs[task] = float(value)
+    return runs
+
+
+def due_tasks(conn: sqlite3.Connection, now: Optional[float] = None) -> List[str]:
+    now = time.time() if now is None else now
+    runs = last_runs(conn)
+    return [task for task in TASKS if now - runs.get(task, 0.0) >= INTERVALS[task]]
+
+
+def record_run(conn: sqlite3.Connection, task: str, when: float) -> None:
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO CatalogInfo (key, value) VALUES (?, ?)", (SCHEDULE_KEY.format(task), repr(when))
+        )
+
+
+def run_maintenance(
+    db_file: str,
+    tasks: Optional[Sequence[str]] = None,
+    full_vacuum: bool = False,
+    rounds: int = PROBE_ROUNDS,
+) -> MaintenanceReport:
+    """Run ``tasks`` (default: those due) on ``db_file`` and measure the catalog before and after.
+
+    A check that finds unrepairable damage fails the run; the tasks after it are skipped.
+    """
+
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(f"Catalog database not found: {db_file}")
+    conn = connect(db_file, timeout=BUSY_TIMEOUT)
+    try:
+        selected = due_tasks(conn) if tasks is None else [task for task in TASKS if task in tasks]
+        filters = probe_filters(conn)
+        before = database_stats(conn)
+        latency_before = probe_latency(conn, filters, rounds)
+        results: List[TaskResult] = []
+        for task in selected:
+            start = time.perf_counter()
+            try:
+                detail = vacuum(conn, full_vacuum) if task == "vacuum" else _RUNNERS[task](conn)
+            except (MaintenanceError, sqlite3.DatabaseError) as error:
+                results.append(TaskResult(task, time.perf_counter() - start, str(error), ok=False))
+                break
+            conn.commit()
+            results.append(TaskResult(task, time.perf_counter() - start, detail))
+            record_run(conn, task, time.time())
+        after = database_stats(conn)
+        latency_after = probe_latency(conn, filters, rounds)
+    finally:
+        conn.close()
+    return MaintenanceReport(before, after, latency_before, latency_after, results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check, repair and tidy a catalog file; run from a scheduler.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--task", action="append", choices=TASKS, help="run this task now (repeatable)")
+    parser.add_argument("--all", action="store_true", help="run every task now, due or not")
+    parser.add_argument("--full-vacuum", action="store_true", help="rewrite the file now, fragmented or not")
+    parser.add_argument("--status", action="store_true", help="print when each task last ran and exit")
+    parser.add_argument("--rounds", type=int, default=PROBE_ROUNDS, help="probe search rounds before and after")
+    args = parser.parse_args()
+
+    if args.status:
+        if not os.path.exists(args.db):
+            raise SystemExit(f"Catalog database not found: {args.db}")
+        conn = connect(args.db)
+        try:
+            runs, due = last_runs(conn), set(due_tasks(conn))
+        finally:
+            conn.close()
+        for task in TASKS:
+            last = time.strftime("%Y-%m-%d %H:%M", time.localtime(runs[task])) if task in runs else "never"
+            print(f"{task:<16} every {INTERVALS[task] / DAY:g} days, last run {last}{' (due)' if task in due else ''}")
+        return
+
+    tasks: Optional[Sequence[str]] = TASKS if args.all else args.task
+    if args.full_vacuum and "vacuum" not in (tasks or ()):
+        tasks = [*(tasks or ()), "vacuum"]
+    try:
+        report = run_maintenance(args.db, tasks, args.full_vacuum, args.rounds)
+    except FileNotFoundError as error:
+        raise SystemExit(str(error)) from None
+    for line in report.describe():
+        print(line)
+    if not report.ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Per-table searches run concurrently on a pool of read connections.
+
+A type such as "All Types" spans eight tables, and :func:`search_catalog`
+queries them one after another.  SQLite releases the GIL while it steps a
+statement, so the scans and sorts of different tables can run on different
+cores.  :class:`ReadPool` gives each worker thread its own read-only
+connection (SQLite connections must not be shared between concurrent
+statements), and :func:`parallel_search` runs one table per task.
+
+Each task returns its table's matches in SQL name order, so the results are
+k sorted runs.  They are merged by ``list.sort``, whose run detection makes
+it a k-way merge in C that also settles the few rows where SQLite's
+ASCII-only ``LOWER()`` disagrees with Python; ``heapq.merge`` does the same
+work per item in Python and measured twice as slow on large results.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import quote
+
+from catalog_bitmaps import BitmapIndex
+from catalog_facets import FacetCounter
+from catalog_queries import QUERIES, QueryRegistry, connect
+from catalog_search import (
+    Match,
+    SearchFilters,
+    count_rows,
+    match_sort_key,
+    resolve_candidates,
+    search_catalog,
+    search_table,
+    table_matches,
+)
+from initialize_esm_db import DB_FILE, TABLES
+
+Result = TypeVar("Result")
+
+
+def default_workers() -> int:
+    return min(len(TABLES), os.cpu_count() or 1)
+
+
+def open_read_connection(db_file: str, immutable: bool = False) -> sqlite3.Connection:
+    """A read-only connection to ``db_file``; ``immutable`` for snapshots that never change.
+
+    Each pool connection is only used by its own worker, but is closed by the pool's owner.
+    """
+
+    if immutable:
+        from catalog_snapshot import connect_read_only
+
+        conn = connect_read_only(db_file, check_same_thread=False)
+    else:
+        conn = connect(f"file:{quote(os.path.abspath(db_file))}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ReadPool:
+    """Worker threads over ``db_file``, each with a read connection of its own, opened on first use."""
+
+    def __init__(self, db_file: str, workers: Optional[int] = None, immutable: bool = False) -> None:
+        if not os.path.exists(db_file):
+            raise FileNotFoundError(f"Catalog database not found: {db_file}")
+        self.db_file = db_file
+        self.immutable = immutable
+        self.workers = workers or default_workers()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="catalog-read")
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """The calling worker's connection."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_read_connection(self.db_file, self.immutable)
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def map(self, task: Callable[[sqlite3.Connection, str], Result], items: Sequence[str]) -> List[Result]:
+        """``task(conn, item)`` for each item, concurrently; results keep ``items`` order."""
+
+        futures = [self.executor.submit(lambda item=item: task(self.connection(), item)) for item in items]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+
+
+def merge_matches(results: Sequence[List[Match]]) -> List[Match]:
+    """Per-table results, each in name order, merged into one name-sorted list.
+
+    The sort is stable, so ties keep the order of ``results`` as in :func:`search_catalog`.
+    """
+
+    merged = [match for matches in results for match in matches]
+    merged.sort(key=match_sort_key)
+    return merged
+
+
+def parallel_search(
+    pool: ReadPool,
+    filters: SearchFilters,
+    facets: Optional[FacetCounter] = None,
+    bitmaps: Optional[BitmapIndex] = None,
+    registry: Optional[QueryRegistry] = QUERIES,
+    table_facets: Optional[Dict[str, FacetCounter]] = None,
+) -> List[Match]:
+    """:func:`search_catalog` with each table searched on its own pool connection."""
+
+    counting = facets is not None or table_facets is not None
+    # Bitmaps are not thread-safe, so candidates are resolved here and handed to the workers.
+    tasks: List[Tuple[str, object]] = []
+    for table in filters.tables:
+        candidates = resolve_candidates(table, filters, bitmaps)
+        if candidates is None or candidates:
+            tasks.append((table, candidates))
+    candidates_for = dict(tasks)
+
+    def task(conn: sqlite3.Connection, table: str) -> Tuple[List[Match], Optional[FacetCounter]]:
+        rows = search_table(conn, table, filters, candidates_for[table], registry)
+        return table_matches(table, rows), count_rows(table, filters, rows) if counting and rows else None
+
+    results = pool.map(task, [table for table, _ in tasks])
+    for (table, _), (_, counter) in zip(tasks, results):
+        if counter is None:
+            continue
+        if table_facets is not None:
+            table_facets[table] = counter
+        if facets is not None:
+            facets.merge(counter)
+    return merge_matches([matches for matches, _ in results])
+
+
+def benchmark_parallel(db_file: str, filters: SearchFilters, rounds: int = 5, workers: Optional[int] = None) -> Dict[str, float]:
+    """Median seconds for ``filters`` searched table by table and on a :class:`ReadPool`."""
+
+    pool = ReadPool(db_file, workers)
+    conn = open_read_connection(db_file)
+    try:
+        expected = search_catalog(conn, filters)
+        if parallel_search(pool, filters) != expected:
+            raise AssertionError("parallel search returned different matches")
+        sequential: List[float] = []
+        parallel: List[float] = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            search_catalog(conn, filters)
+            sequential.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            parallel_search(pool, filters)
+            parallel.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+        pool.close()
+    return {
+        "matches": float(len(expected)),
+        "workers": float(pool.workers),
+        "sequential_seconds": statistics.median(sequential),
+        "parallel_seconds": statistics.median(parallel),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare table-by-table and parallel cross-table search.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--keyword", default="", help="class keyword filter")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=0, help="pool size (default: one per core, up to the table count)")
+    args = parser.parse_args()
+
+    result = benchmark_parallel(args.db, SearchFilters(class_filter=args.keyword), args.rounds, args.workers or None)
+    print(f"Matches:    {int(result['matches'])} across all tables, {os.cpu_count()} cores")
+    print(f"Sequential: {result['sequential_seconds'] * 1000:.1f} ms")
+    print(
+        f"Parallel:   {result['parallel_seconds'] * 1000:.1f} ms with {int(result['workers'])} workers "
+        f"({result['sequential_seconds'] / result['parallel_seconds']:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
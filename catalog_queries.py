@@ -0,0 +1,132 @@
+"""Canonical SQL per query shape, so SQLite's statement cache is actually reused.
+
+``sqlite3`` keeps an LRU of prepared statements keyed by SQL text.  The
+browser's queries vary only in their table and *shape* (which filters are
+active, how many attribute values, which range bounds), not in their literal
+values, which travel as parameters.  :class:`QueryRegistry` compiles the SQL
+for each shape once and hands back the same string afterwards.  That takes
+string building off the per-keystroke path and keeps the set of distinct
+statements small enough for the connection's cache
+(:data:`STATEMENT_CACHE_SIZE`, raised from the default 128).
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Hashable, List
+
+from initialize_esm_db import DB_FILE
+
+STATEMENT_CACHE_SIZE = 512
+
+RECORD_BY_ID = "SELECT * FROM {table} WHERE id = ?"
+CATEGORY_NAMES = "SELECT Name FROM {table} WHERE Country = ? ORDER BY Name"
+TREE_ROWS = "SELECT id, Country, Name FROM {table} WHERE Country IS NOT NULL ORDER BY Country, Name"
+COUNTRY_VALUES = "SELECT DISTINCT Country FROM {table} WHERE Country IS NOT NULL AND TRIM(Country) != ''"
+COUNTRY_COUNT = "SELECT COUNT(*) FROM {table} WHERE Country = ?"
+TREE_ROWS_BY_ID = "SELECT id, Country, Name FROM {table} WHERE id IN (SELECT value FROM json_each(?))"
+
+
+class QueryRegistry:
+    """SQL text by shape key, with hit/miss counters."""
+
+    def __init__(self) -> None:
+        self._statements: Dict[Hashable, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def compile(self, key: Hashable, build: Callable[[], str]) -> str:
+        """The SQL registered for ``key``, calling ``build`` only the first time."""
+
+        statement = self._statements.get(key)
+        if statement is None:
+            self.misses += 1
+            statement = self._statements[key] = build()
+        else:
+            self.hits += 1
+        return statement
+
+    def table_query(self, template: str, table: str) -> str:
+        """``template`` formatted for ``table`` (one of the per-table templates above)."""
+
+        return self.compile((template, table), lambda: template.format(table=table))
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "statements": len(self._statements),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._statements.clear()
+        self.hits = self.misses = 0
+
+
+QUERIES = QueryRegistry()
+
+
+def connect(database: str, **kwargs) -> sqlite3.Connection:
+    """``sqlite3.connect`` with a statement cache large enough for every registered shape."""
+
+    kwargs.setdefault("cached_statements", STATEMENT_CACHE_SIZE)
+    return sqlite3.connect(database, **kwargs)
+
+
+def benchmark_search(db_file: str, rounds: int = 200) -> Dict[str, float]:
+    """Replay a typing session with and without the registry and report per-search times.
+
+    The baseline rebuilds every statement and runs with SQLite's statement
+    cache disabled, as the browser effectively did before.
+    """
+
+    from catalog_search import SearchFilters, search_catalog
+
+    keystrokes = ["", "s", "sa", "sam", "sa", "s", ""]
+    filters: List[SearchFilters] = [
+        SearchFilters(type_name=type_name, class_filter=text)
+        for type_name in ("Weapons", "Ships", "Aircraft", "Drones")
+        for text in keystrokes
+    ]
+    timings: Dict[str, float] = {}
+    for label, registry, cache_size in (("uncached", None, 0), ("registry", QUERIES, STATEMENT_CACHE_SIZE)):
+        conn = sqlite3.connect(db_file, cached_statements=cache_size)
+        try:
+            for item in filters:
+                search_catalog(conn, item, registry=registry)
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for item in filters:
+                    search_catalog(conn, item, registry=registry)
+            timings[label] = (time.perf_counter() - start) * 1000 / (rounds * len(filters))
+        finally:
+            conn.close()
+    timings.update(QUERIES.stats())
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure search latency with the query registry.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    result = benchmark_search(args.db, args.rounds)
+    print(f"Per search without registry: {result['uncached']:.3f} ms")
+    print(f"Per search with registry:    {result['registry']:.3f} ms")
+    print(
+        f"Registry: {result['statements']:.0f} statements, "
+        f"{result['hits']:.0f} hits / {result['misses']:.0f} misses ({result['hit_rate']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
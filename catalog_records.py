@@ -0,0 +1,291 @@
+"""Compact record stores backing the catalog tree and list views.
+
+The Treeview and Listbox only need to map a widget item back to a
+``(table, id)`` pair plus a little context.  Holding a dict per node costs
+several hundred bytes each; these stores keep interned codes in parallel
+``array`` columns instead and materialise ``__slots__`` records on demand.
+"""
+
+import argparse
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+NODE_COUNTRY = 0
+NODE_CATEGORY = 1
+NODE_UNIT = 2
+
+NODE_KIND_NAMES = ("country", "category", "unit")
+
+NODE_IID_PREFIX = "n"
+
+
+def positions_of(column: array, value: int) -> List[int]:
+    """Indexes holding ``value`` in an integer ``array``, found by a byte search rather than a Python loop."""
+
+    pattern = re.compile(re.escape(array(column.typecode, [value]).tobytes()))
+    found: List[int] = []
+    with memoryview(column).cast("B") as view:
+        match = pattern.search(view)
+        while match is not None:
+            start = match.start()
+            if start % column.itemsize:
+                # Straddles two items; an aligned hit may overlap it, so resume one byte on.
+                match = pattern.search(view, start + 1)
+                continue
+            found.append(start // column.itemsize)
+            match = pattern.search(view, start + column.itemsize)
+    return found
+
+
+class CodeTable:
+    """Interns repeated strings (table names, countries) as small integer codes."""
+
+    __slots__ = ("_codes", "_values")
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def find(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+
+class NodeRecord:
+    """Lightweight view of a single tree node, built only when requested."""
+
+    __slots__ = ("kind", "table", "record_id", "country", "label")
+
+    def __init__(self, kind: str, table: str, record_id: int, country: str, label: str) -> None:
+        self.kind = kind
+        self.table = table
+        self.record_id = record_id
+        self.country = country
+        self.label = label
+
+    def __repr__(self) -> str:
+        return (
+            f"NodeRecord(kind={self.kind!r}, table={self.table!r}, "
+            f"record_id={self.record_id!r}, country={self.country!r})"
+        )
+
+
+class NodeStore:
+    """Array-backed metadata for Treeview nodes addressed by generated item ids."""
+
+    def __init__(self, labels: Mapping[str, str]) -> None:
+        self.labels = dict(labels)
+        self.tables = CodeTable(self.labels)
+        self.countries = CodeTable()
+        self._kinds = array("B")
+        self._table_codes = array("B")
+        self._country_codes = array("I")
+        self._ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def clear(self) -> None:
+        del self._kinds[:]
+        del self._table_codes[:]
+        del self._country_codes[:]
+        del self._ids[:]
+
+    def _append(self, kind: int, table_code: int, country: str, record_id: int) -> str:
+        index = len(self._kinds)
+        self._kinds.append(kind)
+        self._table_codes.append(table_code)
+        self._country_codes.append(self.countries.code(country))
+        self._ids.append(record_id)
+        return f"{NODE_IID_PREFIX}{index}"
+
+    def add_country(self, country: str) -> str:
+        return self._append(NODE_COUNTRY, 0, country, 0)
+
+    def add_category(self, table: str, country: str) -> str:
+        return self._append(NODE_CATEGORY, self.tables.code(table), country, 0)
+
+    def add_unit(self, table: str, record_id: int, country: str) -> str:
+        return self._append(NODE_UNIT, self.tables.code(table), country, record_id)
+
+    def find_unit(self, table: str, record_id: int) -> Optional[str]:
+        """The item id of the unit node for ``(table, record_id)``, scanning the id column."""
+
+        table_code = self.tables.find(table)
+        if table_code is None:
+            return None
+        for index in positions_of(self._ids, record_id):
+            if self._kinds[index] == NODE_UNIT and self._table_codes[index] == table_code:
+                return f"{NODE_IID_PREFIX}{index}"
+        return None
+
+    def forget_unit(self, iid: str) -> None:
+        """Stop :meth:`find_unit` from returning ``iid`` once its tree item is deleted."""
+
+        index = self.index_of(iid)
+        if index is not None:
+            self._ids[index] = -1
+
+    def index_of(self, iid: str) -> Optional[int]:
+        if not iid.startswith(NODE_IID_PREFIX):
+            return None
+        try:
+            index = int(iid[len(NODE_IID_PREFIX):])
+        except ValueError:
+            return None
+        if 0 <= index < len(self._kinds):
+            return index
+        return None
+
+    def get(self, iid: str) -> Optional[NodeRecord]:
+        index = self.index_of(iid)
+        if index is None:
+            return None
+        kind = self._kinds[index]
+        country = self.countries.value(self._country_codes[index])
+        if kind == NODE_COUNTRY:
+            return NodeRecord(NODE_KIND_NAMES[kind], "", 0, country, country)
+        table = self.tables.value(self._table_codes[index])
+        return NodeRecord(
+            NODE_KIND_NAMES[kind],
+            table,
+            self._ids[index],
+            country,
+            self.labels.get(table, table),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.buffer_info()[1] * column.itemsize
+            for column in (self._kinds, self._table_codes, self._country_codes, self._ids)
+        )
+
+
+class RecordList:
+    """Parallel ``(table, id)`` and display-text columns replacing per-row tuples in list views."""
+
+    def __init__(self, tables: Optional[CodeTable] = None) -> None:
+        self.tables = tables if tables is not None else CodeTable()
+        self._table_codes = array("B")
+        self._ids = array("q")
+        self._texts: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: int) -> Tuple[str, int]:
+        return self.tables.value(self._table_codes[index]), self._ids[index]
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        value = self.tables.value
+        for code, record_id in zip(self._table_codes, self._ids):
+            yield value(code), record_id
+
+    @property
+    def texts(self) -> Sequence[str]:
+        """The rows' display texts, in list order; edit them through the list."""
+
+        return self._texts
+
+    def keys(self) -> List[Tuple[str, int]]:
+        return list(self)
+
+    def append(self, table: str, record_id: int, text: str) -> None:
+        self._table_codes.append(self.tables.code(table))
+        self._ids.append(record_id)
+        self._texts.append(text)
+
+    def extend(self, keys: Iterable[Tuple[str, int]], texts: Iterable[str]) -> None:
+        code = self.tables.code
+        for (table, record_id), text in zip(keys, texts):
+            self._table_codes.append(code(table))
+            self._ids.append(record_id)
+            self._texts.append(text)
+
+    def insert(self, index: int, table: str, record_id: int, text: str) -> None:
+        self._table_codes.insert(index, self.tables.code(table))
+        self._ids.insert(index, record_id)
+        self._texts.insert(index, text)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        del self._table_codes[index]
+        del self._ids[index]
+        del self._texts[index]
+
+    def clear(self) -> None:
+        del self._table_codes[:]
+        del self._ids[:]
+        self._texts.clear()
+
+
+def benchmark_node_memory(count: int = 200_000) -> Dict[str, float]:
+    """Compare per-node memory of dict metadata against :class:`NodeStore`."""
+
+    import tracemalloc  # only needed for this benchmark; keeps the browser's import light
+
+    tables = ("Platform", "Aircraft", "Ship", "Weapon")
+    countries = [f"Country {index}" for index in range(40)]
+
+    tracemalloc.start()
+    baseline: Dict[str, Dict[str, object]] = {}
+    for index in range(count):
+        table = tables[index % len(tables)]
+        baseline[f"I{index:06X}"] = {
+            "type": "unit",
+            "table": table,
+            "id": index,
+            "country": countries[index % len(countries)],
+            "label": table,
+            "name": f"Unit {index}",
+        }
+    dict_bytes, _ = tracemalloc.get_traced_memory()
+    del baseline
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = NodeStore({table: table for table in tables})
+    for index in range(count):
+        store.add_unit(tables[index % len(tables)], index, countries[index % len(countries)])
+    store_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "nodes": float(count),
+        "dict_bytes_per_node": dict_bytes / count,
+        "store_bytes_per_node": store_bytes / count,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure tree metadata memory usage.")
+    parser.add_argument("--nodes", type=int, default=200_000, help="number of unit nodes to simulate")
+    args = parser.parse_args()
+
+    results = benchmark_node_memory(args.nodes)
+    print(f"Nodes:            {int(results['nodes'])}")
+    print(f"Dict metadata:    {results['dict_bytes_per_node']:.1f} bytes/node")
+    print(f"NodeStore arrays: {results['store_bytes_per_node']:.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Frame-budgeted rendering for large listbox and tree updates.
+
+Every ``Listbox.insert`` and ``Treeview.insert`` is a Python→Tcl round trip,
+so rendering 100k rows in one go freezes the event loop for seconds.
+:class:`ChunkedRenderer` splits a render into ``render(start, stop)`` slices
+scheduled with ``after_idle``.  Each slice stops once it has used
+:data:`FRAME_BUDGET`, and chunk sizes adapt to the measured per-row cost.
+Listbox chunks go through one multi-item ``insert`` call each.
+
+Filter changes usually move a result to a near subset or superset of the
+previous one, so :func:`plan_list_edits` diffs the old and new sorted keys and
+:func:`apply_list_edits` touches only the rows that changed.  When only a few
+known rows changed (a live change notification), :func:`splice_rows` plans
+the same edit without walking the whole list in Python.
+"""
+
+from bisect import bisect_right
+from itertools import compress
+from time import perf_counter
+from typing import Callable, Container, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+FRAME_BUDGET = 0.016
+INITIAL_CHUNK = 256
+MIN_CHUNK = 16
+MAX_EDIT_RUNS = 512
+
+RenderSlice = Callable[[int, int], None]
+Progress = Callable[[int, int], None]
+Run = Tuple[int, int]
+
+
+class ChunkedRenderer:
+    """Runs one render at a time over idle slices of ``widget``'s event loop.
+
+    Starting a new render cancels the one in flight, so a fast typist never
+    queues several stale list fills behind each other.
+    """
+
+    def __init__(self, widget, budget: float = FRAME_BUDGET, on_progress: Optional[Progress] = None) -> None:
+        self.widget = widget
+        self.budget = budget
+        self.on_progress = on_progress
+        self.generation = 0
+        self.pending: Optional[str] = None
+
+    @property
+    def busy(self) -> bool:
+        return self.pending is not None
+
+    def cancel(self) -> None:
+        self.generation += 1
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.pending = None
+
+    def run(self, total: int, render: RenderSlice, on_done: Optional[Callable[[], None]] = None) -> None:
+        """Render rows ``0..total`` through ``render``; the first slice runs immediately."""
+
+        self.cancel()
+        self._slice(self.generation, 0, total, INITIAL_CHUNK, render, on_done)
+
+    def _slice(
+        self,
+        generation: int,
+        start: int,
+        total: int,
+        chunk: int,
+        render: RenderSlice,
+        on_done: Optional[Callable[[], None]],
+    ) -> None:
+        self.pending = None
+        if generation != self.generation:
+            return
+        began = perf_counter()
+        elapsed = 0.0
+        while start < total:
+            stop = min(total, start + chunk)
+            render(start, stop)
+            now = perf_counter()
+            spent, elapsed = now - began - elapsed, now - began
+            per_row = spent / (stop - start)
+            start = stop
+            if per_row > 0:
+                # Grow at most 2x per chunk so one cheap chunk cannot trigger a huge one.
+                chunk = max(MIN_CHUNK, min(chunk * 2, int(self.budget / 2 / per_row)))
+            if elapsed + chunk * per_row > self.budget:
+                break
+        if self.on_progress is not None:
+            self.on_progress(start, total)
+        if start < total:
+            self.pending = self.widget.after_idle(
+                self._slice, generation, start, total, chunk, render, on_done
+            )
+        elif on_done is not None:
+            on_done()
+
+
+def listbox_slices(listbox, texts: Sequence[str], end: str = "end") -> RenderSlice:
+    """A :data:`RenderSlice` appending ``texts[start:stop]`` with one ``insert`` call."""
+
+    def render(start: int, stop: int) -> None:
+        listbox.insert(end, *texts[start:stop])
+
+    return render
+
+
+def _runs(indexes: Iterable[int]) -> List[Run]:
+    runs: List[Run] = []
+    for index in indexes:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+def _unmarked_runs(marks: bytearray) -> List[Run]:
+    runs: List[Run] = []
+    first = marks.find(0)
+    while first != -1:
+        end = marks.find(1, first)
+        if end == -1:
+            end = len(marks)
+        runs.append((first, end - 1))
+        first = marks.find(0, end)
+    return runs
+
+
+def plan_list_edits(
+    old_keys: Sequence[Hashable],
+    new_keys: Sequence[Hashable],
+    old_texts: Sequence[str],
+    new_texts: Sequence[str],
+) -> Optional[Tuple[List[Run], List[Run]]]:
+    """Deleted runs (old indexes) and inserted runs (new indexes) turning the old rows into the new.
+
+    Both key sequences come from name-sorted results, so rows present in
+    both keep their relative order and the edit is the symmetric difference;
+    a row whose text changed counts as deleted and re-inserted.  Returns
+    ``None`` when the kept rows changed order or when the edit is so
+    fragmented that a full rebuild is cheaper.
+    """
+
+    positions = dict(zip(old_keys, range(len(old_keys))))
+    kept = bytearray(len(old_keys))
+    inserted: List[int] = []
+    last = -1
+    for index, old_index in enumerate(map(positions.get, new_keys)):
+        if old_index is None or old_texts[old_index] != new_texts[index]:
+            inserted.append(index)
+            continue
+        if old_index < last:
+            return None
+        last = old_index
+        kept[old_index] = 1
+    inserts = _runs(inserted)
+    if len(inserts) > MAX_EDIT_RUNS:
+        return None
+    deletes = _unmarked_runs(kept)
+    if len(deletes) + len(inserts) > MAX_EDIT_RUNS:
+        return None
+    return deletes, inserts
+
+
+def apply_list_edits(listbox, plan: Tuple[List[Run], List[Run]], texts: Sequence[str]) -> None:
+    """Apply a :func:`plan_list_edits` plan: deletes bottom-up, then inserts top-down."""
+
+    deletes, inserts = plan
+    for first, last in reversed(deletes):
+        listbox.delete(first, last)
+    for first, last in inserts:
+        listbox.insert(first, *texts[first:last + 1])
+
+
+def splice_rows(
+    keys: Sequence[Hashable],
+    texts: Sequence[str],
+    changed: Container[Hashable],
+    additions: Sequence[Tuple[Hashable, str]],
+    sort_key: Callable[[str], str],
+) -> Tuple[List[Hashable], List[str], Tuple[List[Run], List[Run]]]:
+    """Drop the ``changed`` rows and insert ``additions`` at their sorted positions.
+
+    ``texts`` must already be ordered by ``sort_key``; ``additions`` are
+    ``(key, text)`` pairs in any order.  Returns the new keys and texts plus
+    an :func:`apply_list_edits` plan.
+    """
+
+    removed = bytearray(map(changed.__contains__, keys))
+    kept_flags = removed.translate(bytes.maketrans(b"\x00\x01", b"\x01\x00"))
+    new_keys = list(compress(keys, kept_flags))
+    new_texts = list(compress(texts, kept_flags))
+    deletes = _unmarked_runs(kept_flags)
+
+    inserted: List[int] = []
+    for key, text in sorted(additions, key=lambda item: sort_key(item[1])):
+        position = bisect_right(new_texts, sort_key(text), key=sort_key)
+        new_keys.insert(position, key)
+        new_texts.insert(position, text)
+        inserted.append(position)
+    return new_keys, new_texts, (deletes, _runs(inserted))
@@ -0,0 +1,278 @@
+"""Order-of-battle rollups over DamagePoints, crew, personnel and displacement.
+
+Each table is aggregated with one grouped query (``GROUP BY Country``) that
+computes every measure at once, including the displacement histogram via
+``SUM(CASE ...)`` buckets.  The per-(table, country) partials are then folded
+into per-country and per-category rollups in Python.  :class:`RollupCache`
+reuses the last report until ``PRAGMA data_version`` or the connection's own
+change count moves.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog_queries import QUERIES
+from catalog_search import CATEGORY_TABLES
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS
+
+DISPLACEMENT_BUCKETS: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = (
+    ("<1k", None, 1000.0),
+    ("1k-5k", 1000.0, 5000.0),
+    ("5k-10k", 5000.0, 10000.0),
+    ("10k-20k", 10000.0, 20000.0),
+    ("20k-50k", 20000.0, 50000.0),
+    (">=50k", 50000.0, None),
+)
+
+ADDITIVE_FIELDS = (
+    "rows",
+    "damage_total",
+    "damage_rated",
+    "crew_total",
+    "personnel_total",
+    "displacement_rated",
+    "displacement_total",
+)
+
+Rollup = Dict[str, object]
+Report = Dict[str, Dict[str, Rollup]]
+
+
+def _new_rollup() -> Rollup:
+    return {
+        "rows": 0,
+        "damage_total": 0,
+        "damage_rated": 0,
+        "crew_total": 0,
+        "personnel_total": 0,
+        "displacement_rated": 0,
+        "displacement_total": 0.0,
+        "displacement_min": None,
+        "displacement_max": None,
+        "displacement_buckets": {label: 0 for label, _, _ in DISPLACEMENT_BUCKETS},
+    }
+
+
+def _bucket_case(low: Optional[float], high: Optional[float]) -> str:
+    terms = []
+    if low is not None:
+        terms.append(f"Displacement >= {low}")
+    if high is not None:
+        terms.append(f"Displacement < {high}")
+    return f"SUM(CASE WHEN {' AND '.join(terms)} THEN 1 ELSE 0 END)"
+
+
+def build_rollup_query(table: str) -> str:
+    """One grouped query computing every measure ``table`` has, per country."""
+
+    columns = {name for name, _ in TABLE_SCHEMAS[table]}
+    selects = ["IFNULL(Country, 'Unknown')", "COUNT(*)"]
+    if "DamagePoints" in columns:
+        selects += ["IFNULL(SUM(DamagePoints), 0)", "COUNT(DamagePoints)"]
+    else:
+        selects += ["0", "0"]
+    selects.append("IFNULL(SUM(Crew), 0)" if "Crew" in columns else "0")
+    selects.append("IFNULL(SUM(Personnel), 0)" if "Personnel" in columns else "0")
+    if "Displacement" in columns:
+        selects += [
+            "COUNT(Displacement)",
+            "IFNULL(SUM(Displacement), 0)",
+            "MIN(Displacement)",
+            "MAX(Displacement)",
+        ]
+        selects += [_bucket_case(low, high) for _, low, high in DISPLACEMENT_BUCKETS]
+    return f"SELECT {', '.join(selects)} FROM {table} GROUP BY IFNULL(Country, 'Unknown')"
+
+
+def _fold(target: Rollup, row: Tuple[object, ...]) -> None:
+    target["rows"] += row[1]
+    target["damage_total"] += row[2]
+    target["damage_rated"] += row[3]
+    target["crew_total"] += row[4]
+    target["personnel_total"] += row[5]
+    if len(row) > 6 and row[6]:
+        target["displacement_rated"] += row[6]
+        target["displacement_total"] += row[7]
+        low, high = row[8], row[9]
+        if target["displacement_min"] is None or low < target["displacement_min"]:
+            target["displacement_min"] = low
+        if target["displacement_max"] is None or high > target["displacement_max"]:
+            target["displacement_max"] = high
+        buckets = target["displacement_buckets"]
+        for (label, _, _), count in zip(DISPLACEMENT_BUCKETS, row[10:]):
+            buckets[label] += count
+
+
+def _finish(rollup: Rollup) -> Rollup:
+    rated = rollup["damage_rated"]
+    rollup["damage_average"] = rollup["damage_total"] / rated if rated else None
+    rated = rollup["displacement_rated"]
+    rollup["displacement_average"] = rollup["displacement_total"] / rated if rated else None
+    return rollup
+
+
+def _merge(target: Rollup, other: Rollup) -> None:
+    for name in ADDITIVE_FIELDS:
+        target[name] += other[name]
+    for name, pick in (("displacement_min", min), ("displacement_max", max)):
+        if other[name] is not None:
+            target[name] = other[name] if target[name] is None else pick(target[name], other[name])
+    for label, count in other["displacement_buckets"].items():
+        target["displacement_buckets"][label] += count
+    if "categories" in other:
+        categories = target.setdefault("categories", {})
+        for label, count in other["categories"].items():
+            categories[label] = categories.get(label, 0) + count
+
+
+def merge_reports(reports: Iterable[Report]) -> Report:
+    """Combine reports computed over disjoint parts of the catalog (e.g. shards)."""
+
+    merged: Report = {"by_country": {}, "by_category": {}}
+    for report in reports:
+        for dimension, groups in report.items():
+            for key, rollup in groups.items():
+                _merge(merged[dimension].setdefault(key, _new_rollup()), rollup)
+    order = list(CATEGORY_TABLES)
+    for rollup in merged["by_country"].values():
+        rollup["categories"] = {
+            label: rollup["categories"][label] for label in order if label in rollup.get("categories", {})
+        }
+    return {
+        "by_country": {key: _finish(value) for key, value in sorted(merged["by_country"].items())},
+        "by_category": {
+            key: _finish(value)
+            for key, value in sorted(merged["by_category"].items(), key=lambda item: order.index(item[0]))
+        },
+    }
+
+
+def compute_rollups(conn: sqlite3.Connection) -> Report:
+    """Return ``{"by_country": {...}, "by_category": {...}}`` rollups for the whole catalog."""
+
+    by_country: Dict[str, Rollup] = {}
+    by_category: Dict[str, Rollup] = {}
+    # Older catalogs may lack some tables; any other failure is a real error.
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for label, table in CATEGORY_TABLES.items():
+        if table not in existing:
+            continue
+        query = QUERIES.compile(("rollup", table), lambda: build_rollup_query(table))
+        rows = conn.execute(query).fetchall()
+        category = by_category.setdefault(label, _new_rollup())
+        for row in rows:
+            country = by_country.get(row[0])
+            if country is None:
+                country = by_country[row[0]] = _new_rollup()
+                country["categories"] = {}
+            _fold(country, row)
+            country["categories"][label] = row[1]
+            _fold(category, row)
+    return {
+        "by_country": {key: _finish(value) for key, value in sorted(by_country.items())},
+        "by_category": {key: _finish(value) for key, value in by_category.items()},
+    }
+
+
+class RollupCache:
+    """Keeps the last :func:`compute_rollups` result until the database changes."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self.version: Optional[Tuple[int, int]] = None
+        self.report: Optional[Report] = None
+
+    def get(self) -> Report:
+        version = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        if self.report is None or version != self.version:
+            self.report = compute_rollups(self.conn)
+            self.version = version
+        return self.report
+
+
+def format_rollup(rollup: Rollup) -> List[str]:
+    """Human-readable lines for the details panel."""
+
+    lines = [f"  Entries: {rollup['rows']}"]
+    if rollup["damage_rated"]:
+        lines.append(
+            f"  DamagePoints: total {rollup['damage_total']}, average {rollup['damage_average']:.1f}"
+        )
+    if rollup["crew_total"]:
+        lines.append(f"  Crew: {rollup['crew_total']}")
+    if rollup["personnel_total"]:
+        lines.append(f"  Personnel: {rollup['personnel_total']}")
+    if rollup["displacement_rated"]:
+        lines.append(
+            f"  Displacement: {rollup['displacement_min']:.0f}–{rollup['displacement_max']:.0f} t, "
+            f"average {rollup['displacement_average']:.0f} t"
+        )
+        buckets = ", ".join(
+            f"{label} {count}" for label, count in rollup["displacement_buckets"].items() if count
+        )
+        lines.append(f"    Distribution: {buckets}")
+    return lines
+
+
+def _flat_rows(report: Report) -> List[Dict[str, object]]:
+    rows: List[Dict[str, object]] = []
+    for dimension, groups in report.items():
+        for key, rollup in groups.items():
+            row: Dict[str, object] = {"dimension": dimension, "key": key}
+            for name, value in rollup.items():
+                if isinstance(value, dict):
+                    prefix = name.split("_")[0]
+                    for label, count in value.items():
+                        row[f"{prefix}_{label}"] = count
+                else:
+                    row[name] = value
+            rows.append(row)
+    return rows
+
+
+def export_report(report: Report, path: str) -> None:
+    """Write ``report`` as JSON, or as a flat CSV when ``path`` ends in ``.csv``."""
+
+    if path.lower().endswith(".csv"):
+        rows = _flat_rows(report)
+        fieldnames = list(dict.fromkeys(name for row in rows for name in row))
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=fieldnames or ["dimension", "key"], restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export order-of-battle rollups.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--output", default="", help="write JSON (or CSV for .csv paths) instead of printing")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = sqlite3.connect(args.db)
+    try:
+        report = compute_rollups(conn)
+    finally:
+        conn.close()
+    if args.output:
+        export_report(report, args.output)
+        print(f"Report written to {args.output}")
+        return
+    for dimension, groups in report.items():
+        print(dimension.replace("_", " ").title())
+        for key, rollup in groups.items():
+            print(key)
+            for line in format_rollup(rollup):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+"""Example catalog entries used to seed a new database.
+
+Kept out of :mod:`initialize_esm_db` so opening an existing catalog never
+builds this literal; :func:`initialize_esm_db.populate_sample_data` imports it
+only when a table is empty.
+"""
+
+from typing import Dict, Sequence
+
+SAMPLE_DATA: Dict[str, Dict[str, Sequence[Sequence[object]]]] = {
+    "Platform": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Domain",
+            "Agility",
+            "DamagePoints",
+            "OODA",
+            "Notes",
+        ],
+        "rows": [
+            (
+                "E-3 Sentry",
+                "United States",
+                "Airborne Early Warning",
+                "Large",
+                "AWACS",
+                "Air",
+                "Moderate",
+                55,
+                "Deliberate",
+                "Airborne radar and battle management platform.",
+            ),
+            (
+                "Bayraktar TB2",
+                "Turkey",
+                "Unmanned Aerial Vehicle",
+                "Medium",
+                "MALE UAV",
+                "Air",
+                "Low",
+                25,
+                "Tactical",
+                "Medium-altitude long-endurance reconnaissance and strike drone.",
+            ),
+        ],
+    },
+    "Aircraft": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Agility",
+            "Length",
+            "Span",
+            "Height",
+            "Crew",
+            "Armor",
+            "MaxWeight",
+            "MaxPayload",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "F-16 Fighting Falcon",
+                "United States",
+                "Fighter",
+                "Medium",
+                "Multirole Fighter",
+                "High",
+                15.0,
+                9.96,
+                4.8,
+                1,
+                "Composite",
+                19.2,
+                7.7,
+                45,
+                "Rapid",
+            ),
+            (
+                "Su-35 Flanker-E",
+                "Russia",
+                "Fighter",
+                "Large",
+                "Air Superiority Fighter",
+                "Very High",
+                21.9,
+                15.3,
+                5.9,
+                1,
+                "Titanium Alloy",
+                34.5,
+                8.0,
+                52,
+                "Aggressive",
+            ),
+            (
+                "JAS 39 Gripen",
+                "Sweden",
+                "Fighter",
+                "Compact",
+                "Lightweight Multirole",
+                "High",
+                14.1,
+                8.4,
+                4.5,
+                1,
+                "Composite",
+                14.0,
+                5.3,
+                38,
+                "Responsive",
+            ),
+        ],
+    },
+    "Facility": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Personnel",
+            "Armor",
+            "MaxCapacity",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "Ramstein Air Base",
+                "Germany",
+                "Air Base",
+                "Large",
+                "Air Force Installation",
+                8600,
+                "Hardened Shelters",
+                120,
+                80,
+                "Strategic",
+            ),
+            (
+                "Diego Garcia Support Facility",
+                "United Kingdom",
+                "Naval Support",
+                "Medium",
+                "Logistics Hub",
+                2000,
+                "Reinforced",
+                40,
+                60,
+                "Strategic",
+            ),
+        ],
+    },
+    "GroundUnit": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Mobility",
+            "Length",
+            "Width",
+            "Height",
+            "Crew",
+            "Armor",
+            "MaxSpeed",
+            "Range",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "M1A2 Abrams",
+                "United States",
+                "Main Battle Tank",
+                "Large",
+                "Armored",
+                "Tracked",
+                9.77,
+                3.66,
+                2.44,
+                4,
+                "Chobham",
+                67.0,
+                426,
+                70,
+                "Decisive",
+            ),
+            (
+                "Leopard 2A7",
+                "Germany",
+                "Main Battle Tank",
+                "Large",
+                "Armored",
+                "Tracked",
+                10.97,
+                3.75,
+                3.0,
+                4,
+                "Composite",
+                68.0,
+                450,
+                68,
+                "Decisive",
+            ),
+        ],
+    },
+    "Submarine": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Displacement",
+            "Length",
+            "Beam",
+            "Draft",
+            "Crew",
+            "Armor",
+            "MaxDepth",
+            "MaxSpeed",
+            "Range",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "Virginia-class Block V",
+                "United States",
+                "Attack Submarine",
+                "Large",
+                "Nuclear",
+                10200,
+                115.0,
+                10.4,
+                9.8,
+                132,
+                "HY-100 Steel",
+                488.0,
+                25.0,
+                12000,
+                85,
+                "Stealth",
+            ),
+            (
+                "Yasen-class",
+                "Russia",
+                "Attack Submarine",
+                "Large",
+                "Nuclear",
+                13800,
+                139.0,
+                13.0,
+                10.0,
+                90,
+                "Steel-Titanium",
+                520.0,
+                31.0,
+                15000,
+                88,
+                "Stealth",
+            ),
+        ],
+    },
+    "Ship": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Displacement",
+            "Length",
+            "Beam",
+            "Draft",
+            "Crew",
+            "Armor",
+            "MaxSpeed",
+            "Range",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "Arleigh Burke-class Destroyer",
+                "United States",
+                "Destroyer",
+                "Large",
+                "Guided Missile Destroyer",
+                9200,
+                155.0,
+                20.0,
+                9.3,
+                320,
+                "Kevlar Protection",
+                31.0,
+                8330,
+                78,
+                "Coordinated",
+            ),
+            (
+                "Type 052D Luyang III",
+                "China",
+                "Destroyer",
+                "Large",
+                "Guided Missile Destroyer",
+                7500,
+                157.0,
+                17.0,
+                10.0,
+                280,
+                "Steel",
+                30.0,
+                4500,
+                72,
+                "Coordinated",
+            ),
+            (
+                "Queen Elizabeth-class Carrier",
+                "United Kingdom",
+                "Aircraft Carrier",
+                "Very Large",
+                "Fleet Carrier",
+                65000,
+                284.0,
+                73.0,
+                11.0,
+                700,
+                "Armored Deck",
+                25.0,
+                10000,
+                95,
+                "Coordinated",
+            ),
+        ],
+    },
+    "Satellite": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "OrbitType",
+            "Altitude",
+            "Mass",
+            "Power",
+            "Mission",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "USA-245",
+                "United States",
+                "Reconnaissance",
+                "Medium",
+                "Optical Imaging",
+                "Low Earth Orbit",
+                280.0,
+                19600.0,
+                13.0,
+                "Imagery Intelligence",
+                50,
+                "Surveillance",
+            ),
+            (
+                "Kosmos-2558",
+                "Russia",
+                "Inspection",
+                "Compact",
+                "Spacecraft",
+                "Low Earth Orbit",
+                435.0,
+                500.0,
+                3.0,
+                "Orbital Inspection",
+                35,
+                "Surveillance",
+            ),
+        ],
+    },
+    "Weapon": {
+        "columns": [
+            "Name",
+            "Country",
+            "Category",
+            "PhysicalSize",
+            "Type",
+            "Range",
+            "Guidance",
+            "Speed",
+            "Warhead",
+            "LaunchPlatform",
+            "DamagePoints",
+            "OODA",
+        ],
+        "rows": [
+            (
+                "AIM-120 AMRAAM",
+                "United States",
+                "Air-to-Air Missile",
+                "Compact",
+                "Beyond-Visual-Range",
+                180.0,
+                "Active Radar",
+                4.0,
+                "High-Explosive",
+                "Fighter Aircraft",
+                40,
+                "Reactive",
+            ),
+            (
+                "R-77",
+                "Russia",
+                "Air-to-Air Missile",
+                "Compact",
+                "Beyond-Visual-Range",
+                110.0,
+                "Active Radar",
+                3.5,
+                "Fragmentation",
+                "Fighter Aircraft",
+                38,
+                "Reactive",
+            ),
+            (
+                "AM39 Exocet",
+                "France",
+                "Anti-Ship Missile",
+                "Compact",
+                "Sea Skimming",
+                70.0,
+                "Inertial/Active Radar",
+                0.9,
+                "210 kg High-Explosive",
+                "Ship, Aircraft",
+                55,
+                "Reactive",
+            ),
+        ],
+    },
+}
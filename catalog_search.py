@@ -0,0 +1,403 @@
+"""Headless catalog search shared by the browser and command-line tools.
+
+The type, keyword, country and numeric-range filters from the browser's filter
+panel are captured in :class:`SearchFilters` and compiled per table into a
+single parameterised query.
+"""
+
+import json
+import sqlite3
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from catalog_bitmaps import BitmapIndex, RoaringBitmap
+from catalog_facets import FacetCounter
+from catalog_filters import RangeFilter, applies_to, compile_range_clause, range_params, range_shape
+from catalog_history import AsOf, as_of_time, snapshot_source
+from catalog_queries import QUERIES, QueryRegistry
+from initialize_esm_db import TABLE_SCHEMAS, TABLES
+
+ALL_TABLES_ORDER = [
+    "Weapon",
+    "Ship",
+    "Submarine",
+    "Aircraft",
+    "Platform",
+    "GroundUnit",
+    "Facility",
+    "Satellite",
+]
+
+TABLE_DISPLAY_NAMES = {
+    "Weapon": "Weapon",
+    "Ship": "Ship",
+    "Submarine": "Submarine",
+    "Aircraft": "Aircraft",
+    "Platform": "Platform",
+    "GroundUnit": "Unit",
+    "Facility": "Facility",
+    "Satellite": "Satellite",
+}
+
+TYPE_CONFIG = OrderedDict(
+    [
+        ("All Types", {"tables": ALL_TABLES_ORDER}),
+        ("Weapons", {"tables": ["Weapon"]}),
+        ("Ships", {"tables": ["Ship"]}),
+        ("Aircraft", {"tables": ["Aircraft"]}),
+        (
+            "Drones",
+            {
+                "tables": ["Platform"],
+                "keywords": ["unmanned", "drone", "uav"],
+            },
+        ),
+        ("Units", {"tables": ["GroundUnit"]}),
+        ("Facilities", {"tables": ["Facility"]}),
+        ("Submarines", {"tables": ["Submarine"]}),
+        ("Satellites", {"tables": ["Satellite"]}),
+        ("Platforms", {"tables": ["Platform"]}),
+    ]
+)
+
+CATEGORY_TABLES = OrderedDict(
+    [
+        ("Platforms", "Platform"),
+        ("Aircraft", "Aircraft"),
+        ("Ships", "Ship"),
+        ("Submarines", "Submarine"),
+        ("Ground Units", "GroundUnit"),
+        ("Facilities", "Facility"),
+        ("Satellites", "Satellite"),
+        ("Weapons", "Weapon"),
+    ]
+)
+
+SPECIAL_COUNTRIES = ["Generic", "Terrorist", "Civilian"]
+
+ALL_COUNTRIES = "All Countries"
+
+SEARCH_COLUMNS = ("id", "Name", "Country", "PhysicalSize")
+
+CANDIDATE_LIMIT = 100_000
+
+Match = Tuple[str, int, str, str]
+
+_country_of = itemgetter(2)
+_size_of = itemgetter(3)
+
+
+class SearchFilters(NamedTuple):
+    """Everything the filter panel can restrict a search by."""
+
+    type_name: str = "All Types"
+    class_filter: str = ""
+    country: str = ALL_COUNTRIES
+    ranges: Tuple[RangeFilter, ...] = ()
+    attributes: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    @property
+    def config(self) -> Dict[str, object]:
+        return TYPE_CONFIG.get(self.type_name, TYPE_CONFIG["All Types"])
+
+    @property
+    def tables(self) -> List[str]:
+        return [
+            table
+            for table in self.config.get("tables", [])
+            if table in TABLES and applies_to(table, self.ranges) and self.has_attributes(table)
+        ]
+
+    def has_attributes(self, table: str) -> bool:
+        available = {name for name, _ in TABLE_SCHEMAS[table]}
+        return all(column in available for column, _ in self.attributes)
+
+    def attribute_include(self) -> Dict[str, Tuple[str, ...]]:
+        """Country and attribute filters as ``{column: values}`` for a bitmap lookup."""
+
+        include = dict(self.attributes)
+        if self.country and self.country != ALL_COUNTRIES:
+            include["Country"] = (self.country,)
+        return include
+
+    @property
+    def keywords(self) -> List[str]:
+        return [keyword.lower() for keyword in self.config.get("keywords", [])]
+
+
+def display_type(table: str, filters: SearchFilters) -> str:
+    if filters.type_name == "Drones":
+        return "Drone"
+    return TABLE_DISPLAY_NAMES.get(table, table)
+
+
+def _has_country(filters: SearchFilters) -> bool:
+    return bool(filters.country) and filters.country != ALL_COUNTRIES
+
+
+def search_shape(
+    table: str, filters: SearchFilters, candidates: Optional[RoaringBitmap] = None
+) -> Tuple[object, ...]:
+    """Everything about ``filters`` that changes the compiled SQL, but none of its values."""
+
+    return (
+        table,
+        candidates is not None,
+        candidates is None and _has_country(filters),
+        () if candidates is not None else tuple((column, len(values)) for column, values in filters.attributes),
+        bool(filters.class_filter.strip()),
+        len(filters.keywords),
+        range_shape(filters.ranges),
+    )
+
+
+def build_search_params(
+    table: str, filters: SearchFilters, candidates: Optional[RoaringBitmap] = None
+) -> List[object]:
+    """Parameters for the terms of :func:`build_search_conditions`, in the same order."""
+
+    params: List[object] = []
+    if candidates is not None:
+        params.append(json.dumps(candidates.to_list()))
+    else:
+        if _has_country(filters):
+            params.append(filters.country)
+        for _, values in filters.attributes:
+            params.extend(values)
+
+    class_filter = filters.class_filter.strip().lower()
+    if class_filter:
+        like_value = f"%{class_filter}%"
+        params.extend([like_value, like_value, like_value])
+
+    for keyword in filters.keywords:
+        pattern = f"%{keyword}%"
+        params.extend([pattern, pattern])
+
+    params.extend(range_params(filters.ranges))
+    return params
+
+
+def build_search_conditions(
+    table: str, filters: SearchFilters, candidates: Optional[RoaringBitmap] = None
+) -> Tuple[List[str], List[object]]:
+    """WHERE terms for ``filters``.
+
+    ``candidates`` replaces the country and attribute terms with an id list
+    already resolved from a :class:`BitmapIndex`.
+    """
+
+    conditions: List[str] = []
+
+    if candidates is not None:
+        conditions.append("id IN (SELECT value FROM json_each(?))")
+    else:
+        if _has_country(filters):
+            conditions.append("Country = ?")
+        for column, values in filters.attributes:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+
+    if filters.class_filter.strip():
+        conditions.append(
+            "(LOWER(IFNULL(Name, '')) LIKE ? OR "
+            "LOWER(IFNULL(Category, '')) LIKE ? OR "
+            "LOWER(IFNULL(Type, '')) LIKE ?)"
+        )
+
+    keywords = filters.keywords
+    if keywords:
+        keyword_clause = "(LOWER(IFNULL(Category, '')) LIKE ? OR LOWER(IFNULL(Type, '')) LIKE ?)"
+        conditions.append("(" + " OR ".join(keyword_clause for _ in keywords) + ")")
+
+    range_clause, _ = compile_range_clause(table, filters.ranges)
+    if range_clause:
+        conditions.append(range_clause)
+
+    return conditions, build_search_params(table, filters, candidates)
+
+
+def build_search_query(
+    table: str,
+    filters: SearchFilters,
+    columns: Sequence[str] = SEARCH_COLUMNS,
+    candidates: Optional[RoaringBitmap] = None,
+    registry: Optional[QueryRegistry] = QUERIES,
+    as_of: Optional[str] = None,
+) -> Tuple[str, List[object]]:
+    """Compile ``filters`` into one name-ordered query over ``table``.
+
+    The SQL comes from ``registry`` whenever a query of the same shape has
+    been compiled before; pass ``None`` to build it from scratch.  With
+    ``as_of`` (an :func:`catalog_history.as_of_time` string) the query reads
+    the table's rows as they stood then, from its history.
+    """
+
+    def build() -> str:
+        conditions, _ = build_search_conditions(table, filters, candidates)
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        if as_of is not None:
+            query = f"WITH {table} AS ({snapshot_source(table)}) {query}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query + " ORDER BY LOWER(IFNULL(Name, ''))"
+
+    params = build_search_params(table, filters, candidates)
+    if registry is None:
+        query = build()
+    else:
+        shape = search_shape(table, filters, candidates)
+        query = registry.compile(("search", tuple(columns), shape, as_of is not None), build)
+    return query, params if as_of is None else [as_of, *params]
+
+
+def resolve_candidates(
+    table: str, filters: SearchFilters, bitmaps: Optional[BitmapIndex]
+) -> Optional[RoaringBitmap]:
+    """Resolve country/attribute filters to row ids with ``bitmaps``, or ``None`` to use SQL.
+
+    A lone country filter is left to the Country index, and very wide
+    candidate sets fall back to SQL terms rather than a huge id list.
+    """
+
+    if bitmaps is None or not filters.attributes:
+        return None
+    candidates = bitmaps.select(table, filters.attribute_include())
+    if candidates is not None and len(candidates) > CANDIDATE_LIMIT:
+        return None
+    return candidates
+
+
+def search_catalog(
+    conn: sqlite3.Connection,
+    filters: SearchFilters,
+    facets: Optional[FacetCounter] = None,
+    bitmaps: Optional[BitmapIndex] = None,
+    registry: Optional[QueryRegistry] = QUERIES,
+    table_facets: Optional[Dict[str, FacetCounter]] = None,
+    as_of: Optional[AsOf] = None,
+) -> List[Match]:
+    """Return ``(table, id, name, country)`` matches sorted by name.
+
+    When ``facets`` is given, it is filled from the same rows, so facet
+    counts cost no extra queries; ``table_facets`` additionally keeps each
+    table's share, so one table can later be recounted alone.  With
+    ``bitmaps``, country and attribute filters are answered by bitset
+    operations and tables with no candidates are skipped without touching
+    SQLite.  ``as_of`` (a date or time, see :func:`catalog_history.as_of_time`)
+    searches the catalog as it stood then; the bitmaps describe the current
+    rows, so they are not used.
+    """
+
+    if as_of is not None:
+        as_of, bitmaps = as_of_time(conn, as_of), None
+    matches: List[Match] = []
+    for table in filters.tables:
+        candidates = resolve_candidates(table, filters, bitmaps)
+        if candidates is not None and not candidates:
+            continue
+        rows = search_table(conn, table, filters, candidates, registry, as_of)
+        matches.extend(table_matches(table, rows))
+        if (facets is not None or table_facets is not None) and rows:
+            counter = count_rows(table, filters, rows, FacetCounter() if table_facets is not None else facets)
+            if table_facets is not None:
+                table_facets[table] = counter
+                if facets is not None:
+                    facets.merge(counter)
+
+    matches.sort(key=match_sort_key)
+    return matches
+
+
+def match_sort_key(match: Match) -> str:
+    return match[2].lower()
+
+
+def search_table(
+    conn: sqlite3.Connection,
+    table: str,
+    filters: SearchFilters,
+    candidates: Optional[RoaringBitmap] = None,
+    registry: Optional[QueryRegistry] = QUERIES,
+    as_of: Optional[str] = None,
+) -> List[Tuple[int, str, str, str]]:
+    """``(id, Name, Country, PhysicalSize)`` rows of one table matching ``filters`` (as of ``as_of``)."""
+
+    query, params = build_search_query(table, filters, candidates=candidates, registry=registry, as_of=as_of)
+    return conn.execute(query, params).fetchall()
+
+
+def table_matches(table: str, rows: Iterable[Sequence[object]]) -> List[Match]:
+    return [(table, record_id, name or "(Unnamed)", country or "Unknown") for record_id, name, country, _ in rows]
+
+
+def count_rows(
+    table: str, filters: SearchFilters, rows: Sequence[Sequence[object]], counter: Optional[FacetCounter] = None
+) -> FacetCounter:
+    """Add ``rows`` from :func:`search_table` to ``counter`` (a new one by default)."""
+
+    counter = FacetCounter() if counter is None else counter
+    # Counter over itemgetter runs in C; FacetCounter only sees distinct values.
+    counter.add_group(display_type(table, filters), Counter(map(_country_of, rows)), Counter(map(_size_of, rows)))
+    return counter
+
+
+def search_rows(
+    conn: sqlite3.Connection,
+    filters: SearchFilters,
+    rows: Mapping[str, Iterable[int]],
+    registry: Optional[QueryRegistry] = QUERIES,
+) -> List[Match]:
+    """Like :func:`search_catalog`, but only over the given ``table -> ids`` rows.
+
+    Used to re-check rows another process changed without re-running the
+    whole search.
+    """
+
+    cursor = conn.cursor()
+    matches: List[Match] = []
+    for table in filters.tables:
+        ids = sorted(rows.get(table, ()))
+        if not ids:
+            continue
+
+        def build() -> str:
+            conditions, _ = build_search_conditions(table, filters)
+            conditions.append("id IN (SELECT value FROM json_each(?))")
+            return f"SELECT id, Name, Country FROM {table} WHERE " + " AND ".join(conditions)
+
+        query = build() if registry is None else registry.compile(("rows", search_shape(table, filters)), build)
+        cursor.execute(query, [*build_search_params(table, filters), json.dumps(ids)])
+        for record_id, name, country in cursor.fetchall():
+            matches.append((table, record_id, name or "(Unnamed)", country or "Unknown"))
+
+    matches.sort(key=lambda item: item[2].lower())
+    return matches
+
+
+def count_facets(
+    conn: sqlite3.Connection, filters: SearchFilters, tables: Optional[Iterable[str]] = None
+) -> FacetCounter:
+    """Facet counts for ``filters`` from one grouped pass per table, without fetching rows.
+
+    ``tables`` limits the count to those of the filter's tables.
+    """
+
+    facets = FacetCounter()
+    wanted = set(filters.tables if tables is None else tables)
+    for table in filters.tables:
+        if table not in wanted:
+            continue
+
+        def build() -> str:
+            conditions, _ = build_search_conditions(table, filters)
+            query = f"SELECT Country, PhysicalSize, COUNT(*) FROM {table}"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            return query + " GROUP BY Country, PhysicalSize"
+
+        query = QUERIES.compile(("facets", search_shape(table, filters)), build)
+        label = display_type(table, filters)
+        for country, size, count in conn.execute(query, build_search_params(table, filters)):
+            facets.add(country, label, size, count)
+    return facets
@@ -0,0 +1,536 @@
+"""Horizontal sharding of the catalog across several SQLite files.
+
+A :class:`ShardMap` (a small JSON file) names the shard databases and routes
+rows to them by table, by country, or by both.  The most specific matching
+route wins (the first listed on a tie), and unmatched rows go to the default
+shard.  Example::
+
+    {
+      "shards": {"naval": "naval.db", "air": "air.db", "rest": "rest.db"},
+      "routes": [
+        {"table": "Ship", "shard": "naval"},
+        {"table": "Submarine", "shard": "naval"},
+        {"table": "Aircraft", "shard": "air"}
+      ],
+      "default": "rest"
+    }
+
+:class:`ShardedCatalog` is the scatter-gather executor.  It runs the list,
+search and summary queries on every shard that can hold matching rows, in
+parallel threads (``sqlite3`` releases the GIL while a statement runs), and
+merges the name-sorted results.  :class:`ShardRouter` sends writes to the
+shard their route names, moving rows whose new Country routes elsewhere.
+Row ids are global: the shard's position in the map sits in the high bits,
+as in :mod:`catalog_federation`, so a sharded catalog can also be browsed as
+a federation of its shard files.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from catalog_facets import FacetCounter
+from catalog_federation import decode_id, encode_id
+from catalog_queries import CATEGORY_NAMES, COUNTRY_COUNT, QUERIES, RECORD_BY_ID, connect
+from catalog_reports import Report, compute_rollups, merge_reports
+from catalog_search import ALL_COUNTRIES, CATEGORY_TABLES, Match, SearchFilters, search_catalog
+from catalog_snapshot import snapshot_indexes
+from initialize_esm_db import TABLE_SCHEMAS, VERSION_COLUMN, initialize_database
+
+SHARD_NAME = re.compile(r"^[A-Za-z_]\w*$")
+
+# Rows copied into this shard whose source row has not been deleted yet.
+MOVE_LOG = "ShardMoves"
+MOVE_LOG_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {MOVE_LOG} (
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    source_version INTEGER NOT NULL,
+    PRIMARY KEY (table_name, row_id)
+)
+"""
+
+Result = TypeVar("Result")
+
+
+class VersionConflict(Exception):
+    """Raised when a routed update finds its row changed or gone since the version it read."""
+
+
+def _columns(table: str, values: Iterable[str]) -> List[str]:
+    """The columns named by ``values`` other than ``id``, all checked against ``TABLE_SCHEMAS``."""
+
+    if table not in TABLE_SCHEMAS:
+        raise ValueError(f"Unknown table {table!r}")
+    known = {name for name, _ in TABLE_SCHEMAS[table]}
+    unknown = [column for column in values if column not in known]
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(map(repr, unknown))}")
+    return [column for column in values if column != "id"]
+
+
+class ShardRoute(NamedTuple):
+    shard: str
+    table: Optional[str] = None
+    country: Optional[str] = None
+
+    @property
+    def specificity(self) -> int:
+        return (self.table is not None) + (self.country is not None)
+
+
+class ShardMap:
+    """Shard names, their database paths and the routing rules between them."""
+
+    def __init__(
+        self,
+        shards: Mapping[str, str],
+        routes: Sequence[ShardRoute] = (),
+        default: Optional[str] = None,
+    ) -> None:
+        self.shards: "OrderedDict[str, str]" = OrderedDict(shards)
+        if not self.shards:
+            raise ValueError("A shard map needs at least one shard.")
+        for name in self.shards:
+            if not SHARD_NAME.match(name) or name.lower() in ("main", "temp"):
+                raise ValueError(f"Invalid shard name: {name!r}")
+        self.names: List[str] = list(self.shards)
+        self.default = default or self.names[0]
+        self.routes = list(routes)
+        for route in [*self.routes, ShardRoute(self.default)]:
+            if route.shard not in self.shards:
+                raise ValueError(f"Route refers to unknown shard {route.shard!r}")
+            if route.table is not None and route.table not in TABLE_SCHEMAS:
+                raise ValueError(f"Route refers to unknown table {route.table!r}")
+
+    @classmethod
+    def load(cls, path: str) -> "ShardMap":
+        with open(path, "r", encoding="utf-8") as handle:
+            document = json.load(handle)
+        base = os.path.dirname(os.path.abspath(path))
+        shards = OrderedDict(
+            (name, shard_path if os.path.isabs(shard_path) else os.path.join(base, shard_path))
+            for name, shard_path in document["shards"].items()
+        )
+        routes = [
+            ShardRoute(route["shard"], route.get("table"), route.get("country"))
+            for route in document.get("routes", [])
+        ]
+        return cls(shards, routes, document.get("default"))
+
+    def index(self, shard: str) -> int:
+        return self.names.index(shard)
+
+    def shard_for(self, table: str, country: Optional[str]) -> str:
+        """The shard a ``table`` row from ``country`` belongs to."""
+
+        best: Optional[ShardRoute] = None
+        for route in self.routes:
+            if route.table not in (None, table) or route.country not in (None, country):
+                continue
+            if best is None or route.specificity > best.specificity:
+                best = route
+        return best.shard if best is not None else self.default
+
+    def candidates(self, table: str, country: Optional[str] = None) -> List[str]:
+        """Shards that may hold ``table`` rows, narrowed to one when ``country`` is known."""
+
+        if country is not None:
+            return [self.shard_for(table, country)]
+        shards = {self.default}
+        shards.update(route.shard for route in self.routes if route.table in (None, table))
+        return [name for name in self.names if name in shards]
+
+
+class ShardedCatalog:
+    """Scatter-gather reads over every shard in a :class:`ShardMap`."""
+
+    def __init__(self, shard_map: ShardMap, workers: Optional[int] = None) -> None:
+        self.map = shard_map
+        self.conns: Dict[str, sqlite3.Connection] = {}
+        for name, path in shard_map.shards.items():
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Shard database not found: {path}")
+            # Each connection is only ever used under its shard's lock.
+            self.conns[name] = connect(path, check_same_thread=False)
+        self.locks = {name: threading.Lock() for name in shard_map.names}
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or len(shard_map.names), thread_name_prefix="shard"
+        )
+        self._rollups: Dict[str, Tuple[Tuple[int, int], Report]] = {}
+
+    def _run(self, shard: str, task: Callable[[str, sqlite3.Connection], Result]) -> Result:
+        with self.locks[shard]:
+            return task(shard, self.conns[shard])
+
+    def gather(self, shards: Iterable[str], task: Callable[[str, sqlite3.Connection], Result]) -> List[Result]:
+        """Run ``task(shard, conn)`` on ``shards`` in parallel; results keep ``shards`` order."""
+
+        shards = list(shards)
+        if len(shards) == 1:
+            return [self._run(shards[0], task)]
+        futures = [self.executor.submit(self._run, shard, task) for shard in shards]
+        return [future.result() for future in futures]
+
+    def global_id(self, shard: str, record_id: int) -> int:
+        return encode_id(self.map.index(shard), record_id)
+
+    def locate(self, global_id: int) -> Tuple[str, int]:
+        index, record_id = decode_id(global_id)
+        return self.map.names[index], record_id
+
+    def _country(self, country: str) -> Optional[str]:
+        return None if not country or country == ALL_COUNTRIES else country
+
+    def shards_for(self, tables: Iterable[str], country: Optional[str] = None) -> List[str]:
+        wanted = {shard for table in tables for shard in self.map.candidates(table, country)}
+        return [name for name in self.map.names if name in wanted]
+
+    def search(
+        self,
+        filters: SearchFilters,
+        facets: Optional[FacetCounter] = None,
+        table_facets: Optional[Dict[str, FacetCounter]] = None,
+    ) -> List[Match]:
+        """:func:`search_catalog` across the shards, merged by name, with global ids."""
+
+        shards = self.shards_for(filters.tables, self._country(filters.country))
+        counting = facets is not None or table_facets is not None
+
+        def task(shard: str, conn: sqlite3.Connection) -> Tuple[List[Match], Dict[str, FacetCounter]]:
+            counters: Dict[str, FacetCounter] = {}
+            base = self.global_id(shard, 0)
+            matches = [
+                (table, base + record_id, name, country)
+                for table, record_id, name, country in search_catalog(
+                    conn, filters, table_facets=counters if counting else None
+                )
+            ]
+            return matches, counters
+
+        results = self.gather(shards, task)
+        for _, counters in results:
+            for table, counter in counters.items():
+                if facets is not None:
+                    facets.merge(counter)
+                if table_facets is not None:
+                    table_facets.setdefault(table, FacetCounter()).merge(counter)
+        return list(heapq.merge(*(matches for matches, _ in results), key=lambda match: match[2].lower()))
+
+    def fetch(self, table: str, global_id: int) -> Optional[Tuple[object, ...]]:
+        shard, record_id = self.locate(global_id)
+        return self._run(
+            shard, lambda _, conn: conn.execute(QUERIES.table_query(RECORD_BY_ID, table), (record_id,)).fetchone()
+        )
+
+    def category_names(self, table: str, country: str) -> List[str]:
+        """Names of ``table`` entries from ``country``, sorted, as in the category summary."""
+
+        def task(_: str, conn: sqlite3.Connection) -> List[str]:
+            rows = conn.execute(QUERIES.table_query(CATEGORY_NAMES, table), (country,))
+            return [name or "(Unnamed)" for name, in rows]
+
+        return list(heapq.merge(*self.gather(self.map.candidates(table, country), task)))
+
+    def country_counts(self, country: str) -> "OrderedDict[str, int]":
+        """Entries per category label for ``country``."""
+
+        def task(shard: str, conn: sqlite3.Connection) -> Dict[str, int]:
+            counts: Dict[str, int] = {}
+            for label, table in CATEGORY_TABLES.items():
+                if shard in self.map.candidates(table, country):
+                    query = QUERIES.table_query(COUNTRY_COUNT, table)
+                    counts[label] = conn.execute(query, (country,)).fetchone()[0]
+            return counts
+
+        totals: "OrderedDict[str, int]" = OrderedDict((label, 0) for label in CATEGORY_TABLES)
+        for counts in self.gather(self.shards_for(TABLE_SCHEMAS, country), task):
+            for label, count in counts.items():
+                totals[label] += count
+        return totals
+
+    def rollups(self) -> Report:
+        """Order-of-battle rollups for the whole sharded catalog, recomputed per changed shard."""
+
+        def task(shard: str, conn: sqlite3.Connection) -> Report:
+            version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+            cached = self._rollups.get(shard)
+            if cached is None or cached[0] != version:
+                cached = self._rollups[shard] = (version, compute_rollups(conn))
+            return cached[1]
+
+        return merge_reports(self.gather(self.map.names, task))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        for conn in self.conns.values():
+            conn.close()
+
+
+class ShardedRollups:
+    """Drop-in for :class:`catalog_reports.RollupCache` backed by a :class:`ShardedCatalog`."""
+
+    def __init__(self, catalog: ShardedCatalog) -> None:
+        self.catalog = catalog
+
+    def get(self) -> Report:
+        return self.catalog.rollups()
+
+
+class ShardRouter:
+    """Routes inserts, updates and deletes to the shard their table and country map to.
+
+    A row moving to another shard is written to its new shard, together with
+    an entry in that shard's move log, before the source row is deleted.
+    Creating a router settles any move cut short in between.
+    """
+
+    def __init__(self, catalog: ShardedCatalog) -> None:
+        self.catalog = catalog
+        self.recover_moves()
+
+    def _write(self, shard: str, statement: str, params: Sequence[object]) -> sqlite3.Cursor:
+        def task(_: str, conn: sqlite3.Connection) -> sqlite3.Cursor:
+            with conn:
+                return conn.execute(statement, params)
+
+        return self.catalog._run(shard, task)
+
+    def insert(self, table: str, values: Mapping[str, object]) -> int:
+        """Insert a row into its shard and return its global id."""
+
+        columns = _columns(table, values)
+        shard = self.catalog.map.shard_for(table, values.get("Country"))
+        statement = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        )
+        record_id = self._write(shard, statement, [values[column] for column in columns]).lastrowid
+        return self.catalog.global_id(shard, record_id)
+
+    def update(
+        self, table: str, global_id: int, values: Mapping[str, object], version: Optional[int] = None
+    ) -> int:
+        """Update a row and return its global id, which changes if a new Country re-routes it.
+
+        With ``version`` the update applies only while the row still has that
+        ``RowVersion``; otherwise it raises :class:`VersionConflict`.
+        """
+
+        columns = _columns(table, values)
+        if "id" in values:
+            raise ValueError("A row's id cannot be updated.")
+        shard, record_id = self.catalog.locate(global_id)
+        if "Country" in values and self.catalog.map.shard_for(table, values["Country"]) != shard:
+            return self._move(table, global_id, values, version)
+        assignments = "".join(f"{column} = ?, " for column in columns)
+        statement = f"UPDATE {table} SET {assignments}{VERSION_COLUMN} = {VERSION_COLUMN} + 1 WHERE id = ?"
+        params = [*(values[column] for column in columns), record_id]
+        if version is not None:
+            statement += f" AND {VERSION_COLUMN} = ?"
+            params.append(version)
+        if not self._write(shard, statement, params).rowcount:
+            if version is not None:
+                raise VersionConflict(f"{table} #{global_id} is no longer at version {version}.")
+            raise KeyError(global_id)
+        return global_id
+
+    def _move(self, table: str, global_id: int, values: Mapping[str, object], version: Optional[int]) -> int:
+        source, record_id = self.catalog.locate(global_id)
+        names = [name for name, _ in TABLE_SCHEMAS[table] if name != "id"]
+        read = QUERIES.compile(
+            ("shards", "move", table), lambda: f"SELECT {', '.join(names)}, {VERSION_COLUMN} FROM {table} WHERE id = ?"
+        )
+        row = self.catalog._run(source, lambda _, conn: conn.execute(read, (record_id,)).fetchone())
+        if row is None and version is None:
+            raise KeyError(global_id)
+        if row is None or (version is not None and row[-1] != version):
+            raise VersionConflict(f"{table} #{global_id} is no longer at version {version}.")
+        moved = dict(zip(names, row))
+        moved.update(values)
+        target = self.catalog.map.shard_for(table, moved["Country"])
+        columns = [*names, VERSION_COLUMN]
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+        def copy(_: str, conn: sqlite3.Connection) -> int:
+            conn.execute(MOVE_LOG_TABLE)
+            with conn:
+                new_id = conn.execute(insert, [*(moved[name] for name in names), row[-1] + 1]).lastrowid
+                conn.execute(
+                    f"INSERT INTO {MOVE_LOG} (table_name, row_id, source, source_id, source_version) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (table, new_id, source, record_id, row[-1]),
+                )
+            return new_id
+
+        new_id = self.catalog._run(target, copy)
+        if not self._finish_move(target, table, new_id, source, record_id, row[-1]):
+            raise VersionConflict(f"{table} #{global_id} changed while it was being moved.")
+        return self.catalog.global_id(target, new_id)
+
+    def _finish_move(
+        self, target: str, table: str, row_id: int, source: str, source_id: int, source_version: int
+    ) -> bool:
+        """Delete a moved row's unchanged source, then clear its log entry; ``False`` if the move was undone."""
+
+        def drop_source(_: str, conn: sqlite3.Connection) -> bool:
+            with conn:
+                deleted = conn.execute(
+                    f"DELETE FROM {table} WHERE id = ? AND {VERSION_COLUMN} = ?", (source_id, source_version)
+                ).rowcount
+                # Already gone means an earlier attempt got this far; a newer version undoes the move.
+                if deleted:
+                    return True
+                return conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (source_id,)).fetchone() is None
+
+        moved = self.catalog._run(source, drop_source)
+
+        def settle(_: str, conn: sqlite3.Connection) -> None:
+            with conn:
+                if not moved:
+                    conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+                conn.execute(f"DELETE FROM {MOVE_LOG} WHERE table_name = ? AND row_id = ?", (table, row_id))
+
+        self.catalog._run(target, settle)
+        return moved
+
+    def recover_moves(self) -> int:
+        """Finish, or undo, every move left in a shard's move log; return how many were settled."""
+
+        def pending(_: str, conn: sqlite3.Connection) -> List[Tuple[str, int, str, int, int]]:
+            exists = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+            if conn.execute(exists, (MOVE_LOG,)).fetchone() is None:
+                return []
+            return conn.execute(
+                f"SELECT table_name, row_id, source, source_id, source_version FROM {MOVE_LOG}"
+            ).fetchall()
+
+        names = self.catalog.map.names
+        settled = 0
+        for target, moves in zip(names, self.catalog.gather(names, pending)):
+            for table, row_id, source, source_id, source_version in moves:
+                if table not in TABLE_SCHEMAS or source not in self.catalog.map.shards:
+                    continue
+                self._finish_move(target, table, row_id, source, source_id, source_version)
+                settled += 1
+        return settled
+
+    def delete(self, table: str, global_id: int) -> None:
+        _columns(table, ())
+        shard, record_id = self.catalog.locate(global_id)
+        self._write(shard, f"DELETE FROM {table} WHERE id = ?", (record_id,))
+
+
+def create_shards(shard_map: ShardMap) -> None:
+    """Create every shard database with the catalog schema and Country lookup indexes, unseeded.
+
+    The snapshot's ``LOWER(Name)`` index is left out: on keyword searches it
+    steers SQLite into index-order row lookups that are slower than a scan and
+    sort.
+    """
+
+    for path in shard_map.shards.values():
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        initialize_database(path, seed=False)
+        conn = sqlite3.connect(path)
+        try:
+            for name, table, expression in snapshot_indexes():
+                if name.endswith("_country_name"):
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({expression})")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def split_catalog(source: str, shard_map: ShardMap, batch_size: int = 10_000) -> Dict[str, int]:
+    """Copy every row of ``source`` into the shard its route names, keeping ids; return rows per shard."""
+
+    create_shards(shard_map)
+    conns = {name: sqlite3.connect(path) for name, path in shard_map.shards.items()}
+    copied = {name: 0 for name in shard_map.names}
+    source_conn = sqlite3.connect(source)
+    try:
+        for table, schema in TABLE_SCHEMAS.items():
+            columns = [name for name, _ in schema]
+            try:
+                cursor = source_conn.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            except sqlite3.OperationalError:
+                continue
+            country_at = columns.index("Country")
+            statement = (
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                batches: Dict[str, List[Tuple[object, ...]]] = {}
+                for row in rows:
+                    batches.setdefault(shard_map.shard_for(table, row[country_at]), []).append(row)
+                for shard, batch in batches.items():
+                    conns[shard].executemany(statement, batch)
+                    copied[shard] += len(batch)
+        for conn in conns.values():
+            conn.commit()
+            conn.execute("ANALYZE")
+    finally:
+        source_conn.close()
+        for conn in conns.values():
+            conn.close()
+    return copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage and query a sharded catalog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = commands.add_parser("split", help="copy a catalog into the shards of a map")
+    split_parser.add_argument("source")
+    split_parser.add_argument("map")
+
+    search_parser = commands.add_parser("search", help="search every shard in parallel")
+    search_parser.add_argument("map")
+    search_parser.add_argument("--type", default="All Types", dest="type_name")
+    search_parser.add_argument("--class", default="", dest="class_filter")
+    search_parser.add_argument("--country", default=ALL_COUNTRIES)
+
+    status_parser = commands.add_parser("status", help="rows per shard")
+    status_parser.add_argument("map")
+
+    args = parser.parse_args()
+    shard_map = ShardMap.load(args.map)
+    if args.command == "split":
+        if not os.path.exists(args.source):
+            raise SystemExit(f"Catalog database not found: {args.source}")
+        for shard, count in split_catalog(args.source, shard_map).items():
+            print(f"{shard}: {count} rows")
+        return
+
+    catalog = ShardedCatalog(shard_map)
+    try:
+        if args.command == "search":
+            filters = SearchFilters(args.type_name, args.class_filter, args.country)
+            for table, global_id, name, country in catalog.search(filters):
+                shard, record_id = catalog.locate(global_id)
+                print(f"{shard}\t{table}\t{record_id}\t{name}\t{country}")
+        else:
+            def count_rows(_: str, conn: sqlite3.Connection) -> int:
+                return sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLE_SCHEMAS)
+
+            for shard, count in zip(shard_map.names, catalog.gather(shard_map.names, count_rows)):
+                print(f"{shard}: {count} rows ({shard_map.shards[shard]})")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
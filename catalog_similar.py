@@ -0,0 +1,211 @@
+"""Nearest-neighbour lookup over each table's numeric specs.
+
+Every record's numeric columns (:data:`NUMERIC_COLUMNS`) are z-score
+normalised into a feature vector, with missing values imputed to the column
+mean, and indexed in a per-table :class:`KDTree`.  At most nine dimensions per
+table keeps the tree effective: a top-k query visits a handful of leaves
+rather than every row.  :class:`SimilarityIndex` builds tables lazily, or
+takes tables built elsewhere (the browser builds them on a worker thread),
+and drops only the tables its owner reports as changed.
+"""
+
+import argparse
+import heapq
+import math
+import os
+import sqlite3
+from array import array
+from math import dist
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from initialize_esm_db import DB_FILE, NUMERIC_COLUMNS
+
+LEAF_SIZE = 16
+DEFAULT_NEIGHBOURS = 5
+
+Vector = Tuple[float, ...]
+Neighbour = Tuple[int, str, str, float]
+
+
+class KDTree:
+    """Static k-d tree over ``points``; leaves hold up to :data:`LEAF_SIZE` indexes."""
+
+    def __init__(self, points: Sequence[Vector]) -> None:
+        self.points = points
+        # Per-dimension columns let spreads and sort keys run through C builtins.
+        self.axes = list(zip(*points))
+        self.order = array("q")
+        self.dims = array("b")
+        self.splits = array("d")
+        self.low = array("q")
+        self.high = array("q")
+        self.root = self._build(list(range(len(points)))) if points else -1
+
+    def _node(self, dim: int, split: float, low: int, high: int) -> int:
+        self.dims.append(dim)
+        self.splits.append(split)
+        self.low.append(low)
+        self.high.append(high)
+        return len(self.dims) - 1
+
+    def _build(self, indexes: List[int]) -> int:
+        spreads = [0.0]
+        if len(indexes) > LEAF_SIZE:
+            pick = itemgetter(*indexes)
+            spreads = [max(values) - min(values) for values in map(pick, self.axes)]
+        dim = spreads.index(max(spreads))
+        if spreads[dim] == 0.0:
+            start = len(self.order)
+            self.order.extend(indexes)
+            return self._node(-1, 0.0, start, len(self.order))
+        axis = self.axes[dim]
+        indexes.sort(key=axis.__getitem__)
+        middle = len(indexes) // 2
+        node = self._node(dim, axis[indexes[middle]], 0, 0)
+        self.low[node] = self._build(indexes[:middle])
+        self.high[node] = self._build(indexes[middle:])
+        return node
+
+    def query(self, point: Vector, k: int, exclude: int = -1) -> List[Tuple[float, int]]:
+        """``(distance, index)`` of the ``k`` points closest to ``point``, nearest first."""
+
+        heap: List[Tuple[float, int]] = []
+        if self.root < 0 or k <= 0:
+            return []
+        points, order, dims, splits, low, high = (
+            self.points, self.order, self.dims, self.splits, self.low, self.high
+        )
+
+        def visit(node: int) -> None:
+            dim = dims[node]
+            if dim < 0:
+                for index in order[low[node]:high[node]]:
+                    if index == exclude:
+                        continue
+                    distance = dist(points[index], point)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, index))
+                    elif distance < -heap[0][0]:
+                        heapq.heapreplace(heap, (-distance, index))
+                return
+            diff = point[dim] - splits[node]
+            near, far = (low[node], high[node]) if diff < 0 else (high[node], low[node])
+            visit(near)
+            if len(heap) < k or abs(diff) < -heap[0][0]:
+                visit(far)
+
+        visit(self.root)
+        return sorted((-negative, index) for negative, index in heap)
+
+
+class TableVectors:
+    """Normalised feature vectors and their tree for one table."""
+
+    def __init__(self, conn: sqlite3.Connection, table: str) -> None:
+        self.table = table
+        self.columns = NUMERIC_COLUMNS.get(table, ())
+        rows = (
+            conn.execute(f"SELECT id, Name, Country, {', '.join(self.columns)} FROM {table}").fetchall()
+            if self.columns
+            else []
+        )
+        self.ids = array("q", (row[0] for row in rows))
+        self.labels = [(row[1] or "(Unnamed)", row[2] or "Unknown") for row in rows]
+        self.positions = {record_id: position for position, record_id in enumerate(self.ids)}
+        self.means: List[float] = []
+        self.scales: List[float] = []
+        for offset in range(len(self.columns)):
+            values = [row[3 + offset] for row in rows if isinstance(row[3 + offset], (int, float))]
+            mean = sum(values) / len(values) if values else 0.0
+            variance = sum((value - mean) ** 2 for value in values) / len(values) if values else 0.0
+            self.means.append(mean)
+            self.scales.append(math.sqrt(variance) or 1.0)
+        self.points = [self.normalise(row[3:]) for row in rows]
+        self.tree = KDTree(self.points)
+
+    def normalise(self, values: Sequence[object]) -> Vector:
+        return tuple(
+            (value - mean) / scale if isinstance(value, (int, float)) else 0.0
+            for value, mean, scale in zip(values, self.means, self.scales)
+        )
+
+    def _neighbours(self, point: Vector, k: int, exclude: int) -> List[Neighbour]:
+        return [
+            (self.ids[index], *self.labels[index], distance)
+            for distance, index in self.tree.query(point, k, exclude)
+        ]
+
+    def similar_to(self, record_id: int, k: int = DEFAULT_NEIGHBOURS) -> List[Neighbour]:
+        position = self.positions.get(record_id)
+        if position is None:
+            return []
+        return self._neighbours(self.points[position], k, position)
+
+    def nearest(self, specs: Mapping[str, float], k: int = DEFAULT_NEIGHBOURS) -> List[Neighbour]:
+        return self._neighbours(self.normalise([specs.get(column) for column in self.columns]), k, -1)
+
+
+class SimilarityIndex:
+    """:class:`TableVectors` per table, kept until :meth:`invalidate` names their table."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self.tables: Dict[str, TableVectors] = {}
+
+    def cached(self, table: str) -> Optional[TableVectors]:
+        return self.tables.get(table)
+
+    def store(self, vectors: TableVectors) -> None:
+        self.tables[vectors.table] = vectors
+
+    def invalidate(self, tables: Optional[Iterable[str]] = None) -> None:
+        """Drop the vectors of ``tables`` (every table if ``None``) after their rows changed."""
+
+        if tables is None:
+            self.tables.clear()
+            return
+        for table in tables:
+            self.tables.pop(table, None)
+
+    def vectors(self, table: str) -> TableVectors:
+        vectors = self.tables.get(table)
+        if vectors is None:
+            vectors = self.tables[table] = TableVectors(self.conn, table)
+        return vectors
+
+    def similar_to(self, table: str, record_id: int, k: int = DEFAULT_NEIGHBOURS) -> List[Neighbour]:
+        return self.vectors(table).similar_to(record_id, k)
+
+
+def find_similar(
+    conn: sqlite3.Connection, table: str, record_id: int, k: int = DEFAULT_NEIGHBOURS
+) -> List[Neighbour]:
+    """``(id, name, country, distance)`` of the ``k`` records in ``table`` most like ``record_id``."""
+
+    return TableVectors(conn, table).similar_to(record_id, k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List the catalog entries most similar to one record.")
+    parser.add_argument("table", choices=sorted(NUMERIC_COLUMNS))
+    parser.add_argument("record_id", type=int)
+    parser.add_argument("-k", type=int, default=DEFAULT_NEIGHBOURS, help="number of neighbours")
+    parser.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = sqlite3.connect(args.db)
+    try:
+        neighbours = find_similar(conn, args.table, args.record_id, args.k)
+    finally:
+        conn.close()
+    if not neighbours:
+        print("No similar entries found.")
+    for record_id, name, country, distance in neighbours:
+        print(f"{record_id}\t{name}\t{country}\t{distance:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Read-only catalog snapshots for field consoles.
+
+A snapshot is a compacted, pre-indexed copy of the operator database.  Consoles
+open it with ``mode=ro&immutable=1`` so SQLite skips journal and lock handling
+entirely and serves pages straight from a memory map of the OS page cache.
+"""
+
+import argparse
+import os
+import sqlite3
+from typing import List, Tuple
+from urllib.parse import quote
+
+from catalog_queries import connect
+from initialize_esm_db import DB_FILE, RANGE_INDEXES, TABLE_SCHEMAS, TABLES
+
+SNAPSHOT_SUFFIX = ".snapshot.db"
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def snapshot_indexes() -> List[Tuple[str, str, str]]:
+    """``(name, table, expression)`` for the indexes behind country, name, tree and range queries."""
+
+    indexes: List[Tuple[str, str, str]] = []
+    for table in TABLE_SCHEMAS:
+        indexes.append((f"idx_{table}_country_name", table, "Country, Name"))
+        indexes.append((f"idx_{table}_name_lower", table, "LOWER(IFNULL(Name, ''))"))
+    indexes.extend(RANGE_INDEXES)
+    return indexes
+
+
+def snapshot_index_statements() -> List[str]:
+    return [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({expression})"
+        for name, table, expression in snapshot_indexes()
+    ]
+
+
+def default_snapshot_path(db_file: str = DB_FILE) -> str:
+    root, _ = os.path.splitext(db_file)
+    return root + SNAPSHOT_SUFFIX
+
+
+def connect_read_only(
+    db_file: str, mmap_size: int = DEFAULT_MMAP_SIZE, check_same_thread: bool = True
+) -> sqlite3.Connection:
+    """Open ``db_file`` as an immutable, memory-mapped read-only database."""
+
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(f"Catalog database not found: {db_file}")
+    uri = f"file:{quote(os.path.abspath(db_file))}?mode=ro&immutable=1"
+    conn = connect(uri, uri=True, check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def build_snapshot(source: str = DB_FILE, target: str = "") -> str:
+    """Copy ``source`` into a compacted, indexed snapshot file and return its path."""
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Catalog database not found: {source}")
+    target = target or default_snapshot_path(source)
+    if os.path.abspath(source) == os.path.abspath(target):
+        raise ValueError("Snapshot target must differ from the source database.")
+
+    temp_target = target + ".tmp"
+    if os.path.exists(temp_target):
+        os.remove(temp_target)
+
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(temp_target)
+    try:
+        src.backup(dst)
+        cur = dst.cursor()
+        for table in TABLES:
+            cur.execute(TABLES[table])
+        for statement in snapshot_index_statements():
+            cur.execute(statement)
+        cur.execute("ANALYZE")
+        dst.commit()
+        cur.execute("PRAGMA journal_mode = DELETE")
+        cur.execute("VACUUM")
+    finally:
+        dst.close()
+        src.close()
+
+    os.replace(temp_target, target)
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build read-only catalog snapshots.")
+    parser.add_argument("--source", default=DB_FILE, help="database to snapshot")
+    parser.add_argument("--output", default="", help="snapshot file to write")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        raise SystemExit(f"Catalog database not found: {args.source}")
+    path = build_snapshot(args.source, args.output)
+    print(f"Snapshot written to {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Import-time and first-paint benchmark for the catalog browser.
+
+Each run starts a fresh interpreter so already-imported modules cannot hide
+import costs.  *First paint* is the time from importing
+:mod:`military_catalog_app` to the first processed ``update()`` of its
+window; *ready* is when the staged startup has opened and listed the
+catalog.  Painting needs a display; without one only import time is
+reported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+from initialize_esm_db import DB_FILE
+
+FIRST_PAINT_TARGET_MS = 150.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import military_catalog_app as app_module
+result = {"import_ms": (time.perf_counter() - start) * 1000}
+try:
+    root = app_module.tk.Tk()
+except app_module.tk.TclError as error:
+    result["error"] = str(error)
+else:
+    app = app_module.MilitaryCatalogApp(root, db_file=sys.argv[1], read_only=sys.argv[2] == "1", watch=False)
+    root.update()
+    result["first_paint_ms"] = (time.perf_counter() - start) * 1000
+    while app.loading:
+        root.update()
+        time.sleep(0.001)
+    result["ready_ms"] = (time.perf_counter() - start) * 1000
+    app.on_close()
+print(json.dumps(result))
+"""
+
+
+def probe_startup(db_file: str, read_only: bool = False) -> Dict[str, object]:
+    """One cold start of the browser in a child interpreter."""
+
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, os.path.abspath(db_file), "1" if read_only else "0"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def benchmark_startup(db_file: str = DB_FILE, runs: int = 5, read_only: bool = False) -> Dict[str, object]:
+    """Median import, first-paint and ready times over ``runs`` cold starts."""
+
+    samples = [probe_startup(db_file, read_only) for _ in range(runs)]
+    summary: Dict[str, object] = {"runs": runs}
+    for key in ("import_ms", "first_paint_ms", "ready_ms"):
+        values: List[float] = [sample[key] for sample in samples if key in sample]
+        if values:
+            summary[key] = statistics.median(values)
+    error: Optional[object] = next((sample["error"] for sample in samples if "error" in sample), None)
+    if error is not None:
+        summary["error"] = error
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure browser import time and time to first paint.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--read-only", action="store_true", help="open the catalog read-only")
+    args = parser.parse_args()
+
+    result = benchmark_startup(args.db, args.runs, args.read_only)
+    print(f"Import:      {result['import_ms']:.1f} ms (median of {args.runs})")
+    if "first_paint_ms" in result:
+        verdict = "within" if result["first_paint_ms"] <= FIRST_PAINT_TARGET_MS else "over"
+        print(
+            f"First paint: {result['first_paint_ms']:.1f} ms "
+            f"({verdict} the {FIRST_PAINT_TARGET_MS:.0f} ms target)"
+        )
+        print(f"Ready:       {result['ready_ms']:.1f} ms")
+    else:
+        print(f"First paint: not measured ({result.get('error', 'no display')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Type-ahead completions for the class keyword and country filters.
+
+:class:`PrefixIndex` keeps a column family's distinct values sorted by their
+normalized (trimmed, lower-cased) form, each with the number of rows that
+hold it, so the values starting with a prefix are one contiguous run found
+by two bisections.  A run of at most :data:`SCAN_LIMIT` values is ranked on
+the spot.  Longer runs -- the first keystroke or two on a large catalog --
+keep their best completions per prefix, built bottom-up from the prefix's
+children and dropped whenever a count under that prefix changes; the next
+lookup rebuilds only the dropped prefixes from their still-cached siblings.
+
+:class:`CatalogSuggestions` indexes Name, Category and Type (the columns the
+class keyword matches) and Country across every ``TABLE_SCHEMAS`` table.  It
+also keeps each row's indexed values by id, so a changed row can take back
+its old values before adding its new ones.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import sqlite3
+import statistics
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from catalog_queries import QUERIES, connect
+from initialize_esm_db import DB_FILE, TABLE_SCHEMAS
+
+SUGGEST_LIMIT = 10
+SCAN_LIMIT = 2048
+# A change touching more rows than this is cheaper to fold in by rebuilding.
+UPDATE_LIMIT = 5000
+
+KEYWORD_COLUMNS = ("Name", "Category", "Type")
+COUNTRY_COLUMN = "Country"
+INDEXED_COLUMNS = (*KEYWORD_COLUMNS, COUNTRY_COLUMN)
+
+# ``(-count, normalized value, value)``: sorts best first, ties in value order.
+Ranked = Tuple[int, str, str]
+
+
+def normalize(value: object) -> str:
+    """The form values are matched and ordered by."""
+
+    return str(value).strip().lower()
+
+
+def _successor(prefix: str) -> str:
+    """The smallest string after every string that starts with ``prefix``."""
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PrefixIndex:
+    """Distinct values with row counts, ordered by :func:`normalize` for prefix lookups.
+
+    Values differing only in case or surrounding space share one entry, shown
+    with the spelling most rows use.
+    """
+
+    def __init__(self, counts: Optional[Mapping[object, int]] = None) -> None:
+        items = [item for item in (counts or {}).items() if item[0] is not None and item[1] > 0]
+        # normalize() spelled as C-level maps; this runs once per distinct value.
+        shown = list(map(str.strip, map(str, [value for value, _ in items])))
+        keys = list(map(str.lower, shown))
+        self.values: List[str] = []
+        self.counts = array("q")
+        last = ""
+        best = 0
+        for index in sorted(range(len(keys)), key=keys.__getitem__):
+            key, count = keys[index], items[index][1]
+            if not key:
+                continue
+            if key != last:
+                self.values.append(shown[index])
+                self.counts.append(count)
+                last, best = key, count
+                continue
+            self.counts[-1] += count
+            if count > best:
+                self.values[-1], best = shown[index], count
+        self._top: Dict[str, List[Ranked]] = {}
+        if len(self.values) > SCAN_LIMIT:
+            self._collect("", 0, len(self.values))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def count(self, value: object) -> int:
+        index = self._find(normalize(value))
+        return 0 if index is None else self.counts[index]
+
+    def complete(self, text: str) -> List[str]:
+        """Up to :data:`SUGGEST_LIMIT` values starting with ``text`` (ignoring case), most rows first."""
+
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        lo = bisect_left(self.values, prefix, key=normalize)
+        hi = bisect_left(self.values, _successor(prefix), lo, key=normalize)
+        return [value for _, _, value in self._collect(prefix, lo, hi)]
+
+    def add(self, value: object, delta: int = 1) -> None:
+        """Change ``value``'s row count by ``delta``; a value left with no rows is dropped."""
+
+        if value is None or not delta:
+            return
+        key = normalize(value)
+        if not key:
+            return
+        index = bisect_left(self.values, key, key=normalize)
+        if index < len(self.values) and normalize(self.values[index]) == key:
+            count = self.counts[index] + delta
+            if count > 0:
+                self.counts[index] = count
+            else:
+                del self.values[index]
+                del self.counts[index]
+        elif delta > 0:
+            self.values.insert(index, str(value).strip())
+            self.counts.insert(index, delta)
+        else:
+            return
+        for end in range(len(key) + 1):
+            self._top.pop(key[:end], None)
+
+    def _find(self, key: str) -> Optional[int]:
+        index = bisect_left(self.values, key, key=normalize)
+        if index < len(self.values) and normalize(self.values[index]) == key:
+            return index
+        return None
+
+    def _collect(self, prefix: str, lo: int, hi: int) -> List[Ranked]:
+        """The best values in ``values[lo:hi]``, the run of values starting with ``prefix``."""
+
+        if hi - lo <= SCAN_LIMIT:
+            return self._scan(lo, hi)
+        top = self._top.get(prefix)
+        if top is not None:
+            return top
+        ranked: List[Ranked] = []
+        if normalize(self.values[lo]) == prefix:
+            # The prefix itself sorts first in its run.
+            ranked.extend(self._scan(lo, lo + 1))
+            lo += 1
+        depth = len(prefix) + 1
+        while lo < hi:
+            child = normalize(self.values[lo])[:depth]
+            stop = bisect_left(self.values, _successor(child), lo, hi, key=normalize)
+            ranked.extend(self._collect(child, lo, stop))
+            lo = stop
+        ranked.sort()
+        top = self._top[prefix] = ranked[:SUGGEST_LIMIT]
+        return top
+
+    def _scan(self, lo: int, hi: int) -> List[Ranked]:
+        # nlargest is stable, so equal counts stay in value order.
+        best = heapq.nlargest(SUGGEST_LIMIT, range(lo, hi), key=self.counts.__getitem__)
+        return [(-self.counts[index], normalize(self.values[index]), self.values[index]) for index in best]
+
+
+class RowValues:
+    """One table's indexed values per row, in id order."""
+
+    def __init__(self, ids: Iterable[int], columns: Sequence[Sequence[Optional[str]]]) -> None:
+        self.ids = array("q", ids)
+        self.columns: List[List[Optional[str]]] = [list(column) for column in columns]
+
+    def get(self, record_id: int) -> Optional[Tuple[Optional[str], ...]]:
+        index = bisect_left(self.ids, record_id)
+        if index < len(self.ids) and self.ids[index] == record_id:
+            return tuple(column[index] for column in self.columns)
+        return None
+
+    def set(self, record_id: int, values: Sequence[Optional[str]]) -> None:
+        index = bisect_left(self.ids, record_id)
+        if index < len(self.ids) and self.ids[index] == record_id:
+            for column, value in zip(self.columns, values):
+                column[index] = value
+            return
+        self.ids.insert(index, record_id)
+        for column, value in zip(self.columns, values):
+            column.insert(index, value)
+
+    def remove(self, record_id: int) -> None:
+        index = bisect_left(self.ids, record_id)
+        if index < len(self.ids) and self.ids[index] == record_id:
+            del self.ids[index]
+            for column in self.columns:
+                del column[index]
+
+
+def _shared(values: Sequence[Optional[str]]) -> List[Optional[str]]:
+    """``values`` with equal strings sharing one object, so repeated values are stored once."""
+
+    distinct = set(values)
+    if len(distinct) * 2 > len(values):
+        return list(values)
+    canonical = {value: value for value in distinct}
+    return list(map(canonical.__getitem__, values))
+
+
+class CatalogSuggestions:
+    """Class keyword and country completions over every catalog table."""
+
+    def __init__(self, keywords: PrefixIndex, countries: PrefixIndex, rows: Dict[str, RowValues]) -> None:
+        self.keywords = keywords
+        self.countries = countries
+        self.rows = rows
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection) -> "CatalogSuggestions":
+        keyword_counts: Counter = Counter()
+        country_counts: Counter = Counter()
+        rows: Dict[str, RowValues] = {}
+        for table in TABLE_SCHEMAS:
+            query = QUERIES.compile(
+                ("suggest", table), lambda: f"SELECT id, {', '.join(INDEXED_COLUMNS)} FROM {table} ORDER BY id"
+            )
+            records = conn.execute(query).fetchall()
+            ids, *columns = zip(*records) if records else [()] * (len(INDEXED_COLUMNS) + 1)
+            columns = [_shared(column) for column in columns]
+            rows[table] = RowValues(ids, columns)
+            for column in columns[:-1]:
+                keyword_counts.update(column)
+            country_counts.update(columns[-1])
+        return cls(PrefixIndex(keyword_counts), PrefixIndex(country_counts), rows)
+
+    def update(self, conn: sqlite3.Connection, rows: Mapping[str, Iterable[int]], base: int = 0) -> None:
+        """Re-read ``rows`` (table -> ids in ``conn``, which ``base`` maps to catalog ids) after a change."""
+
+        for table, ids in rows.items():
+            stored = self.rows.get(table)
+            if stored is None:
+                continue
+            ids = sorted(ids)
+            query = QUERIES.compile(
+                ("suggest", "ids", table),
+                lambda: f"SELECT id, {', '.join(INDEXED_COLUMNS)} FROM {table} "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+            )
+            found = {row[0]: tuple(row[1:]) for row in conn.execute(query, (json.dumps(ids),))}
+            for record_id in ids:
+                old = stored.get(base + record_id)
+                new = found.get(record_id)
+                if old == new:
+                    continue
+                if old is not None:
+                    self._count(old, -1)
+                if new is None:
+                    stored.remove(base + record_id)
+                else:
+                    stored.set(base + record_id, new)
+                    self._count(new, 1)
+
+    def _count(self, values: Sequence[Optional[str]], delta: int) -> None:
+        for value in values[:-1]:
+            self.keywords.add(value, delta)
+        self.countries.add(values[-1], delta)
+
+
+def benchmark_suggestions(conn: sqlite3.Connection, samples: int = 1000, seed: int = 0) -> Dict[str, float]:
+    """Build the suggestions for ``conn`` and time completions as ``samples`` keyword values are typed."""
+
+    start = time.perf_counter()
+    suggestions = CatalogSuggestions.build(conn)
+    build_seconds = time.perf_counter() - start
+
+    index = suggestions.keywords
+    rng = random.Random(seed)
+    words = [index.values[rng.randrange(len(index))] for _ in range(samples)] if len(index) else []
+    timings: List[float] = []
+    for word in words:
+        for end in range(1, min(len(word), 8) + 1):
+            start = time.perf_counter()
+            index.complete(word[:end])
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "rows": float(sum(len(stored.ids) for stored in suggestions.rows.values())),
+        "keywords": float(len(index)),
+        "countries": float(len(suggestions.countries)),
+        "build_seconds": build_seconds,
+        "lookups": float(len(timings)),
+        "median_ms": statistics.median(timings) * 1000 if timings else 0.0,
+        "p99_ms": timings[int(len(timings) * 0.99)] * 1000 if timings else 0.0,
+        "max_ms": timings[-1] * 1000 if timings else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Complete class keywords or countries, or time completions.")
+    parser.add_argument("prefix", nargs="*", help="prefixes to complete (default: run the benchmark)")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--country", action="store_true", help="complete countries instead of class keywords")
+    parser.add_argument("--samples", type=int, default=1000, help="values typed in the benchmark")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Catalog database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        if args.prefix:
+            suggestions = CatalogSuggestions.build(conn)
+            index = suggestions.countries if args.country else suggestions.keywords
+            for prefix in args.prefix:
+                completions = index.complete(prefix)
+                print(f"{prefix}: " + ", ".join(f"{value} ({index.count(value)})" for value in completions))
+            return
+        result = benchmark_suggestions(conn, args.samples)
+    finally:
+        conn.close()
+
+    print(
+        f"Indexed:  {int(result['rows']):,} rows, {int(result['keywords']):,} keywords, "
+        f"{int(result['countries'])} countries in {result['build_seconds']:.2f}s"
+    )
+    print(
+        f"Complete: {int(result['lookups']):,} lookups, median {result['median_ms']:.3f} ms, "
+        f"p99 {result['p99_ms']:.3f} ms, max {result['max_ms']:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
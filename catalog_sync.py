@@ -0,0 +1,247 @@
+"""Delta synchronisation between catalog databases.
+
+``initialize_database`` installs triggers that append every row change to the
+``ChangeLog`` table.  A delta collapses the log entries after a given sequence
+number to the final state of each touched row, so updating a console costs the
+size of the changes rather than the catalog.  Applying a delta is idempotent:
+rows are upserted by id, deletes ignore missing rows, and the last applied
+sequence per source catalog is remembered in ``SyncState``.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import uuid
+from typing import Dict, List, Optional
+
+from initialize_esm_db import (
+    CHANGE_LOG_TABLE,
+    DB_FILE,
+    TABLE_SCHEMAS,
+    VERSION_COLUMN,
+    ensure_change_tracking,
+    ensure_row_versions,
+    get_catalog_id,
+    get_change_sequence,
+)
+
+DELTA_FORMAT = 1
+ID_BATCH = 500
+
+
+class SyncError(Exception):
+    """Raised when a delta cannot be applied safely."""
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def export_changes(conn: sqlite3.Connection, since: int = 0) -> Dict[str, object]:
+    """Collect the latest state of every row changed after sequence ``since``.
+
+    A first export (``since`` 0) carries every row, since rows that predate
+    the change triggers never reached the log.
+    """
+
+    to_seq = get_change_sequence(conn)
+    touched: Dict[str, List[int]] = {}
+    cursor = conn.execute(
+        f"SELECT table_name, row_id FROM {CHANGE_LOG_TABLE} "
+        "WHERE seq > ? GROUP BY table_name, row_id ORDER BY MAX(seq)",
+        (since,),
+    )
+    for table, row_id in cursor:
+        if table in TABLE_SCHEMAS:
+            touched.setdefault(table, []).append(row_id)
+    if since <= 0:
+        for table in TABLE_SCHEMAS:
+            logged = set(touched.get(table, ()))
+            unlogged = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id") if row[0] not in logged]
+            if unlogged:
+                touched.setdefault(table, []).extend(unlogged)
+
+    tables: Dict[str, Dict[str, object]] = {}
+    for table, row_ids in touched.items():
+        columns = [name for name, _ in TABLE_SCHEMAS[table]]
+        upserts: List[List[object]] = []
+        found = set()
+        for start in range(0, len(row_ids), ID_BATCH):
+            batch = row_ids[start : start + ID_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE id IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for row in rows:
+                found.add(row[0])
+                upserts.append(list(row))
+        deletes = [row_id for row_id in row_ids if row_id not in found]
+        tables[table] = {"columns": columns, "upserts": upserts, "deletes": deletes}
+
+    return {
+        "format": DELTA_FORMAT,
+        "source": get_catalog_id(conn),
+        "from_seq": since,
+        "to_seq": to_seq,
+        "tables": tables,
+    }
+
+
+def last_applied_sequence(conn: sqlite3.Connection, source_id: str) -> Optional[int]:
+    """Sequence of ``source_id`` already applied to ``conn``, if recorded."""
+
+    try:
+        row = conn.execute(
+            "SELECT last_seq FROM SyncState WHERE source_id = ?", (source_id,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    return row[0] if row else None
+
+
+def adopt_copy(conn: sqlite3.Connection, source_id: str) -> bool:
+    """Give ``conn`` a catalog id of its own if it is a file copy of ``source_id``.
+
+    A copy's change log grows with its own writes and with deltas from other
+    catalogs, so it says nothing about how far it has followed the source;
+    with a new id and no ``SyncState`` row it is synced from the start.
+    """
+
+    if not source_id or source_id != get_catalog_id(conn):
+        return False
+    with conn:
+        conn.execute("UPDATE CatalogInfo SET value = ? WHERE key = 'catalog_id'", (uuid.uuid4().hex,))
+    return True
+
+
+def apply_changes(conn: sqlite3.Connection, delta: Dict[str, object]) -> int:
+    """Apply ``delta`` in a single transaction and return the number of rows touched."""
+
+    if delta.get("format") != DELTA_FORMAT:
+        raise SyncError(f"Unsupported delta format: {delta.get('format')}")
+    source_id = str(delta["source"])
+    adopt_copy(conn, source_id)
+    applied = last_applied_sequence(conn, source_id)
+    if applied is not None:
+        if delta["to_seq"] <= applied:
+            return 0
+        if delta["from_seq"] > applied:
+            raise SyncError(
+                f"Delta starts at sequence {delta['from_seq']} but this catalog has only "
+                f"applied up to {applied}; export again with --since {applied}."
+            )
+
+    touched = 0
+    with conn:
+        ensure_change_tracking(conn)
+        ensure_row_versions(conn)
+        cur = conn.cursor()
+        for table, payload in delta["tables"].items():
+            if table not in TABLE_SCHEMAS:
+                raise SyncError(f"Delta references unknown table {table}.")
+            columns: List[str] = payload["columns"]
+            updates = ", ".join(
+                [
+                    *(f"{column} = excluded.{column}" for column in columns if column != "id"),
+                    # Curators holding the old version must see a conflict, not overwrite the sync.
+                    f"{VERSION_COLUMN} = {VERSION_COLUMN} + 1",
+                ]
+            )
+            statement = (
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}"
+            )
+            cur.executemany(statement, payload["upserts"])
+            cur.executemany(f"DELETE FROM {table} WHERE id = ?", ((row_id,) for row_id in payload["deletes"]))
+            touched += len(payload["upserts"]) + len(payload["deletes"])
+        cur.execute(
+            "INSERT INTO SyncState (source_id, last_seq) VALUES (?, ?) "
+            "ON CONFLICT(source_id) DO UPDATE SET last_seq = excluded.last_seq",
+            (source_id, delta["to_seq"]),
+        )
+    return touched
+
+
+def write_delta(delta: Dict[str, object], path: str) -> None:
+    with _open_text(path, "w") as handle:
+        json.dump(delta, handle, separators=(",", ":"))
+
+
+def read_delta(path: str) -> Dict[str, object]:
+    with _open_text(path, "r") as handle:
+        return json.load(handle)
+
+
+def sync_databases(source_file: str, target_file: str) -> int:
+    """Bring ``target_file`` up to date with ``source_file`` and return rows touched."""
+
+    source = sqlite3.connect(source_file)
+    target = sqlite3.connect(target_file)
+    try:
+        source_id = get_catalog_id(source)
+        adopt_copy(target, source_id)
+        since = last_applied_sequence(target, source_id) or 0
+        return apply_changes(target, export_changes(source, since))
+    finally:
+        target.close()
+        source.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exchange change-log deltas between catalogs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write changes after a sequence number")
+    export_parser.add_argument("--db", default=DB_FILE)
+    export_parser.add_argument("--since", type=int, default=0)
+    export_parser.add_argument("--output", required=True, help="delta file (.json or .json.gz)")
+
+    apply_parser = subparsers.add_parser("apply", help="apply a delta file to a catalog")
+    apply_parser.add_argument("delta")
+    apply_parser.add_argument("--db", default=DB_FILE)
+
+    sync_parser = subparsers.add_parser("sync", help="sync one catalog file directly into another")
+    sync_parser.add_argument("source")
+    sync_parser.add_argument("target")
+
+    status_parser = subparsers.add_parser("status", help="show catalog id and change sequence")
+    status_parser.add_argument("--db", default=DB_FILE)
+
+    args = parser.parse_args()
+    for path in (args.source, args.target) if args.command == "sync" else (args.db,):
+        if not os.path.exists(path):
+            raise SystemExit(f"Catalog database not found: {path}")
+    if args.command == "export":
+        conn = sqlite3.connect(args.db)
+        try:
+            delta = export_changes(conn, args.since)
+        finally:
+            conn.close()
+        write_delta(delta, args.output)
+        rows = sum(len(t["upserts"]) + len(t["deletes"]) for t in delta["tables"].values())
+        print(f"Exported {rows} changed rows (sequence {delta['from_seq']} -> {delta['to_seq']})")
+    elif args.command == "apply":
+        conn = sqlite3.connect(args.db)
+        try:
+            touched = apply_changes(conn, read_delta(args.delta))
+        finally:
+            conn.close()
+        print(f"Applied {touched} row changes")
+    elif args.command == "sync":
+        print(f"Applied {sync_databases(args.source, args.target)} row changes")
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            print(f"Catalog {get_catalog_id(conn)} at change sequence {get_change_sequence(conn)}")
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
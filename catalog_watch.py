@@ -0,0 +1,175 @@
+"""Live change notifications for open catalog consoles.
+
+:class:`ChangeWatcher` runs on a background thread with its own read-only
+connection per catalog file.  Each tick it reads ``PRAGMA data_version``,
+which only moves when another connection commits, so an idle catalog costs
+one pragma per file.  When it moves, the watcher reads the ``ChangeLog``
+entries past the last sequence it saw and queues a :class:`ChangeSet` of the
+touched ``(table, id)`` rows.  The browser drains the queue on its own event
+loop and refreshes only those rows.
+
+Ids use the federated layout (:func:`catalog_federation.encode_id`): the
+catalog's position among the watched files sits in the high bits, which is
+a no-op for a single catalog.
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
+from urllib.parse import quote
+
+from catalog_federation import encode_id
+from catalog_queries import connect
+from initialize_esm_db import CHANGE_LOG_TABLE, DB_FILE, TABLE_SCHEMAS, get_change_sequence
+
+POLL_INTERVAL = 0.25
+CHANGE_LIMIT = 2000
+
+
+class ChangeSet(NamedTuple):
+    """Rows touched since the last notification.
+
+    ``full`` means the individual rows are unknown (no change log, a log
+    that went backwards, or more than :data:`CHANGE_LIMIT` rows), so every
+    view should be rebuilt.
+    """
+
+    rows: Dict[str, Set[int]]
+    full: bool = False
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.rows.values())
+
+
+def merge_changes(changes: Sequence[ChangeSet]) -> ChangeSet:
+    rows: Dict[str, Set[int]] = {}
+    full = False
+    for change in changes:
+        full = full or change.full
+        for table, ids in change.rows.items():
+            rows.setdefault(table, set()).update(ids)
+    if sum(len(ids) for ids in rows.values()) > CHANGE_LIMIT:
+        return ChangeSet({}, True)
+    return ChangeSet(rows, full)
+
+
+def read_changes(conn: sqlite3.Connection, since: int, until: int, base: int = 0) -> ChangeSet:
+    """Rows logged with ``since < seq <= until``, with ``base`` added to their ids."""
+
+    cursor = conn.execute(
+        f"SELECT DISTINCT table_name, row_id FROM {CHANGE_LOG_TABLE} WHERE seq > ? AND seq <= ? LIMIT ?",
+        (since, until, CHANGE_LIMIT + 1),
+    )
+    entries = cursor.fetchall()
+    if len(entries) > CHANGE_LIMIT:
+        return ChangeSet({}, True)
+    rows: Dict[str, Set[int]] = {}
+    for table, row_id in entries:
+        if table in TABLE_SCHEMAS:
+            rows.setdefault(table, set()).add(base + row_id)
+    return ChangeSet(rows)
+
+
+def _open_watch_connection(path: str) -> sqlite3.Connection:
+    # Plain read-only, not immutable: the point is to see other writers' commits.
+    return connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+
+class ChangeWatcher:
+    """Background watcher over one or more catalog files (in federation order)."""
+
+    def __init__(self, sources: Sequence[str], interval: float = POLL_INTERVAL) -> None:
+        self.sources: List[str] = list(sources)
+        self.interval = interval
+        self.changes: "queue.Queue[ChangeSet]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-watch", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> Optional[ChangeSet]:
+        """Every change queued so far merged into one set, or ``None``; never blocks."""
+
+        pending: List[ChangeSet] = []
+        while True:
+            try:
+                pending.append(self.changes.get_nowait())
+            except queue.Empty:
+                break
+        return merge_changes(pending) if pending else None
+
+    def _run(self) -> None:
+        conns = [_open_watch_connection(path) for path in self.sources]
+        try:
+            versions = [conn.execute("PRAGMA data_version").fetchone()[0] for conn in conns]
+            sequences = [get_change_sequence(conn) for conn in conns]
+            self._ready.set()
+            while not self._stop.wait(self.interval):
+                for index, conn in enumerate(conns):
+                    version = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if version == versions[index]:
+                        continue
+                    versions[index] = version
+                    change = self._check(conn, index, sequences)
+                    if change is not None:
+                        self.changes.put(change)
+        finally:
+            self._ready.set()
+            for conn in conns:
+                conn.close()
+
+    def _check(self, conn: sqlite3.Connection, index: int, sequences: List[int]) -> Optional[ChangeSet]:
+        since = sequences[index]
+        until = sequences[index] = get_change_sequence(conn)
+        if until == since:
+            # A commit without row changes (ANALYZE, an empty import) or an untracked catalog.
+            return None if until else ChangeSet({}, True)
+        if until < since:
+            return ChangeSet({}, True)
+        return read_changes(conn, since, until, encode_id(index, 0))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print catalog changes as other processes commit them.")
+    parser.add_argument("catalogs", nargs="*", default=[DB_FILE], help="catalog files to watch")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between checks")
+    args = parser.parse_args()
+
+    for path in args.catalogs:
+        if not os.path.exists(path):
+            raise SystemExit(f"Catalog database not found: {path}")
+    watcher = ChangeWatcher(args.catalogs, args.interval)
+    watcher.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            change = watcher.poll()
+            if change is None:
+                continue
+            if change.full:
+                print("catalog changed: full refresh")
+            for table, ids in sorted(change.rows.items()):
+                print(f"{table}: {', '.join(str(record_id) for record_id in sorted(ids))}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sqlite3
 import textwrap
+import uuid
 from typing import Dict, Sequence, Tuple
 
 DB_FILE = "esm_operator.db"
@@ -151,603 +152,174 @@ def build_create_statement(table: str, schema: TableSchema) -> str:
 
 TABLES: Dict[str, str] = {
     table: build_create_statement(table, schema) for table, schema in TABLE_SCHEMAS.items()
-from typing import Dict, Sequence
+}
 
-DB_FILE = "esm_operator.db"
+NUMERIC_TYPES = ("INTEGER", "REAL")
 
-TABLES: Dict[str, str] = {
-    "Platform": """
-        CREATE TABLE IF NOT EXISTS Platform (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Domain TEXT,
-            Agility TEXT,
-            DamagePoints INTEGER,
-            OODA TEXT,
-            Notes TEXT
-        );
-    """,
-    "Aircraft": """
-        CREATE TABLE IF NOT EXISTS Aircraft (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Agility TEXT,
-            Length REAL,
-            Span REAL,
-            Height REAL,
-            Crew INTEGER,
-            Armor TEXT,
-            MaxWeight REAL,
-            MaxPayload REAL,
-            DamagePoints INTEGER,
-            OODA TEXT
-        );
-    """,
-    "Facility": """
-        CREATE TABLE IF NOT EXISTS Facility (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Personnel INTEGER,
-            Armor TEXT,
-            MaxCapacity INTEGER,
-            DamagePoints INTEGER,
-            OODA TEXT
-        );
-    """,
-    "GroundUnit": """
-        CREATE TABLE IF NOT EXISTS GroundUnit (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Mobility TEXT,
-            Length REAL,
-            Width REAL,
-            Height REAL,
-            Crew INTEGER,
-            Armor TEXT,
-            MaxSpeed REAL,
-            Range REAL,
-            DamagePoints INTEGER,
-            OODA TEXT
-        );
-    """,
-    "Submarine": """
-        CREATE TABLE IF NOT EXISTS Submarine (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Displacement REAL,
-            Length REAL,
-            Beam REAL,
-            Draft REAL,
-            Crew INTEGER,
-            Armor TEXT,
-            MaxDepth REAL,
-            MaxSpeed REAL,
-            Range REAL,
-            DamagePoints INTEGER,
-            OODA TEXT
-        );
-    """,
-    "Ship": """
-        CREATE TABLE IF NOT EXISTS Ship (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Displacement REAL,
-            Length REAL,
-            Beam REAL,
-            Draft REAL,
-            Crew INTEGER,
-            Armor TEXT,
-            MaxSpeed REAL,
-            Range REAL,
-            DamagePoints INTEGER,
-            OODA TEXT
+NUMERIC_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    table: tuple(
+        name for name, definition in schema if name != "id" and definition.split()[0] in NUMERIC_TYPES
+    )
+    for table, schema in TABLE_SCHEMAS.items()
+}
+
+
+RANGE_INDEXES: Tuple[Tuple[str, str, str], ...] = tuple(
+    (f"idx_{table}_{column}", table, column)
+    for table, columns in NUMERIC_COLUMNS.items()
+    for column in columns
+)
+
+
+def build_range_index_statements() -> Tuple[str, ...]:
+    """Single-column indexes on every numeric spec so range filters avoid table scans."""
+
+    return tuple(
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})" for name, table, column in RANGE_INDEXES
+    )
+
+
+CHANGE_LOG_TABLE = "ChangeLog"
+
+# Bumped by every edit so concurrent curators can detect each other's writes.
+VERSION_COLUMN = "RowVersion"
+
+SUPPORT_TABLES: Dict[str, str] = {
+    "CatalogInfo": """
+        CREATE TABLE IF NOT EXISTS CatalogInfo (
+            key TEXT PRIMARY KEY,
+            value TEXT
         );
     """,
-    "Satellite": """
-        CREATE TABLE IF NOT EXISTS Satellite (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            OrbitType TEXT,
-            Altitude REAL,
-            Mass REAL,
-            Power REAL,
-            Mission TEXT,
-            DamagePoints INTEGER,
-            OODA TEXT
+    CHANGE_LOG_TABLE: f"""
+        CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT DEFAULT CURRENT_TIMESTAMP
         );
     """,
-    "Weapon": """
-        CREATE TABLE IF NOT EXISTS Weapon (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Name TEXT,
-            Category TEXT,
-            Country TEXT,
-            PhysicalSize TEXT,
-            Type TEXT,
-            Range REAL,
-            Guidance TEXT,
-            Speed REAL,
-            Warhead TEXT,
-            LaunchPlatform TEXT,
-            DamagePoints INTEGER,
-            OODA TEXT
+    "SyncState": """
+        CREATE TABLE IF NOT EXISTS SyncState (
+            source_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL
         );
     """,
 }
 
-SAMPLE_DATA: Dict[str, Dict[str, Sequence[Sequence[object]]]] = {
-    "Platform": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Domain",
-            "Agility",
-            "DamagePoints",
-            "OODA",
-            "Notes",
-        ],
-        "rows": [
-            (
-                "E-3 Sentry",
-                "United States",
-                "Airborne Early Warning",
-                "Large",
-                "AWACS",
-                "Air",
-                "Moderate",
-                55,
-                "Deliberate",
-                "Airborne radar and battle management platform.",
-            ),
-            (
-                "Bayraktar TB2",
-                "Turkey",
-                "Unmanned Aerial Vehicle",
-                "Medium",
-                "MALE UAV",
-                "Air",
-                "Low",
-                25,
-                "Tactical",
-                "Medium-altitude long-endurance reconnaissance and strike drone.",
-            ),
-        ],
-    },
-    "Aircraft": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Agility",
-            "Length",
-            "Span",
-            "Height",
-            "Crew",
-            "Armor",
-            "MaxWeight",
-            "MaxPayload",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "F-16 Fighting Falcon",
-                "United States",
-                "Fighter",
-                "Medium",
-                "Multirole Fighter",
-                "High",
-                15.0,
-                9.96,
-                4.8,
-                1,
-                "Composite",
-                19.2,
-                7.7,
-                45,
-                "Rapid",
-            ),
-            (
-                "Su-35 Flanker-E",
-                "Russia",
-                "Fighter",
-                "Large",
-                "Air Superiority Fighter",
-                "Very High",
-                21.9,
-                15.3,
-                5.9,
-                1,
-                "Titanium Alloy",
-                34.5,
-                8.0,
-                52,
-                "Aggressive",
-            ),
-            (
-                "JAS 39 Gripen",
-                "Sweden",
-                "Fighter",
-                "Compact",
-                "Lightweight Multirole",
-                "High",
-                14.1,
-                8.4,
-                4.5,
-                1,
-                "Composite",
-                14.0,
-                5.3,
-                38,
-                "Responsive",
-            ),
-        ],
-    },
-    "Facility": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Personnel",
-            "Armor",
-            "MaxCapacity",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "Ramstein Air Base",
-                "Germany",
-                "Air Base",
-                "Large",
-                "Air Force Installation",
-                8600,
-                "Hardened Shelters",
-                120,
-                80,
-                "Strategic",
-            ),
-            (
-                "Diego Garcia Support Facility",
-                "United Kingdom",
-                "Naval Support",
-                "Medium",
-                "Logistics Hub",
-                2000,
-                "Reinforced",
-                40,
-                60,
-                "Strategic",
-            ),
-        ],
-    },
-    "GroundUnit": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Mobility",
-            "Length",
-            "Width",
-            "Height",
-            "Crew",
-            "Armor",
-            "MaxSpeed",
-            "Range",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "M1A2 Abrams",
-                "United States",
-                "Main Battle Tank",
-                "Large",
-                "Armored",
-                "Tracked",
-                9.77,
-                3.66,
-                2.44,
-                4,
-                "Chobham",
-                67.0,
-                426,
-                70,
-                "Decisive",
-            ),
-            (
-                "Leopard 2A7",
-                "Germany",
-                "Main Battle Tank",
-                "Large",
-                "Armored",
-                "Tracked",
-                10.97,
-                3.75,
-                3.0,
-                4,
-                "Composite",
-                68.0,
-                450,
-                68,
-                "Decisive",
-            ),
-        ],
-    },
-    "Submarine": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Displacement",
-            "Length",
-            "Beam",
-            "Draft",
-            "Crew",
-            "Armor",
-            "MaxDepth",
-            "MaxSpeed",
-            "Range",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "Virginia-class Block V",
-                "United States",
-                "Attack Submarine",
-                "Large",
-                "Nuclear",
-                10200,
-                115.0,
-                10.4,
-                9.8,
-                132,
-                "HY-100 Steel",
-                488.0,
-                25.0,
-                12000,
-                85,
-                "Stealth",
-            ),
-            (
-                "Yasen-class",
-                "Russia",
-                "Attack Submarine",
-                "Large",
-                "Nuclear",
-                13800,
-                139.0,
-                13.0,
-                10.0,
-                90,
-                "Steel-Titanium",
-                520.0,
-                31.0,
-                15000,
-                88,
-                "Stealth",
-            ),
-        ],
-    },
-    "Ship": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Displacement",
-            "Length",
-            "Beam",
-            "Draft",
-            "Crew",
-            "Armor",
-            "MaxSpeed",
-            "Range",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "Arleigh Burke-class Destroyer",
-                "United States",
-                "Destroyer",
-                "Large",
-                "Guided Missile Destroyer",
-                9200,
-                155.0,
-                20.0,
-                9.3,
-                320,
-                "Kevlar Protection",
-                31.0,
-                8330,
-                78,
-                "Coordinated",
-            ),
-            (
-                "Type 052D Luyang III",
-                "China",
-                "Destroyer",
-                "Large",
-                "Guided Missile Destroyer",
-                7500,
-                157.0,
-                17.0,
-                10.0,
-                280,
-                "Steel",
-                30.0,
-                4500,
-                72,
-                "Coordinated",
-            ),
-            (
-                "Queen Elizabeth-class Carrier",
-                "United Kingdom",
-                "Aircraft Carrier",
-                "Very Large",
-                "Fleet Carrier",
-                65000,
-                284.0,
-                73.0,
-                11.0,
-                700,
-                "Armored Deck",
-                25.0,
-                10000,
-                95,
-                "Coordinated",
-            ),
-        ],
-    },
-    "Satellite": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "OrbitType",
-            "Altitude",
-            "Mass",
-            "Power",
-            "Mission",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "USA-245",
-                "United States",
-                "Reconnaissance",
-                "Medium",
-                "Optical Imaging",
-                "Low Earth Orbit",
-                280.0,
-                19600.0,
-                13.0,
-                "Imagery Intelligence",
-                50,
-                "Surveillance",
-            ),
-            (
-                "Kosmos-2558",
-                "Russia",
-                "Inspection",
-                "Compact",
-                "Spacecraft",
-                "Low Earth Orbit",
-                435.0,
-                500.0,
-                3.0,
-                "Orbital Inspection",
-                35,
-                "Surveillance",
-            ),
-        ],
-    },
-    "Weapon": {
-        "columns": [
-            "Name",
-            "Country",
-            "Category",
-            "PhysicalSize",
-            "Type",
-            "Range",
-            "Guidance",
-            "Speed",
-            "Warhead",
-            "LaunchPlatform",
-            "DamagePoints",
-            "OODA",
-        ],
-        "rows": [
-            (
-                "AIM-120 AMRAAM",
-                "United States",
-                "Air-to-Air Missile",
-                "Compact",
-                "Beyond-Visual-Range",
-                180.0,
-                "Active Radar",
-                4.0,
-                "High-Explosive",
-                "Fighter Aircraft",
-                40,
-                "Reactive",
-            ),
-            (
-                "R-77",
-                "Russia",
-                "Air-to-Air Missile",
-                "Compact",
-                "Beyond-Visual-Range",
-                110.0,
-                "Active Radar",
-                3.5,
-                "Fragmentation",
-                "Fighter Aircraft",
-                38,
-                "Reactive",
-            ),
-            (
-                "AM39 Exocet",
-                "France",
-                "Anti-Ship Missile",
-                "Compact",
-                "Sea Skimming",
-                70.0,
-                "Inertial/Active Radar",
-                0.9,
-                "210 kg High-Explosive",
-                "Ship, Aircraft",
-                55,
-                "Reactive",
-            ),
-        ],
-    },
-}
+
+def build_change_triggers(table: str) -> Tuple[str, ...]:
+    """Triggers that append every insert, update and delete on ``table`` to the change log."""
+
+    return tuple(
+        textwrap.dedent(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{suffix}
+            AFTER {event} ON {table}
+            BEGIN
+                INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id, op)
+                VALUES ('{table}', {ref}.id, '{op}');
+            END;
+            """
+        )
+        for suffix, event, ref, op in (
+            ("ins", "INSERT", "NEW", "I"),
+            ("upd", "UPDATE", "NEW", "U"),
+            ("del", "DELETE", "OLD", "D"),
+        )
+    )
+
+
+HISTORY_SUFFIX = "History"
+
+# Rows that predate history tracking get a first revision dated to this.
+HISTORY_EPOCH = "0000-01-01 00:00:00.000"
+
+# UTC with milliseconds; text in this format sorts chronologically.
+HISTORY_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def history_table(table: str) -> str:
+    return f"{table}{HISTORY_SUFFIX}"
+
+
+def history_columns(table: str) -> Tuple[Tuple[str, str], ...]:
+    """The value columns ``table``'s history records: the schema's (less ``id``) and the row version."""
+
+    columns = tuple((name, definition.split()[0]) for name, definition in TABLE_SCHEMAS[table] if name != "id")
+    return columns + ((VERSION_COLUMN, "INTEGER"),)
+
+
+def build_history_statements(table: str) -> Tuple[str, ...]:
+    """The append-only revision table for ``table`` and its (id, valid_from) index."""
+
+    history = history_table(table)
+    columns = "".join(f",\n            {name} {kind}" for name, kind in history_columns(table))
+    return (
+        textwrap.dedent(
+            f"""
+            CREATE TABLE IF NOT EXISTS {history} (
+                revision INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                valid_from TEXT NOT NULL{columns}
+            );
+            """
+        ),
+        f"CREATE INDEX IF NOT EXISTS idx_{history}_id_valid_from ON {history} (id, valid_from)",
+    )
+
+
+def build_history_triggers(table: str) -> Tuple[str, ...]:
+    """Triggers that record a revision of ``table`` for every insert, real update and delete.
+
+    Updates that leave every value as it was (the row version aside) add no
+    revision, and the history table itself refuses updates and deletes.
+    """
+
+    history = history_table(table)
+    names = [name for name, _ in history_columns(table)]
+    column_list = ", ".join(names)
+    new_values = ", ".join(f"NEW.{name}" for name in names)
+    changed = " OR ".join(f"OLD.{name} IS NOT NEW.{name}" for name in names if name != VERSION_COLUMN)
+    statements = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{history}_ins
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {history} (id, op, valid_from, {column_list})
+            VALUES (NEW.id, 'I', {HISTORY_NOW}, {new_values});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{history}_upd
+        AFTER UPDATE ON {table}
+        WHEN {changed}
+        BEGIN
+            INSERT INTO {history} (id, op, valid_from, {column_list})
+            VALUES (NEW.id, 'U', {HISTORY_NOW}, {new_values});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{history}_del
+        AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {history} (id, op, valid_from) VALUES (OLD.id, 'D', {HISTORY_NOW});
+        END;
+        """,
+    ]
+    for event in ("UPDATE", "DELETE"):
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{history}_no_{event.lower()}
+            BEFORE {event} ON {history}
+            BEGIN
+                SELECT RAISE(ABORT, '{history} is append-only');
+            END;
+            """
+        )
+    return tuple(textwrap.dedent(statement) for statement in statements)
 
 
 def ensure_table_columns(conn: sqlite3.Connection, table: str) -> None:
@@ -762,6 +334,8 @@ def ensure_table_columns(conn: sqlite3.Connection, table: str) -> None:
         if column == "id" or column in existing_columns:
             continue
         cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
 def ensure_country_column(conn: sqlite3.Connection, table: str) -> None:
     cur = conn.cursor()
     cur.execute(f"PRAGMA table_info({table})")
@@ -770,33 +344,118 @@ def ensure_country_column(conn: sqlite3.Connection, table: str) -> None:
         cur.execute(f"ALTER TABLE {table} ADD COLUMN Country TEXT")
 
 
+def ensure_row_versions(conn: sqlite3.Connection) -> None:
+    """Give every catalog table the ``RowVersion`` column used for optimistic concurrency."""
+
+    cur = conn.cursor()
+    for table in TABLES:
+        cur.execute(f"PRAGMA table_info({table})")
+        if VERSION_COLUMN not in {row[1] for row in cur.fetchall()}:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {VERSION_COLUMN} INTEGER NOT NULL DEFAULT 1")
+
+
+def ensure_change_tracking(conn: sqlite3.Connection) -> None:
+    """Create the change log, catalog identity and per-table change triggers."""
+
+    cur = conn.cursor()
+    for ddl in SUPPORT_TABLES.values():
+        cur.execute(ddl)
+    cur.execute(
+        "INSERT OR IGNORE INTO CatalogInfo (key, value) VALUES ('catalog_id', ?)",
+        (uuid.uuid4().hex,),
+    )
+    for table in TABLES:
+        for trigger in build_change_triggers(table):
+            cur.execute(trigger)
+
+
+def ensure_history(conn: sqlite3.Connection) -> None:
+    """Create each table's revision history and triggers, starting it from the rows already there.
+
+    A history table missing columns the schema has since gained is widened,
+    and its triggers re-created to record them.
+    """
+
+    cur = conn.cursor()
+    for table in TABLES:
+        history = history_table(table)
+        columns = history_columns(table)
+        cur.execute(f"PRAGMA table_info({history})")
+        existing = {row[1] for row in cur.fetchall()}
+        if not existing:
+            for statement in build_history_statements(table):
+                cur.execute(statement)
+            column_list = ", ".join(name for name, _ in columns)
+            cur.execute(
+                f"INSERT INTO {history} (id, op, valid_from, {column_list}) "
+                f"SELECT id, 'I', '{HISTORY_EPOCH}', {column_list} FROM {table} ORDER BY id"
+            )
+        else:
+            missing = [(name, kind) for name, kind in columns if name not in existing]
+            for name, kind in missing:
+                cur.execute(f"ALTER TABLE {history} ADD COLUMN {name} {kind}")
+            if missing:
+                for suffix in ("ins", "upd", "del"):
+                    cur.execute(f"DROP TRIGGER IF EXISTS trg_{history}_{suffix}")
+        for statement in build_history_triggers(table):
+            cur.execute(statement)
+
+
+def get_catalog_id(conn: sqlite3.Connection) -> str:
+    row = conn.execute("SELECT value FROM CatalogInfo WHERE key = 'catalog_id'").fetchone()
+    return row[0] if row else ""
+
+
+def get_change_sequence(conn: sqlite3.Connection) -> int:
+    """Return the latest change-log sequence number, or 0 for an untracked database."""
+
+    try:
+        row = conn.execute(f"SELECT MAX(seq) FROM {CHANGE_LOG_TABLE}").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
 def populate_sample_data(conn: sqlite3.Connection) -> None:
+    """Seed every empty table; the sample data module is only imported if one is empty."""
+
     cur = conn.cursor()
-    for table, payload in SAMPLE_DATA.items():
+    empty = [table for table in TABLES if cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0] == 0]
+    if not empty:
+        return
+    from catalog_sample_data import SAMPLE_DATA
+
+    for table in empty:
+        payload = SAMPLE_DATA.get(table)
+        if not payload or not payload["rows"]:
+            continue
         columns: Sequence[str] = payload["columns"]
         rows: Sequence[Sequence[object]] = payload["rows"]
-        if not rows:
-            continue
-        cur.execute(f"SELECT COUNT(*) FROM {table}")
-        if cur.fetchone()[0] > 0:
-            continue
         column_list = ", ".join(columns)
         placeholders = ", ".join("?" for _ in columns)
         statement = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
         cur.executemany(statement, rows)
 
 
-def initialize_database(db_file: str = DB_FILE) -> None:
-    """Create the database, required tables, and example data."""
+def initialize_database(db_file: str = DB_FILE, seed: bool = True) -> None:
+    """Create the database, required tables, and (unless ``seed`` is false) example data."""
     conn = sqlite3.connect(db_file)
     try:
         cur = conn.cursor()
+        # Only takes effect on a new file; catalog_maintenance.py converts older ones.
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
         for ddl in TABLES.values():
             cur.execute(ddl)
         for table in TABLES:
             ensure_table_columns(conn, table)
             ensure_country_column(conn, table)
-        populate_sample_data(conn)
+        ensure_row_versions(conn)
+        ensure_change_tracking(conn)
+        ensure_history(conn)
+        for statement in build_range_index_statements():
+            cur.execute(statement)
+        if seed:
+            populate_sample_data(conn)
         conn.commit()
     finally:
         conn.close()
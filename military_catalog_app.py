@@ -1,10 +1,69 @@
+import argparse
+import json
+import os
 import sqlite3
+import threading
 import tkinter as tk
+from bisect import bisect_right
 from collections import OrderedDict
+from contextlib import contextmanager
 from tkinter import ttk
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from catalog_bitmaps import BITMAP_COLUMNS, BitmapIndex
+from catalog_cache import (
+    CatalogCache,
+    ListResult,
+    decode_list,
+    decode_tree,
+    default_cache_path,
+    encode_list,
+    encode_tree,
+    list_cache_key,
+    query_countries,
+    query_tree_rows,
+)
+from catalog_codec import CODECS
+from catalog_facets import FacetCounter
+from catalog_federation import Federation, decode_id, encode_id
+from catalog_filters import RangeFilter, numeric_columns_for, parse_range
+from catalog_queries import (
+    CATEGORY_NAMES,
+    QUERIES,
+    RECORD_BY_ID,
+    TREE_ROWS_BY_ID,
+    connect,
+)
+from catalog_records import NodeStore, RecordList
+from catalog_render import (
+    ChunkedRenderer,
+    apply_list_edits,
+    listbox_slices,
+    plan_list_edits,
+    splice_rows,
+)
+from catalog_search import (
+    ALL_COUNTRIES,
+    CATEGORY_TABLES,
+    TYPE_CONFIG,
+    Match,
+    SearchFilters,
+    count_facets,
+    display_type,
+    search_catalog,
+    search_rows,
+)
+from initialize_esm_db import DB_FILE, initialize_database
 
-from initialize_esm_db import DB_FILE, TABLES, initialize_database
+if TYPE_CHECKING:
+    from catalog_edit import EditBatch
+    from catalog_export import ExportReport
+    from catalog_parallel import ReadPool
+    from catalog_reports import RollupCache
+    from catalog_shards import ShardedCatalog, ShardedRollups
+    from catalog_similar import SimilarityIndex, TableVectors
+    from catalog_suggest import CatalogSuggestions
+    from catalog_watch import ChangeSet, ChangeWatcher
 
 DARK_BG = "#101010"
 PANEL_BG = "#161616"
@@ -16,109 +75,205 @@ TITLE_FONT = ("Courier", 18, "bold")
 LABEL_FONT = ("Courier", 12, "bold")
 TEXT_FONT = ("Courier", 12)
 LIST_FONT = ("Courier", 12)
+WATCH_TICK_MS = 250
+STARTUP_POLL_MS = 10
+EXPORT_POLL_MS = 100
+SUGGEST_POLL_MS = 100
+SIMILAR_POLL_MS = 100
 
-ALL_TABLES_ORDER = [
-    "Weapon",
-    "Ship",
-    "Submarine",
-    "Aircraft",
-    "Platform",
-    "GroundUnit",
-    "Facility",
-    "Satellite",
-]
-
-TABLE_DISPLAY_NAMES = {
-    "Weapon": "Weapon",
-    "Ship": "Ship",
-    "Submarine": "Submarine",
-    "Aircraft": "Aircraft",
-    "Platform": "Platform",
-    "GroundUnit": "Unit",
-    "Facility": "Facility",
-    "Satellite": "Satellite",
-}
-
-TYPE_CONFIG = OrderedDict(
-    [
-        ("All Types", {"tables": ALL_TABLES_ORDER}),
-        ("Weapons", {"tables": ["Weapon"]}),
-        ("Ships", {"tables": ["Ship"]}),
-        ("Aircraft", {"tables": ["Aircraft"]}),
-        (
-            "Drones",
-            {
-                "tables": ["Platform"],
-                "keywords": ["unmanned", "drone", "uav"],
-            },
-        ),
-        ("Units", {"tables": ["GroundUnit"]}),
-        ("Facilities", {"tables": ["Facility"]}),
-        ("Submarines", {"tables": ["Submarine"]}),
-        ("Satellites", {"tables": ["Satellite"]}),
-        ("Platforms", {"tables": ["Platform"]}),
-    ]
-)
-
-SPECIAL_COUNTRIES = ["Generic", "Terrorist", "Civilian"]
-
-
-class MilitaryCatalogApp:
-    """Dark-themed catalog browser for the CMSDB dataset."""
-from typing import Dict, List, Sequence, Tuple
 
-from initialize_esm_db import DB_FILE, initialize_database
+def list_sort_key(text: str) -> str:
+    """The lower-cased name a platform list row is ordered by."""
 
-CATEGORY_TABLES = OrderedDict(
-    [
-        ("Platforms", "Platform"),
-        ("Aircraft", "Aircraft"),
-        ("Ships", "Ship"),
-        ("Submarines", "Submarine"),
-        ("Ground Units", "GroundUnit"),
-        ("Facilities", "Facility"),
-        ("Satellites", "Satellite"),
-        ("Weapons", "Weapon"),
-    ]
-)
+    return text.rsplit(" — ", 1)[0].lower()
 
 
 class MilitaryCatalogApp:
-    """Minimalist catalog browser for the CMSDB dataset."""
+    """Dark-themed catalog browser for the CMSDB dataset."""
 
-    def __init__(self, master: tk.Tk) -> None:
+    def __init__(
+        self,
+        master: tk.Tk,
+        db_file: str = DB_FILE,
+        read_only: bool = False,
+        sources: Optional[Sequence[str]] = None,
+        shard_map: Optional[str] = None,
+        watch: bool = True,
+        curate: bool = False,
+    ) -> None:
         self.master = master
         self.master.title("CMSDB Military Catalog")
         self.master.configure(bg=DARK_BG)
         self.master.geometry("1024x640")
         self.master.minsize(820, 520)
-        self.master.configure(bg="#001b00")
-        self.master.geometry("960x600")
-        self.master.minsize(720, 480)
-
-        initialize_database()
-        self.conn = sqlite3.connect(DB_FILE)
-        self.conn.row_factory = sqlite3.Row
 
-        self.column_cache: Dict[str, List[str]] = {}
-        self.list_data: List[Tuple[str, int]] = []
+        self.db_file = db_file
+        self.sources = list(sources or ())
+        self.shard_map = shard_map
+        self.read_only = read_only or bool(self.sources) or bool(shard_map)
+        self.watch = watch
+        self.curate = curate and not self.read_only
+        self.shards: Optional["ShardedCatalog"] = None
+        self.federation: Optional[Federation] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self.bitmap_index: Optional[BitmapIndex] = None
+        self.rollups: Optional[Union["RollupCache", "ShardedRollups"]] = None
+        self.similar_index: Optional["SimilarityIndex"] = None
+        self.watcher: Optional["ChangeWatcher"] = None
+        self.cache: Optional[CatalogCache] = None
+        self.watch_job: Optional[str] = None
+        self.export_job: Optional[str] = None
+        self.export_thread: Optional[threading.Thread] = None
+        self.export_outcome: Optional[Union["ExportReport", Exception]] = None
+        self.suggestions: Optional["CatalogSuggestions"] = None
+        self.suggest_job: Optional[str] = None
+        self.suggest_thread: Optional[threading.Thread] = None
+        self.suggest_outcome: Optional[Union["CatalogSuggestions", Exception]] = None
+        self.suggestions_stale = False
+        self.similar_job: Optional[str] = None
+        self.similar_thread: Optional[threading.Thread] = None
+        self.similar_table: Optional[str] = None
+        self.similar_outcome: Optional[Union["TableVectors", Exception]] = None
+        self.similar_stale = False
+        self.edits: Optional["EditBatch"] = None
+        self.read_pool: Optional["ReadPool"] = None
+        self.edit_target: Optional[Tuple[str, int, Dict[str, object], int]] = None
+        self.curation_status = tk.StringVar(value="")
+        self.loading = True
+        self.startup_job: Optional[str] = None
+        self.startup_error: Optional[Exception] = None
+
+        self.node_store = NodeStore({table: label for label, table in CATEGORY_TABLES.items()})
+        self.list_data = RecordList(self.node_store.tables)
+        self.range_filters: "OrderedDict[str, RangeFilter]" = OrderedDict()
+        self.attribute_filters: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.render_status = tk.StringVar(value="")
+        self.country_options: List[str] = []
+        self.country_nodes: Dict[str, str] = {}
+        self.category_nodes: Dict[Tuple[str, str], str] = {}
+        self.detail_key: Optional[Tuple[str, int]] = None
+        # A history timestamp the details are shown as of, or None for the live record.
+        self.detail_as_of: Optional[str] = None
+        self.table_facets: Dict[str, FacetCounter] = {}
+        self.list_complete = True
 
         self._build_ui()
-        self.refresh_country_options()
-        self.refresh_platform_list()
-
+        self.display_message(["Opening catalog…"])
         self.master.protocol("WM_DELETE_WINDOW", self.on_close)
         self.master.bind("<Escape>", lambda _: self.on_close())
 
-    def _configure_styles(self) -> None:
-        self.node_metadata: Dict[str, Dict[str, object]] = {}
-        self.column_cache: Dict[str, List[str]] = {}
+        # Staged startup: the window paints first.  Schema setup (and seeding
+        # an empty catalog) runs on a worker thread; the first queries then run
+        # one stage per idle pass on the Tk thread.
+        self.init_thread = threading.Thread(target=self._prepare_catalog, name="catalog-init", daemon=True)
+        self.init_thread.start()
+        self.startup_job = self.master.after(STARTUP_POLL_MS, self.wait_for_catalog)
 
-        self._build_ui()
-        self.populate_tree()
-        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+    def _prepare_catalog(self) -> None:
+        if self.read_only:
+            return
+        try:
+            initialize_database(self.db_file)
+        except (OSError, sqlite3.Error) as error:
+            self.startup_error = error
 
-    def _build_ui(self) -> None:
+    def wait_for_catalog(self) -> None:
+        if self.init_thread.is_alive():
+            self.startup_job = self.master.after(STARTUP_POLL_MS, self.wait_for_catalog)
+            return
+        self.run_stages(
+            [
+                self.open_catalog,
+                self.refresh_country_options,
+                self.refresh_attribute_values,
+                self.refresh_platform_list,
+                self.populate_tree,
+                self.finish_startup,
+            ]
+        )
+
+    def run_stages(self, stages: List[Callable[[], None]]) -> None:
+        """Run the first stage now and the rest on later idle passes; stop after a failed open."""
+
+        self.startup_job = None
+        stage, rest = stages[0], stages[1:]
+        stage()
+        if rest and self.conn is not None:
+            self.startup_job = self.master.after_idle(self.run_stages, rest)
+
+    def open_catalog(self) -> None:
+        if self.startup_error is None:
+            try:
+                self.connect_catalog()
+            except (OSError, ValueError, sqlite3.Error) as error:
+                self.startup_error = error
+        if self.startup_error is not None:
+            self.loading = False
+            self.display_message([f"Could not open the catalog: {self.startup_error}"])
+
+    def connect_catalog(self) -> None:
+        # Optional backends are imported here so they stay off the first-paint path.
+        from catalog_reports import RollupCache
+        from catalog_similar import SimilarityIndex
+
+        if self.shard_map:
+            from catalog_shards import ShardedCatalog, ShardedRollups, ShardMap
+
+            self.shards = ShardedCatalog(ShardMap.load(self.shard_map))
+            self.rollups = ShardedRollups(self.shards)
+            # Shard files are browsed as a federation; searches and summaries scatter-gather.
+            self.federation = Federation(self.shards.map.shards)
+            title = f" (sharded: {', '.join(self.shards.map.names)})"
+        elif self.sources:
+            self.federation = Federation(self.sources)
+            title = f" (federated: {', '.join(self.federation.aliases)})"
+        else:
+            title = " (read-only)" if self.read_only else ""
+        self.master.title("CMSDB Military Catalog" + title)
+
+        if self.federation is not None:
+            conn = self.federation.conn
+        elif self.read_only:
+            from catalog_snapshot import connect_read_only
+
+            conn = connect_read_only(self.db_file)
+        else:
+            conn = connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        self.conn = conn
+
+        if self.federation is None:
+            # Federated and sharded views span several change logs; only single catalogs are cached.
+            self.cache = CatalogCache(conn, default_cache_path(self.db_file))
+
+        if self.federation is None and (os.cpu_count() or 1) > 1:
+            from catalog_parallel import ReadPool
+
+            # Multi-table searches run one table per core, each on its own read connection.
+            self.read_pool = ReadPool(self.db_file, immutable=self.read_only)
+
+        if self.curate:
+            from catalog_edit import EditBatch
+
+            self.edits = EditBatch(conn)
+
+        self.bitmap_index = BitmapIndex(self.conn)
+        if self.rollups is None:
+            self.rollups = RollupCache(self.conn)
+        self.similar_index = SimilarityIndex(self.conn)
+
+    def finish_startup(self) -> None:
+        # Immutable snapshots never change, so only live catalogs are watched.
+        if self.watch and (self.federation is not None or not self.read_only):
+            from catalog_watch import ChangeWatcher
+
+            self.watcher = ChangeWatcher(self.watched_files())
+            self.watcher.start()
+            self.watch_job = self.master.after(WATCH_TICK_MS, self.check_changes)
+        self.rebuild_suggestions()
+        self.loading = False
+
+    def _configure_styles(self) -> None:
         style = ttk.Style()
         try:
             style.theme_use("clam")
@@ -130,19 +285,27 @@ class MilitaryCatalogApp:
             "Filter.TCombobox",
             fieldbackground=[("readonly", LIST_BG)],
             foreground=[("readonly", TEXT_COLOR)],
+        )
         style.configure(
             "Treeview",
-            background="#001b00",
-            foreground="#00ff66",
-            fieldbackground="#001b00",
-            font=("Courier", 11),
+            background=LIST_BG,
+            foreground=TEXT_COLOR,
+            fieldbackground=LIST_BG,
+            font=LIST_FONT,
             rowheight=24,
             borderwidth=0,
         )
         style.map(
             "Treeview",
-            background=[("selected", "#013220")],
-            foreground=[("selected", "#a6ffae")],
+            background=[("selected", ACCENT_COLOR)],
+            foreground=[("selected", DARK_BG)],
+        )
+        style.configure("TNotebook", background=PANEL_BG, borderwidth=0)
+        style.configure("TNotebook.Tab", background=LIST_BG, foreground=TEXT_COLOR, font=("Courier", 11))
+        style.map(
+            "TNotebook.Tab",
+            background=[("selected", PANEL_BG)],
+            foreground=[("selected", ACCENT_COLOR)],
         )
         style.configure(
             "Vertical.TScrollbar",
@@ -175,10 +338,23 @@ class MilitaryCatalogApp:
         )
         title_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        export_button = tk.Button(
+            header,
+            text="Export…",
+            command=self.on_export,
+            bg=LIST_BG,
+            fg=ACCENT_COLOR,
+            activebackground=ACCENT_COLOR,
+            activeforeground=DARK_BG,
+            relief=tk.FLAT,
+            font=("Courier", 10),
+        )
+        export_button.pack(side=tk.RIGHT)
+
         content = tk.Frame(self.master, bg=DARK_BG)
         content.pack(fill=tk.BOTH, expand=True, padx=24, pady=(0, 24))
 
-        filters_panel = tk.Frame(content, bg=PANEL_BG, padx=18, pady=18)
+        filters_panel = tk.Frame(content, bg=PANEL_BG, padx=18, pady=18, width=240)
         filters_panel.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 18))
         filters_panel.pack_propagate(False)
 
@@ -201,7 +377,7 @@ class MilitaryCatalogApp:
             style="Filter.TCombobox",
         )
         self.type_menu.pack(fill=tk.X, pady=(6, 18))
-        self.type_menu.bind("<<ComboboxSelected>>", self.on_filter_change)
+        self.type_menu.bind("<<ComboboxSelected>>", self.on_type_change)
 
         filter_by_label = tk.Label(
             filters_panel,
@@ -234,7 +410,23 @@ class MilitaryCatalogApp:
             font=TEXT_FONT,
         )
         self.class_entry.pack(fill=tk.X, pady=(4, 12))
-        self.class_entry.bind("<KeyRelease>", self.on_filter_change)
+        self.class_entry.bind("<KeyRelease>", self.on_class_key)
+
+        # Completions for the keyword, shown under the entry while there are any.
+        self.class_suggestions = tk.Listbox(
+            filters_panel,
+            bg=LIST_BG,
+            fg=ACCENT_COLOR,
+            selectbackground=ACCENT_COLOR,
+            selectforeground=DARK_BG,
+            activestyle="none",
+            relief=tk.FLAT,
+            font=("Courier", 10),
+            highlightthickness=0,
+            exportselection=False,
+        )
+        self.class_suggestions.bind("<ButtonRelease-1>", self.on_class_suggestion)
+        self.class_suggestions.bind("<Return>", self.on_class_suggestion)
 
         country_label = tk.Label(
             filters_panel,
@@ -246,32 +438,61 @@ class MilitaryCatalogApp:
         )
         country_label.pack(fill=tk.X)
 
-        self.country_var = tk.StringVar(value="All Countries")
+        self.country_var = tk.StringVar(value=ALL_COUNTRIES)
         self.country_menu = ttk.Combobox(
             filters_panel,
             textvariable=self.country_var,
-            values=("All Countries",),
-            state="readonly",
+            values=(ALL_COUNTRIES,),
             style="Filter.TCombobox",
         )
         self.country_menu.pack(fill=tk.X, pady=(4, 0))
-        self.country_menu.bind("<<ComboboxSelected>>", self.on_filter_change)
+        self.country_menu.bind("<<ComboboxSelected>>", self.on_country_selected)
+        self.country_menu.bind("<KeyRelease>", self.on_country_key)
+        self.country_menu.bind("<Return>", self.on_country_return)
+
+        self._build_range_panel(filters_panel)
+
+        facets_label = tk.Label(
+            filters_panel,
+            text="Matches",
+            fg=TEXT_COLOR,
+            bg=PANEL_BG,
+            font=LABEL_FONT,
+            anchor="w",
+        )
+        facets_label.pack(fill=tk.X, pady=(12, 0))
+
+        self.facet_text = tk.Text(
+            filters_panel,
+            bg=PANEL_BG,
+            fg=TEXT_COLOR,
+            relief=tk.FLAT,
+            font=("Courier", 10),
+            wrap=tk.WORD,
+            height=8,
+            highlightthickness=0,
+        )
+        self.facet_text.pack(fill=tk.BOTH, expand=True, pady=(4, 0))
+        self.facet_text.configure(state=tk.DISABLED)
 
         right_panel = tk.Frame(content, bg=PANEL_BG, padx=18, pady=18)
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
-        list_label = tk.Label(
+        self.browser_tabs = ttk.Notebook(right_panel)
+        self.browser_tabs.pack(fill=tk.BOTH, expand=True)
+
+        render_status_label = tk.Label(
             right_panel,
-            text="Available Platforms",
-            fg=TEXT_COLOR,
+            textvariable=self.render_status,
+            fg=ACCENT_COLOR,
             bg=PANEL_BG,
-            font=LABEL_FONT,
+            font=LIST_FONT,
             anchor="w",
         )
-        list_label.pack(fill=tk.X)
+        render_status_label.pack(fill=tk.X, pady=(2, 12))
 
-        list_container = tk.Frame(right_panel, bg=PANEL_BG)
-        list_container.pack(fill=tk.BOTH, expand=True, pady=(8, 16))
+        list_container = tk.Frame(self.browser_tabs, bg=PANEL_BG)
+        self.browser_tabs.add(list_container, text="Available Platforms")
 
         self.platform_list = tk.Listbox(
             list_container,
@@ -287,67 +508,73 @@ class MilitaryCatalogApp:
         )
         self.platform_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        list_scroll = ttk.Scrollbar(
+        self.list_scroll = ttk.Scrollbar(
             list_container,
             orient=tk.VERTICAL,
             command=self.platform_list.yview,
             style="Vertical.TScrollbar",
         )
-        list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.platform_list.configure(yscrollcommand=list_scroll.set)
+        self.list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.platform_list.configure(yscrollcommand=self.on_list_scroll)
         self.platform_list.bind("<<ListboxSelect>>", self.on_platform_select)
 
-        details_label = tk.Label(
-            right_panel,
-            text="Details",
-            fg=TEXT_COLOR,
-            bg=PANEL_BG,
-            font=LABEL_FONT,
-            background="#001b00",
-            darkcolor="#001b00",
-            lightcolor="#001b00",
-            troughcolor="#000a00",
-            bordercolor="#001b00",
-        )
+        tree_container = tk.Frame(self.browser_tabs, bg=PANEL_BG)
+        self.browser_tabs.add(tree_container, text="By Country")
 
-        title_label = tk.Label(
-            self.master,
-            text="CMSDB Military Catalog",
-            fg="#00ff66",
-            bg="#001b00",
-            font=("Courier", 18, "bold"),
-            pady=10,
+        self.tree = ttk.Treeview(tree_container, show="tree")
+        tree_scroll = ttk.Scrollbar(
+            tree_container,
+            orient=tk.VERTICAL,
+            command=self.tree.yview,
+            style="Vertical.TScrollbar",
         )
-        title_label.pack(fill=tk.X)
-
-        separator = ttk.Separator(self.master, orient=tk.HORIZONTAL)
-        separator.pack(fill=tk.X, padx=18)
-
-        content = tk.Frame(self.master, bg="#001b00")
-        content.pack(fill=tk.BOTH, expand=True, padx=18, pady=18)
-
-        tree_frame = tk.Frame(content, bg="#001b00")
-        tree_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 12))
-
-        self.tree = ttk.Treeview(tree_frame, show="tree")
-        tree_scroll = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, style="Vertical.TScrollbar")
-        tree_scroll.configure(command=self.tree.yview)
         self.tree.configure(yscrollcommand=tree_scroll.set)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
 
-        details_frame = tk.Frame(content, bg="#001b00")
-        details_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        self.list_renderer = ChunkedRenderer(
+            self.platform_list, on_progress=lambda done, total: self.show_render_progress("Listing", done, total)
+        )
+        self.tree_renderer = ChunkedRenderer(
+            self.tree, on_progress=lambda done, total: self.show_render_progress("Building tree", done, total)
+        )
 
+        details_bar = tk.Frame(right_panel, bg=PANEL_BG)
+        details_bar.pack(fill=tk.X)
         details_label = tk.Label(
-            details_frame,
+            details_bar,
             text="Details",
-            fg="#00ff66",
-            bg="#001b00",
-            font=("Courier", 14, "bold"),
+            fg=TEXT_COLOR,
+            bg=PANEL_BG,
+            font=LABEL_FONT,
             anchor="w",
         )
-        details_label.pack(fill=tk.X)
+        details_label.pack(side=tk.LEFT)
+        self.as_of_var = tk.StringVar()
+        as_of_entry = tk.Entry(
+            details_bar,
+            textvariable=self.as_of_var,
+            bg=LIST_BG,
+            fg=TEXT_COLOR,
+            insertbackground=ACCENT_COLOR,
+            relief=tk.FLAT,
+            font=("Courier", 10),
+            width=24,
+        )
+        as_of_entry.pack(side=tk.RIGHT)
+        as_of_entry.bind("<Return>", self.on_as_of_change)
+        as_of_label = tk.Label(
+            details_bar,
+            text="As of (UTC)",
+            fg=TEXT_COLOR,
+            bg=PANEL_BG,
+            font=("Courier", 10),
+        )
+        as_of_label.pack(side=tk.RIGHT, padx=(0, 4))
+
+        if self.curate:
+            self._build_curation_bar(right_panel)
 
         self.details_text = tk.Text(
             right_panel,
@@ -359,7 +586,7 @@ class MilitaryCatalogApp:
             wrap=tk.WORD,
             height=12,
         )
-        self.details_text.pack(fill=tk.BOTH, expand=True, pady=(8, 0))
+        self.details_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, pady=(8, 0))
 
         detail_scroll = ttk.Scrollbar(
             right_panel,
@@ -367,7 +594,7 @@ class MilitaryCatalogApp:
             command=self.details_text.yview,
             style="Vertical.TScrollbar",
         )
-        detail_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        detail_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=(8, 0))
         self.details_text.configure(yscrollcommand=detail_scroll.set)
         self.details_text.configure(state=tk.DISABLED)
 
@@ -378,83 +605,349 @@ class MilitaryCatalogApp:
             ]
         )
 
-    def refresh_country_options(self) -> None:
-        cursor = self.conn.cursor()
-        countries = set()
-        for table in TABLES:
-            cursor.execute(
-                f"SELECT DISTINCT Country FROM {table} WHERE Country IS NOT NULL AND TRIM(Country) != ''"
+    def _build_curation_bar(self, parent: tk.Frame) -> None:
+        bar = tk.Frame(parent, bg=PANEL_BG)
+        bar.pack(fill=tk.X, pady=(4, 0))
+        for text, command in (
+            ("Edit", self.on_edit_record),
+            ("Stage", self.on_stage_edit),
+            ("Delete", self.on_delete_record),
+            ("Commit", self.on_commit_edits),
+            ("Discard", self.on_discard_edits),
+        ):
+            button = tk.Button(
+                bar,
+                text=text,
+                command=command,
+                bg=LIST_BG,
+                fg=ACCENT_COLOR,
+                activebackground=ACCENT_COLOR,
+                activeforeground=DARK_BG,
+                relief=tk.FLAT,
+                font=("Courier", 10),
             )
-            countries.update(row[0] for row in cursor.fetchall() if row[0])
-        countries.update(SPECIAL_COUNTRIES)
-        sorted_countries = sorted(countries)
-        values = ["All Countries", *sorted_countries]
+            button.pack(side=tk.LEFT, padx=(0, 4))
+        status = tk.Label(
+            bar,
+            textvariable=self.curation_status,
+            fg=ACCENT_COLOR,
+            bg=PANEL_BG,
+            font=("Courier", 10),
+            anchor="w",
+        )
+        status.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+
+    def _build_range_panel(self, parent: tk.Frame) -> None:
+        range_label = tk.Label(
+            parent,
+            text="Numeric range",
+            fg=TEXT_COLOR,
+            bg=PANEL_BG,
+            font=("Courier", 11),
+            anchor="w",
+        )
+        range_label.pack(fill=tk.X, pady=(12, 0))
+
+        self.range_column_var = tk.StringVar()
+        self.range_column_menu = ttk.Combobox(
+            parent,
+            textvariable=self.range_column_var,
+            values=(),
+            state="readonly",
+            style="Filter.TCombobox",
+        )
+        self.range_column_menu.pack(fill=tk.X, pady=(4, 4))
+
+        bounds = tk.Frame(parent, bg=PANEL_BG)
+        bounds.pack(fill=tk.X)
+        self.range_min_var = tk.StringVar()
+        self.range_max_var = tk.StringVar()
+        for variable in (self.range_min_var, self.range_max_var):
+            entry = tk.Entry(
+                bounds,
+                textvariable=variable,
+                bg=LIST_BG,
+                fg=TEXT_COLOR,
+                insertbackground=ACCENT_COLOR,
+                relief=tk.FLAT,
+                font=TEXT_FONT,
+                width=8,
+            )
+            entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 4))
+            entry.bind("<Return>", self.on_range_apply)
+
+        buttons = tk.Frame(parent, bg=PANEL_BG)
+        buttons.pack(fill=tk.X, pady=(4, 4))
+        for text, command in (("Apply", self.on_range_apply), ("Clear", self.on_range_clear)):
+            button = tk.Button(
+                buttons,
+                text=text,
+                command=command,
+                bg=LIST_BG,
+                fg=ACCENT_COLOR,
+                activebackground=ACCENT_COLOR,
+                activeforeground=DARK_BG,
+                relief=tk.FLAT,
+                font=("Courier", 10),
+            )
+            button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 4))
+
+        attribute_label = tk.Label(
+            parent,
+            text="Attribute",
+            fg=TEXT_COLOR,
+            bg=PANEL_BG,
+            font=("Courier", 11),
+            anchor="w",
+        )
+        attribute_label.pack(fill=tk.X, pady=(8, 0))
+
+        attribute_columns = [column for column in BITMAP_COLUMNS if column != "Country"]
+        self.attribute_column_var = tk.StringVar(value=attribute_columns[0])
+        self.attribute_column_menu = ttk.Combobox(
+            parent,
+            textvariable=self.attribute_column_var,
+            values=attribute_columns,
+            state="readonly",
+            style="Filter.TCombobox",
+        )
+        self.attribute_column_menu.pack(fill=tk.X, pady=(4, 4))
+        self.attribute_column_menu.bind("<<ComboboxSelected>>", lambda _: self.refresh_attribute_values())
+
+        self.attribute_value_var = tk.StringVar()
+        self.attribute_value_menu = ttk.Combobox(
+            parent,
+            textvariable=self.attribute_value_var,
+            values=(),
+            state="readonly",
+            style="Filter.TCombobox",
+        )
+        self.attribute_value_menu.pack(fill=tk.X, pady=(0, 4))
+        self.attribute_value_menu.bind("<<ComboboxSelected>>", self.on_attribute_add)
+
+        self.active_filter_list = tk.Listbox(
+            parent,
+            bg=LIST_BG,
+            fg=TEXT_COLOR,
+            selectbackground=ACCENT_COLOR,
+            selectforeground=DARK_BG,
+            activestyle="none",
+            relief=tk.FLAT,
+            font=("Courier", 10),
+            highlightthickness=0,
+            height=4,
+        )
+        self.active_filter_list.pack(fill=tk.X)
+        self.active_filter_list.bind("<Double-Button-1>", self.on_filter_remove)
+
+        self.refresh_range_columns()
+
+    def refresh_range_columns(self) -> None:
+        config = TYPE_CONFIG.get(self.type_var.get(), TYPE_CONFIG["All Types"])
+        columns = numeric_columns_for(config.get("tables", []))
+        self.range_column_menu.configure(values=columns)
+        if self.range_column_var.get() not in columns:
+            self.range_column_var.set(columns[0] if columns else "")
+
+    def refresh_attribute_values(self) -> None:
+        if self.bitmap_index is None:
+            return
+        column = self.attribute_column_var.get()
+        config = TYPE_CONFIG.get(self.type_var.get(), TYPE_CONFIG["All Types"])
+
+        def collect() -> List[str]:
+            self.bitmap_index.refresh()
+            values = set()
+            for table in config.get("tables", []):
+                values.update(self.bitmap_index.values(table, column))
+            return sorted(values)
+
+        if self.cache is not None:
+            # A hit leaves the bitmaps unbuilt until an attribute filter needs them.
+            values = self.cache.fetch(f"attributes:{self.type_var.get()}:{column}", collect)
+        else:
+            values = collect()
+        self.attribute_value_menu.configure(values=values)
+        self.attribute_value_var.set("")
+
+    def active_filter_keys(self) -> List[Tuple[str, str]]:
+        keys = [("range", column) for column in self.range_filters]
+        keys.extend(("attribute", column) for column in self.attribute_filters)
+        return keys
+
+    def refresh_active_filters(self) -> None:
+        self.active_filter_list.delete(0, tk.END)
+        for range_filter in self.range_filters.values():
+            self.active_filter_list.insert(tk.END, range_filter.describe())
+        for column, values in self.attribute_filters.items():
+            self.active_filter_list.insert(tk.END, f"{column}: {' | '.join(values)}")
+
+    def on_type_change(self, event: Optional[tk.Event] = None) -> None:
+        self.refresh_range_columns()
+        self.refresh_attribute_values()
+        self.refresh_platform_list()
+
+    def on_range_apply(self, event: Optional[tk.Event] = None) -> None:
+        column = self.range_column_var.get()
+        if not column:
+            return
+        try:
+            range_filter = parse_range(column, self.range_min_var.get(), self.range_max_var.get())
+        except ValueError:
+            self.display_message([f"Range bounds for {column} must be numbers."])
+            return
+        if range_filter is None:
+            self.range_filters.pop(column, None)
+        else:
+            self.range_filters[column] = range_filter
+        self.range_min_var.set("")
+        self.range_max_var.set("")
+        self.refresh_active_filters()
+        self.refresh_platform_list()
+
+    def on_attribute_add(self, event: Optional[tk.Event] = None) -> None:
+        column = self.attribute_column_var.get()
+        value = self.attribute_value_var.get()
+        if not column or not value:
+            return
+        values = self.attribute_filters.setdefault(column, [])
+        if value not in values:
+            values.append(value)
+        self.refresh_active_filters()
+        self.refresh_platform_list()
+
+    def on_filter_remove(self, event: Optional[tk.Event] = None) -> None:
+        selection = self.active_filter_list.curselection()
+        if not selection:
+            return
+        kind, column = self.active_filter_keys()[selection[0]]
+        if kind == "range":
+            del self.range_filters[column]
+        else:
+            del self.attribute_filters[column]
+        self.refresh_active_filters()
+        self.refresh_platform_list()
+
+    def on_range_clear(self) -> None:
+        self.range_filters.clear()
+        self.attribute_filters.clear()
+        self.refresh_active_filters()
+        self.refresh_platform_list()
+
+    def refresh_country_options(self) -> None:
+        if self.conn is None:
+            return
+        if self.cache is not None:
+            countries = self.cache.fetch("countries", lambda: sorted(query_countries(self.conn)))
+        else:
+            countries = query_countries(self.conn)
+        self.set_country_options(set(countries))
+
+    def set_country_options(self, countries: Set[str]) -> None:
+        self.country_options = sorted(countries)
+        values = [ALL_COUNTRIES, *self.country_options]
         self.country_menu.configure(values=values)
         if self.country_var.get() not in values:
-            self.country_var.set("All Countries")
+            self.country_var.set(ALL_COUNTRIES)
 
     def on_filter_change(self, event: Optional[tk.Event] = None) -> None:
         self.refresh_platform_list()
 
-    def refresh_platform_list(self) -> None:
-        self.platform_list.delete(0, tk.END)
-        self.platform_list.selection_clear(0, tk.END)
-        self.list_data = []
+    def on_class_key(self, event: tk.Event) -> None:
+        if event.keysym == "Down" and self.class_suggestions.size():
+            self.class_suggestions.focus_set()
+            self.class_suggestions.selection_clear(0, tk.END)
+            self.class_suggestions.selection_set(0)
+            return
+        self.on_filter_change()
+        self.show_class_suggestions()
+
+    def show_class_suggestions(self) -> None:
+        text = self.class_var.get().strip()
+        completions = self.suggestions.keywords.complete(text) if self.suggestions is not None else []
+        if len(completions) == 1 and completions[0].lower() == text.lower():
+            completions = []
+        self.class_suggestions.delete(0, tk.END)
+        if not completions:
+            self.class_suggestions.pack_forget()
+            return
+        self.class_suggestions.insert(tk.END, *completions)
+        self.class_suggestions.configure(height=len(completions))
+        self.class_suggestions.pack(fill=tk.X, after=self.class_entry, pady=(0, 12))
+
+    def on_class_suggestion(self, event: Optional[tk.Event] = None) -> None:
+        selection = self.class_suggestions.curselection()
+        if not selection:
+            return
+        self.class_var.set(self.class_suggestions.get(selection[0]))
+        self.class_suggestions.delete(0, tk.END)
+        self.class_suggestions.pack_forget()
+        self.class_entry.focus_set()
+        self.class_entry.icursor(tk.END)
+        self.on_filter_change()
 
-        selected_type = self.type_var.get()
-        config = TYPE_CONFIG.get(selected_type, TYPE_CONFIG["All Types"])
-        tables = config.get("tables", [])
-        keywords = [kw.lower() for kw in config.get("keywords", [])]
+    def complete_country(self, text: str) -> List[str]:
+        """Countries starting with ``text``, the most catalogued first once suggestions are built."""
 
-        class_filter = self.class_var.get().strip().lower()
-        country_filter = self.country_var.get()
+        if self.suggestions is not None:
+            return self.suggestions.countries.complete(text)
+        from catalog_suggest import SUGGEST_LIMIT
 
-        cursor = self.conn.cursor()
-        matches: List[Tuple[str, int, str, str]] = []
+        prefix = text.lower()
+        return [country for country in self.country_options if country.lower().startswith(prefix)][:SUGGEST_LIMIT]
 
-        for table in tables:
-            if table not in TABLES:
-                continue
+    def on_country_key(self, event: tk.Event) -> None:
+        if event.keysym in ("Return", "Up", "Down", "Tab"):
+            return
+        text = self.country_var.get().strip()
+        if text and text != ALL_COUNTRIES:
+            self.country_menu.configure(values=[ALL_COUNTRIES, *self.complete_country(text)])
+        else:
+            self.country_menu.configure(values=[ALL_COUNTRIES, *self.country_options])
+
+    def on_country_return(self, event: Optional[tk.Event] = None) -> None:
+        text = self.country_var.get().strip()
+        if text not in self.country_options:
+            completions = self.complete_country(text) if text else []
+            self.country_var.set(completions[0] if completions else ALL_COUNTRIES)
+        self.on_country_selected()
+
+    def on_country_selected(self, event: Optional[tk.Event] = None) -> None:
+        self.country_menu.configure(values=[ALL_COUNTRIES, *self.country_options])
+        self.on_filter_change()
+
+    def current_filters(self) -> SearchFilters:
+        country = self.country_var.get()
+        return SearchFilters(
+            type_name=self.type_var.get(),
+            class_filter=self.class_var.get(),
+            # The country box is editable; text that is not (yet) a country does not filter.
+            country=country if country in self.country_options else ALL_COUNTRIES,
+            ranges=tuple(self.range_filters.values()),
+            attributes=tuple((column, tuple(values)) for column, values in self.attribute_filters.items()),
+        )
 
-            conditions: List[str] = []
-            params: List[object] = []
-
-            if country_filter and country_filter != "All Countries":
-                conditions.append("Country = ?")
-                params.append(country_filter)
-
-            if class_filter:
-                like_value = f"%{class_filter}%"
-                conditions.append(
-                    "(LOWER(IFNULL(Name, '')) LIKE ? OR "
-                    "LOWER(IFNULL(Category, '')) LIKE ? OR "
-                    "LOWER(IFNULL(Type, '')) LIKE ?)"
-                )
-                params.extend([like_value, like_value, like_value])
-
-            if keywords:
-                keyword_clauses: List[str] = []
-                for keyword in keywords:
-                    keyword_clauses.append(
-                        "(LOWER(IFNULL(Category, '')) LIKE ? OR LOWER(IFNULL(Type, '')) LIKE ?)"
-                    )
-                    pattern = f"%{keyword}%"
-                    params.extend([pattern, pattern])
-                if keyword_clauses:
-                    conditions.append("(" + " OR ".join(keyword_clauses) + ")")
-
-            query = f"SELECT id, Name, Country FROM {table}"
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            query += " ORDER BY LOWER(IFNULL(Name, ''))"
-
-            cursor.execute(query, params)
-            for row in cursor.fetchall():
-                name = row["Name"] or "(Unnamed)"
-                country = row["Country"] or "Unknown"
-                matches.append((table, row["id"], name, country))
-
-        matches.sort(key=lambda item: item[2].lower())
+    def refresh_platform_list(self) -> None:
+        if self.conn is None:
+            # Still opening; the startup stages list with the filters set by then.
+            return
+
+        filters = self.current_filters()
+        key = list_cache_key(filters)
+        if self.cache is not None and key is not None:
+            # Unfiltered listings come from the startup cache: the first page plus exact facets.
+            matches, total, table_facets = self.cache.fetch(
+                key, lambda: self.search_platforms(filters), encode_list, decode_list
+            )
+        else:
+            matches, total, table_facets = self.search_platforms(filters)
+        # A copy: live updates recount tables in place while the cache writer may still be encoding.
+        self.table_facets = dict(table_facets)
+        self.list_complete = len(matches) >= total
+        self.show_facets(self.merged_facets(), None if self.list_complete else len(matches))
+
+        texts = self.format_rows(matches, filters)
+        self.update_platform_rows([(table, record_id) for table, record_id, _, _ in matches], texts)
 
         display_hint = "Select a platform from the list to view its details."
         if not matches:
@@ -465,17 +958,273 @@ class MilitaryCatalogApp:
                 ]
             )
             return
+        self.display_message([display_hint])
 
-        for table, record_id, name, country in matches:
-            if selected_type == "Drones":
-                display_type = "Drone"
-            else:
-                display_type = TABLE_DISPLAY_NAMES.get(table, table)
-            entry_text = f"{name} — {country} [{display_type}]"
-            self.platform_list.insert(tk.END, entry_text)
-            self.list_data.append((table, record_id))
+    def search_platforms(self, filters: SearchFilters) -> ListResult:
+        bitmaps = None
+        if filters.attributes:
+            self.bitmap_index.refresh()
+            bitmaps = self.bitmap_index
+        table_facets: Dict[str, FacetCounter] = {}
+        if self.shards is not None:
+            matches = self.shards.search(filters, FacetCounter(), table_facets)
+        elif self.read_pool is not None and len(filters.tables) > 1:
+            from catalog_parallel import parallel_search
+
+            matches = parallel_search(self.read_pool, filters, bitmaps=bitmaps, table_facets=table_facets)
+        else:
+            matches = search_catalog(self.conn, filters, bitmaps=bitmaps, table_facets=table_facets)
+        return matches, len(matches), table_facets
 
-        self.display_message([display_hint])
+    def on_list_scroll(self, first: str, last: str) -> None:
+        self.list_scroll.set(first, last)
+        if not self.list_complete and float(last) >= 1.0 and not self.list_renderer.busy:
+            self.list_complete = True
+            self.master.after_idle(self.load_remaining_rows)
+
+    def load_remaining_rows(self) -> None:
+        """Append the rows past a cached first page once the list is scrolled to its end."""
+
+        if self.conn is None:
+            return
+        filters = self.current_filters()
+        matches, _, self.table_facets = self.search_platforms(filters)
+        keys = [(table, record_id) for table, record_id, _, _ in matches]
+        shown = len(self.list_data)
+        if keys[:shown] != self.list_data.keys():
+            self.refresh_platform_list()
+            return
+        tail = self.format_rows(matches[shown:], filters)
+        self.list_data.extend(keys[shown:], tail)
+        self.list_renderer.run(len(tail), listbox_slices(self.platform_list, tail, tk.END))
+        self.show_facets(self.merged_facets(), None if self.list_complete else len(self.list_data))
+
+    def format_rows(self, matches: Sequence[Match], filters: SearchFilters) -> List[str]:
+        texts = [
+            f"{name} — {country} [{display_type(table, filters)}]" for table, _, name, country in matches
+        ]
+        if self.federation is not None:
+            source_of = self.federation.source_of
+            texts = [f"{text} · {source_of(record_id)}" for text, (_, record_id, _, _) in zip(texts, matches)]
+        return texts
+
+    def update_platform_rows(
+        self,
+        keys: List[Tuple[str, int]],
+        texts: List[str],
+        plan: Optional[Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]] = None,
+    ) -> None:
+        """Bring the listbox to ``texts`` by editing only changed rows when possible.
+
+        Selection and the top visible row are carried over by key.  A render
+        still in flight, or a heavily fragmented edit, falls back to a full
+        chunked rebuild.  ``plan`` skips the diff when the caller already
+        knows the edit.
+        """
+
+        old_keys = self.list_data.keys()
+        if plan is None and not self.list_renderer.busy:
+            plan = plan_list_edits(old_keys, keys, self.list_data.texts, texts)
+        if plan is None:
+            self.list_renderer.cancel()
+            self.platform_list.delete(0, tk.END)
+            self.platform_list.selection_clear(0, tk.END)
+            self.list_renderer.run(len(texts), listbox_slices(self.platform_list, texts, tk.END))
+            self.list_data.clear()
+            self.list_data.extend(keys, texts)
+            return
+
+        selection = self.platform_list.curselection()
+        selected_key = old_keys[selection[0]] if selection else None
+        top_index = self.platform_list.nearest(0) if old_keys else 0
+        apply_list_edits(self.platform_list, plan, texts)
+        deletes, inserts = plan
+        for first, last in reversed(deletes):
+            del self.list_data[first:last + 1]
+        for first, last in inserts:
+            for index in range(first, last + 1):
+                self.list_data.insert(index, *keys[index], texts[index])
+
+        positions = {key: index for index, key in enumerate(keys)} if selected_key or top_index else {}
+        self.platform_list.selection_clear(0, tk.END)
+        if selected_key in positions:
+            self.platform_list.selection_set(positions[selected_key])
+        if top_index:
+            for key in old_keys[top_index:]:
+                if key in positions:
+                    self.platform_list.yview(positions[key])
+                    break
+
+    def show_render_progress(self, label: str, done: int, total: int) -> None:
+        self.render_status.set("" if done >= total else f"{label}… {done:,} of {total:,}")
+
+    def on_export(self) -> None:
+        """Stream the current filter's full result to a file chosen by the user."""
+
+        if self.conn is None or self.export_thread is not None:
+            return
+        from tkinter import filedialog
+
+        path = filedialog.asksaveasfilename(
+            parent=self.master,
+            title="Export results",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON lines", "*.jsonl"), ("Columnar archive", "*.cmsdb")],
+        )
+        if not path:
+            return
+        self.export_outcome = None
+        self.export_thread = threading.Thread(
+            target=self.export_results, args=(path, self.current_filters()), name="catalog-export", daemon=True
+        )
+        self.export_thread.start()
+        self.render_status.set(f"Exporting to {path}…")
+        self.export_job = self.master.after(EXPORT_POLL_MS, self.wait_for_export)
+
+    @contextmanager
+    def worker_connection(self) -> Iterator[sqlite3.Connection]:
+        """A connection of its own to the open catalog, for a worker thread."""
+
+        if self.federation is not None:
+            federation = Federation(self.federation.sources)
+            try:
+                yield federation.conn
+            finally:
+                federation.close()
+            return
+        if self.read_only:
+            from catalog_snapshot import connect_read_only
+
+            conn = connect_read_only(self.db_file)
+        else:
+            conn = connect(self.db_file)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def export_results(self, path: str, filters: SearchFilters) -> None:
+        """Runs on the export thread, with connections of its own."""
+
+        from catalog_export import export_results
+
+        try:
+            with self.worker_connection() as conn:
+                self.export_outcome = export_results(conn, path, filters)
+        except (OSError, ValueError, sqlite3.Error) as error:
+            self.export_outcome = error
+
+    def wait_for_export(self) -> None:
+        if self.export_thread is not None and self.export_thread.is_alive():
+            self.export_job = self.master.after(EXPORT_POLL_MS, self.wait_for_export)
+            return
+        self.export_job = None
+        self.export_thread = None
+        outcome = self.export_outcome
+        if isinstance(outcome, Exception):
+            self.render_status.set(f"Export failed: {outcome}")
+        elif outcome is not None:
+            self.render_status.set(outcome.describe())
+
+    def rebuild_suggestions(self) -> None:
+        """Index keyword and country completions on a worker thread; a rebuild asked for mid-build runs after it."""
+
+        if self.suggest_thread is not None:
+            self.suggestions_stale = True
+            return
+        self.suggestions_stale = False
+        self.suggest_outcome = None
+        self.suggest_thread = threading.Thread(target=self.build_suggestions, name="catalog-suggest", daemon=True)
+        self.suggest_thread.start()
+        self.suggest_job = self.master.after(SUGGEST_POLL_MS, self.wait_for_suggestions)
+
+    def build_suggestions(self) -> None:
+        """Runs on the suggestion thread, with connections of its own."""
+
+        from catalog_suggest import CatalogSuggestions
+
+        try:
+            with self.worker_connection() as conn:
+                self.suggest_outcome = CatalogSuggestions.build(conn)
+        except (OSError, sqlite3.Error) as error:
+            self.suggest_outcome = error
+
+    def wait_for_suggestions(self) -> None:
+        if self.suggest_thread is not None and self.suggest_thread.is_alive():
+            self.suggest_job = self.master.after(SUGGEST_POLL_MS, self.wait_for_suggestions)
+            return
+        self.suggest_job = None
+        self.suggest_thread = None
+        outcome = self.suggest_outcome
+        if isinstance(outcome, Exception):
+            self.render_status.set(f"Suggestions unavailable: {outcome}")
+        elif outcome is not None:
+            self.suggestions = outcome
+        if self.suggestions_stale:
+            self.rebuild_suggestions()
+
+    def index_similar(self, table: str) -> None:
+        """Build ``table``'s similarity vectors on a worker thread; the details are re-shown when they are ready."""
+
+        if self.similar_thread is not None:
+            # Finishing re-shows the details, which then ask for whichever table they need.
+            return
+        self.similar_table = table
+        self.similar_stale = False
+        self.similar_outcome = None
+        self.similar_thread = threading.Thread(target=self.build_similar, args=(table,), name="catalog-similar", daemon=True)
+        self.similar_thread.start()
+        self.similar_job = self.master.after(SIMILAR_POLL_MS, self.wait_for_similar)
+
+    def build_similar(self, table: str) -> None:
+        """Runs on the similarity thread, with connections of its own."""
+
+        from catalog_similar import TableVectors
+
+        try:
+            with self.worker_connection() as conn:
+                self.similar_outcome = TableVectors(conn, table)
+        except (OSError, sqlite3.Error) as error:
+            self.similar_outcome = error
+
+    def wait_for_similar(self) -> None:
+        if self.similar_thread is not None and self.similar_thread.is_alive():
+            self.similar_job = self.master.after(SIMILAR_POLL_MS, self.wait_for_similar)
+            return
+        self.similar_job = None
+        self.similar_thread = None
+        outcome = self.similar_outcome
+        if isinstance(outcome, Exception):
+            self.render_status.set(f"Similar entries unavailable: {outcome}")
+            return
+        if outcome is not None and not self.similar_stale:
+            self.similar_index.store(outcome)
+        if self.detail_key is not None and self.detail_as_of is None and self.edit_target is None:
+            self.show_unit_details(*self.detail_key)
+
+    def invalidate_similar(self, tables: Optional[Set[str]] = None) -> None:
+        """Drop the similarity vectors of changed ``tables`` (all if ``None``), including one mid-build."""
+
+        self.similar_index.invalidate(tables)
+        if self.similar_thread is not None and (tables is None or self.similar_table in tables):
+            self.similar_stale = True
+
+    def merged_facets(self) -> FacetCounter:
+        facets = FacetCounter()
+        for counter in self.table_facets.values():
+            facets.merge(counter)
+        return facets
+
+    def show_facets(self, facets: FacetCounter, listed: Optional[int] = None) -> None:
+        """Facet summary; ``listed`` notes a list showing only its first rows."""
+
+        lines = [f"{facets.total} matches", *facets.summary_lines()]
+        if listed is not None:
+            lines[0] += f" (first {listed:,} listed; scroll to the end for the rest)"
+        self.facet_text.configure(state=tk.NORMAL)
+        self.facet_text.delete("1.0", tk.END)
+        self.facet_text.insert(tk.END, "\n".join(lines))
+        self.facet_text.configure(state=tk.DISABLED)
 
     def on_platform_select(self, event: tk.Event) -> None:  # pragma: no cover - UI callback
         if not self.list_data:
@@ -485,74 +1234,43 @@ class MilitaryCatalogApp:
             return
         index = selection[0]
         table, record_id = self.list_data[index]
-        self.show_unit_details(table, record_id)
-            details_frame,
-            bg="#000f00",
-            fg="#00ff66",
-            insertbackground="#00ff66",
-            font=("Courier", 12),
-            relief=tk.FLAT,
-            wrap=tk.WORD,
-            height=10,
-        )
-        self.details_text.pack(fill=tk.BOTH, expand=True, pady=(6, 0))
-
-        detail_scroll = ttk.Scrollbar(details_frame, orient=tk.VERTICAL, style="Vertical.TScrollbar")
-        detail_scroll.configure(command=self.details_text.yview)
-        self.details_text.configure(yscrollcommand=detail_scroll.set)
-        detail_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.details_text.configure(state=tk.DISABLED)
-        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
-        self.master.bind("<Escape>", lambda _: self.on_close())
+        self.show_unit_details(table, record_id, self.detail_as_of)
 
     def populate_tree(self) -> None:
+        if self.conn is None:
+            return
+        self.tree_renderer.cancel()
         self.tree.delete(*self.tree.get_children())
-        self.node_metadata.clear()
-        country_nodes: Dict[str, str] = {}
-        category_nodes: Dict[Tuple[str, str], str] = {}
-
-        cursor = self.conn.cursor()
-        for label, table in CATEGORY_TABLES.items():
-            cursor.execute(
-                f"SELECT id, Country, Name FROM {table} WHERE Country IS NOT NULL ORDER BY Country, Name"
-            )
-            for row in cursor.fetchall():
-                country = row["Country"] or "Unknown"
-                name = row["Name"] or "(Unnamed)"
+        self.node_store.clear()
+        country_nodes = self.country_nodes = {}
+        category_nodes = self.category_nodes = {}
+
+        if self.cache is not None:
+            rows = self.cache.fetch("tree", lambda: query_tree_rows(self.conn), encode_tree, decode_tree)
+        else:
+            rows = query_tree_rows(self.conn)
 
+        def render(start: int, stop: int) -> None:
+            for label, table, record_id, country, name in rows[start:stop]:
                 country_node = country_nodes.get(country)
                 if not country_node:
-                    country_node = self.tree.insert("", tk.END, text=country, open=True)
+                    country_node = self.node_store.add_country(country)
+                    self.tree.insert("", tk.END, iid=country_node, text=country, open=True)
                     country_nodes[country] = country_node
-                    self.node_metadata[country_node] = {
-                        "type": "country",
-                        "name": country,
-                    }
 
                 category_key = (country, label)
                 category_node = category_nodes.get(category_key)
                 if not category_node:
-                    category_node = self.tree.insert(country_node, tk.END, text=label, open=False)
+                    category_node = self.node_store.add_category(table, country)
+                    self.tree.insert(country_node, tk.END, iid=category_node, text=label, open=False)
                     category_nodes[category_key] = category_node
-                    self.node_metadata[category_node] = {
-                        "type": "category",
-                        "table": table,
-                        "country": country,
-                        "label": label,
-                    }
-
-                unit_node = self.tree.insert(category_node, tk.END, text=name)
-                self.node_metadata[unit_node] = {
-                    "type": "unit",
-                    "table": table,
-                    "id": row["id"],
-                    "country": country,
-                    "label": label,
-                    "name": name,
-                }
-
-        if not country_nodes:
+
+                unit_node = self.node_store.add_unit(table, record_id, country)
+                self.tree.insert(category_node, tk.END, iid=unit_node, text=name)
+
+        self.tree_renderer.run(len(rows), render)
+
+        if not rows:
             self.display_message([
                 "No records found.",
                 "Run initialize_esm_db.py to seed the database with sample data.",
@@ -569,38 +1287,40 @@ class MilitaryCatalogApp:
         selection = self.tree.selection()
         if not selection:
             return
-        node_id = selection[0]
-        metadata = self.node_metadata.get(node_id)
-        if not metadata:
+        node = self.node_store.get(selection[0])
+        if node is None:
             return
 
-        node_type = metadata.get("type")
-        if node_type == "unit":
-            self.show_unit_details(metadata["table"], metadata["id"])
-        elif node_type == "category":
-            self.show_category_summary(metadata["table"], metadata["country"], metadata["label"])
-        elif node_type == "country":
-            self.show_country_summary(metadata["name"])
+        if node.kind == "unit":
+            self.show_unit_details(node.table, node.record_id, self.detail_as_of)
+        elif node.kind == "category":
+            self.show_category_summary(node.table, node.country, node.label)
+        elif node.kind == "country":
+            self.show_country_summary(node.country)
 
     def show_country_summary(self, country: str) -> None:
-        cursor = self.conn.cursor()
+        from catalog_reports import format_rollup
+
+        rollup = self.rollups.get()["by_country"].get(country)
         lines = [f"{country} inventory summary:"]
-        for label, table in CATEGORY_TABLES.items():
-            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE Country = ?", (country,))
-            count = cursor.fetchone()[0]
-            if count:
-                lines.append(f"  {label}: {count}")
-        if len(lines) == 1:
+        if rollup is None:
             lines.append("  No entries in catalog.")
+        else:
+            for label, count in rollup["categories"].items():
+                if count:
+                    lines.append(f"  {label}: {count}")
+            lines.append("")
+            lines.append("Order of battle:")
+            lines.extend(format_rollup(rollup))
         self.display_message(lines)
 
     def show_category_summary(self, table: str, country: str, label: str) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            f"SELECT Name FROM {table} WHERE Country = ? ORDER BY Name",
-            (country,),
-        )
-        names = [row["Name"] or "(Unnamed)" for row in cursor.fetchall()]
+        if self.shards is not None:
+            names = self.shards.category_names(table, country)
+        else:
+            cursor = self.conn.cursor()
+            cursor.execute(QUERIES.table_query(CATEGORY_NAMES, table), (country,))
+            names = [row["Name"] or "(Unnamed)" for row in cursor.fetchall()]
         lines = [f"{country} — {label}"]
         if not names:
             lines.append("No entries found.")
@@ -609,43 +1329,332 @@ class MilitaryCatalogApp:
             lines.extend(f" • {name}" for name in names)
         self.display_message(lines)
 
-    def get_table_columns(self, table: str) -> List[str]:
-        if table not in self.column_cache:
+    def watched_files(self) -> List[str]:
+        """Catalog files in federation order, so watcher ids match the browser's ids."""
+
+        if self.shards is not None:
+            return [self.shards.map.shards[name] for name in self.shards.map.names]
+        if self.federation is not None:
+            return list(self.federation.sources.values())
+        return [self.db_file]
+
+    def check_changes(self) -> None:
+        self.watch_job = None
+        change = self.watcher.poll()
+        if change is not None:
+            self.apply_changes(change)
+        self.watch_job = self.master.after(WATCH_TICK_MS, self.check_changes)
+
+    def source_rows(
+        self, rows: Dict[str, Set[int]]
+    ) -> Iterator[Tuple[int, sqlite3.Connection, Dict[str, List[int]]]]:
+        """``(id base, connection, table -> local ids)`` per catalog holding some of ``rows``."""
+
+        if self.federation is None:
+            yield 0, self.conn, {table: sorted(ids) for table, ids in rows.items()}
+            return
+        grouped: Dict[int, Dict[str, List[int]]] = {}
+        for table, ids in rows.items():
+            for global_id in sorted(ids):
+                index, record_id = decode_id(global_id)
+                grouped.setdefault(index, {}).setdefault(table, []).append(record_id)
+        for index, local_rows in sorted(grouped.items()):
+            if index < len(self.federation.aliases):
+                alias = self.federation.aliases[index]
+                yield encode_id(index, 0), self.federation.source_connection(alias), local_rows
+
+    def apply_changes(self, change: "ChangeSet") -> None:
+        """Refresh the list rows, tree nodes and details touched by ``change``.
+
+        Cached rollups and bitmaps notice the new data version on their own;
+        similarity vectors are dropped for the changed tables only.  A change
+        without row detail rebuilds the views.
+        """
+
+        from catalog_suggest import UPDATE_LIMIT
+
+        if change.full:
+            self.invalidate_similar()
+            self.rebuild_suggestions()
+            self.refresh_country_options()
+            self.populate_tree()
+            self.refresh_platform_list()
+            return
+
+        self.invalidate_similar(set(change.rows))
+        # Small changes are folded into the suggestions here; large ones, or any during a build, rebuild them.
+        suggestions = self.suggestions
+        if self.suggest_thread is not None or sum(map(len, change.rows.values())) > UPDATE_LIMIT:
+            suggestions = None
+            self.rebuild_suggestions()
+        current: Dict[str, Dict[int, Tuple[str, str]]] = {}
+        for base, conn, local_rows in self.source_rows(change.rows):
+            if suggestions is not None:
+                suggestions.update(conn, local_rows, base)
+            for table, ids in local_rows.items():
+                query = QUERIES.table_query(TREE_ROWS_BY_ID, table)
+                found = current.setdefault(table, {})
+                for record_id, country, name in conn.execute(query, (json.dumps(ids),)):
+                    if country is not None:
+                        found[base + record_id] = (country or "Unknown", name or "(Unnamed)")
+
+        countries = {country for found in current.values() for country, _ in found.values()}
+        if not countries.issubset(self.country_options):
+            self.set_country_options(countries.union(self.country_options))
+        self.update_tree_nodes(change.rows, current)
+        self.update_list_rows(change.rows)
+        if self.detail_key is not None and self.detail_key[1] in change.rows.get(self.detail_key[0], ()):
+            self.show_unit_details(*self.detail_key, self.detail_as_of)
+
+    def update_list_rows(self, rows: Dict[str, Set[int]]) -> None:
+        if self.list_renderer.busy:
+            self.refresh_platform_list()
+            return
+        filters = self.current_filters()
+        matches: List[Match] = []
+        for base, conn, local_rows in self.source_rows(rows):
+            matches.extend(
+                (table, base + record_id, name, country)
+                for table, record_id, name, country in search_rows(conn, filters, local_rows)
+            )
+        keys = [(table, record_id) for table, record_id, _, _ in matches]
+        additions = list(zip(keys, self.format_rows(matches, filters)))
+        if not self.list_complete and self.list_data:
+            # Rows past a cached first page are not shown yet; they arrive with the rest.
+            bound = list_sort_key(self.list_data.texts[-1])
+            additions = [addition for addition in additions if list_sort_key(addition[1]) <= bound]
+        changed = {(table, record_id) for table, ids in rows.items() for record_id in ids}
+        keys, texts, plan = splice_rows(self.list_data.keys(), self.list_data.texts, changed, additions, list_sort_key)
+        self.update_platform_rows(keys, texts, plan)
+
+        # Only the changed tables are recounted; the others keep their share.
+        for table in rows:
+            if table in filters.tables:
+                self.table_facets[table] = count_facets(self.conn, filters, [table])
+        self.show_facets(self.merged_facets(), None if self.list_complete else len(self.list_data))
+
+    def update_tree_nodes(self, rows: Dict[str, Set[int]], current: Dict[str, Dict[int, Tuple[str, str]]]) -> None:
+        """Move, rename, add or drop the unit nodes for ``rows``; ``current`` holds their new state."""
+
+        if self.tree_renderer.busy:
+            self.populate_tree()
+            return
+        for table, ids in rows.items():
+            label = self.node_store.labels.get(table)
+            if label is None:
+                continue
+            found = current.get(table, {})
+            for record_id in ids:
+                iid = self.node_store.find_unit(table, record_id)
+                state = found.get(record_id)
+                parent = self.category_nodes.get((state[0], label)) if state else None
+                if iid is not None and (parent is None or self.tree.parent(iid) != parent):
+                    self.remove_unit_node(iid)
+                    iid = None
+                if state is None:
+                    continue
+                country, name = state
+                if parent is None:
+                    parent = self.category_node(table, label, country)
+                if iid is None:
+                    iid = self.node_store.add_unit(table, record_id, country)
+                    self.tree.insert(parent, tk.END, iid=iid, text=name)
+                else:
+                    self.tree.item(iid, text=name)
+                siblings = [child for child in self.tree.get_children(parent) if child != iid]
+                position = bisect_right(siblings, name, key=lambda child: self.tree.item(child, "text"))
+                self.tree.move(iid, parent, position)
+
+    def category_node(self, table: str, label: str, country: str) -> str:
+        country_node = self.country_nodes.get(country)
+        if country_node is None:
+            country_node = self.country_nodes[country] = self.node_store.add_country(country)
+            self.tree.insert("", tk.END, iid=country_node, text=country, open=True)
+        labels = list(CATEGORY_TABLES)
+        position = sum(
+            1 for (other_country, other), _ in self.category_nodes.items()
+            if other_country == country and labels.index(other) < labels.index(label)
+        )
+        category_node = self.category_nodes[(country, label)] = self.node_store.add_category(table, country)
+        self.tree.insert(country_node, position, iid=category_node, text=label, open=False)
+        return category_node
+
+    def remove_unit_node(self, iid: str) -> None:
+        """Delete a unit node, and its category and country nodes once they are empty."""
+
+        parent = self.tree.parent(iid)
+        self.tree.delete(iid)
+        self.node_store.forget_unit(iid)
+        for key, node in list(self.category_nodes.items()):
+            if node == parent and not self.tree.get_children(parent):
+                self.tree.delete(parent)
+                del self.category_nodes[key]
+                country_node = self.country_nodes.get(key[0])
+                if country_node is not None and not self.tree.get_children(country_node):
+                    self.tree.delete(country_node)
+                    del self.country_nodes[key[0]]
+
+    def show_unit_details(self, table: str, record_id: int, as_of: Optional[str] = None) -> None:
+        """Show a record, or with ``as_of`` (a history timestamp) the record as it stood then."""
+
+        if as_of is not None:
+            self.show_record_as_of(table, record_id, as_of)
+            return
+        if self.federation is not None:
+            row = self.federation.fetch(table, record_id)
+        else:
             cursor = self.conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table})")
-            self.column_cache[table] = [info[1] for info in cursor.fetchall() if info[1] != "id"]
-            columns = [info[1] for info in cursor.fetchall() if info[1] != "id"]
-            self.column_cache[table] = columns
-        return self.column_cache[table]
-
-    def show_unit_details(self, table: str, record_id: int) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (record_id,))
-        row = cursor.fetchone()
+            cursor.execute(QUERIES.table_query(RECORD_BY_ID, table), (record_id,))
+            row = cursor.fetchone()
         if row is None:
             self.display_message(["Record unavailable."])
+            self.detail_key = (table, record_id)
             return
 
-        columns = self.get_table_columns(table)
-        lines: List[str] = [row["Name"] or "Unnamed Entry", ""]
-        for column in columns:
-            if column == "Name":
-                continue
-        lines: List[str] = [f"{row['Name'] or 'Unnamed Entry'}"]
-        lines.append("".ljust(1))
-        for column in columns:
-            value = row[column]
-            if value in (None, ""):
-                continue
-            if isinstance(value, float):
-                value_text = f"{value:.2f}".rstrip("0").rstrip(".")
-            else:
-                value_text = str(value)
-            lines.append(f"{column}: {value_text}")
+        lines: List[str] = CODECS[table].format_blocks([tuple(row)], row.keys())
+
+        vectors = self.similar_index.cached(table)
+        if vectors is None:
+            lines.extend(["", "Similar: indexing…"])
+        else:
+            similar = vectors.similar_to(record_id)
+            if similar:
+                lines.extend(["", "Similar:"])
+                lines.extend(f" • {name} — {country}" for _, name, country, _ in similar)
 
         self.display_message(lines)
+        self.detail_key = (table, record_id)
+        if vectors is None:
+            self.index_similar(table)
+
+    def show_record_as_of(self, table: str, record_id: int, as_of: str) -> None:
+        from catalog_history import HistoryError, record_as_of
+
+        try:
+            if self.federation is not None:
+                raise HistoryError("History is not available for federated catalogs.")
+            values = record_as_of(self.conn, table, record_id, as_of)
+        except HistoryError as error:
+            self.display_message([str(error)])
+        else:
+            if values is None:
+                self.display_message([f"No such record as of {as_of} UTC."])
+            else:
+                lines = CODECS[table].format_blocks([tuple(values.values())], list(values))
+                self.display_message([*lines, "", f"As of {as_of} UTC"])
+        self.detail_key = (table, record_id)
+
+    def on_as_of_change(self, _event: Optional[tk.Event] = None) -> None:
+        """Show details as of the entered time, or live again once it is cleared."""
+
+        from catalog_history import HistoryError, as_of_time
+
+        if self.conn is None:
+            return
+        text = self.as_of_var.get().strip()
+        if not text:
+            self.detail_as_of = None
+        else:
+            try:
+                self.detail_as_of = as_of_time(self.conn, text)
+            except HistoryError as error:
+                self.render_status.set(str(error))
+                return
+            self.as_of_var.set(self.detail_as_of)
+        self.render_status.set("")
+        if self.detail_key is not None:
+            self.show_unit_details(*self.detail_key, self.detail_as_of)
+
+    def on_edit_record(self) -> None:
+        """Open the shown record's raw values for editing, one ``Column: value`` per line."""
+
+        from catalog_edit import read_record
+
+        if self.edits is None or self.detail_key is None:
+            return
+        table, record_id = self.detail_key
+        record = read_record(self.conn, table, record_id)
+        if record is None:
+            self.display_message(["Record unavailable."])
+            return
+        values, version = record
+        self.details_text.configure(state=tk.NORMAL)
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.insert(
+            tk.END,
+            "\n".join(f"{column}: {'' if value is None else value}" for column, value in values.items() if column != "id"),
+        )
+        self.edit_target = (table, record_id, values, version)
+        self.curation_status.set(f"Editing {table} #{record_id} (version {version}); Stage queues the changes")
+
+    def on_stage_edit(self) -> None:
+        from catalog_edit import EditError, validate_values
+
+        if self.edits is None or self.edit_target is None:
+            return
+        table, record_id, original, version = self.edit_target
+        entered: Dict[str, str] = {}
+        for line in self.details_text.get("1.0", "end-1c").splitlines():
+            if line.strip():
+                column, _, value = line.partition(":")
+                entered[column.strip()] = value.strip()
+        try:
+            changes = {column: value for column, value in validate_values(table, entered) if value != original.get(column)}
+            self.edits.update(table, record_id, changes, version)
+        except EditError as error:
+            self.curation_status.set(str(error))
+            return
+        self.show_unit_details(table, record_id)
+        self.show_pending_edits(f"Staged {len(changes)} changes to {table} #{record_id}")
+
+    def on_delete_record(self) -> None:
+        from catalog_edit import current_version
+
+        if self.edits is None or self.detail_key is None:
+            return
+        table, record_id = self.detail_key
+        version = current_version(self.conn, table, record_id)
+        if version is None:
+            return
+        self.edits.delete(table, record_id, version)
+        self.show_pending_edits(f"Staged deletion of {table} #{record_id}")
+
+    def on_commit_edits(self) -> None:
+        if not self.edits:
+            return
+        tables = {edit.table for edit in self.edits.pending}
+        try:
+            result = self.edits.commit()
+        except sqlite3.Error as error:
+            self.show_pending_edits(f"Commit failed: {error}")
+            return
+        self.show_pending_edits(
+            f"Committed {result.applied} edits in {result.transactions} transactions; {len(result.conflicts)} conflicts"
+        )
+        if self.watcher is None:
+            # Without a watcher nothing else notices our own commit.
+            self.refresh_platform_list()
+            self.rebuild_suggestions()
+            self.invalidate_similar(tables)
+        if result.conflicts:
+            self.display_message(
+                ["Not applied; these records changed since they were read:", *(conflict.describe() for conflict in result.conflicts)]
+            )
+
+    def on_discard_edits(self) -> None:
+        if self.edits is None:
+            return
+        self.edits.discard()
+        if self.detail_key is not None:
+            self.show_unit_details(*self.detail_key)
+        self.show_pending_edits("Discarded queued edits")
+
+    def show_pending_edits(self, message: str) -> None:
+        self.curation_status.set(f"{message} ({len(self.edits)} queued)")
 
     def display_message(self, lines: Sequence[str]) -> None:
+        self.detail_key = None
+        self.edit_target = None
         text = "\n".join(lines)
         self.details_text.configure(state=tk.NORMAL)
         self.details_text.delete("1.0", tk.END)
@@ -654,14 +1663,60 @@ class MilitaryCatalogApp:
 
     def on_close(self) -> None:
         try:
-            self.conn.close()
+            for job in (self.startup_job, self.watch_job, self.export_job, self.suggest_job, self.similar_job):
+                if job is not None:
+                    self.master.after_cancel(job)
+            # Let a schema upgrade or seed in progress commit rather than cut it off.
+            self.init_thread.join()
+            if self.watcher is not None:
+                self.watcher.stop()
+            if self.cache is not None:
+                self.cache.close()
+            if self.read_pool is not None:
+                self.read_pool.close()
+            if self.conn is not None and not self.read_only:
+                self.conn.execute("PRAGMA optimize")
+            if self.shards is not None:
+                self.shards.close()
+            if self.federation is not None:
+                self.federation.close()
+            elif self.conn is not None:
+                self.conn.close()
         finally:
             self.master.destroy()
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Browse the CMSDB military catalog.")
+    parser.add_argument("--db", default=DB_FILE, help="catalog database to open")
+    parser.add_argument("--read-only", action="store_true", help="open the database immutably without initialization")
+    parser.add_argument("--snapshot", help="open a snapshot built by catalog_snapshot.py (implies --read-only)")
+    parser.add_argument(
+        "--federate",
+        nargs="+",
+        metavar="CATALOG",
+        help="browse several catalogs (optionally alias=path) as one, read-only",
+    )
+    parser.add_argument("--shards", metavar="MAP", help="browse the sharded catalog described by a shard map")
+    parser.add_argument("--no-watch", action="store_true", help="do not follow changes committed by other processes")
+    parser.add_argument("--curate", action="store_true", help="edit records; edits are queued and committed together")
+    args = parser.parse_args()
+    if args.curate and (args.read_only or args.snapshot or args.federate or args.shards):
+        parser.error("--curate needs a writable catalog opened with --db")
+
+    db_file = args.snapshot or args.db
+    read_only = args.read_only or bool(args.snapshot)
+
     root = tk.Tk()
-    app = MilitaryCatalogApp(root)
+    app = MilitaryCatalogApp(
+        root,
+        db_file=db_file,
+        read_only=read_only,
+        sources=args.federate,
+        shard_map=args.shards,
+        watch=not args.no_watch,
+        curate=args.curate,
+    )
     root.mainloop()
 
 